@@ -0,0 +1,244 @@
+"""
+fake_blob_service.py
+
+In-process stand-in for the part of the Azure Blob Storage SDK used by the AzureBackend
+(src/storage_backends.py), so the Azure code path can be tested and benchmarked without network.
+
+The blobs are kept in a `FakeBlobStore`. Its `client` is passed as `client_factory` to the AzureBackend
+and creates clients with the interface of `BlobServiceClient`:
+
+    store = FakeBlobStore(latency=0.02, bandwidth=50e6, connect_latency=0.1)
+    backend = AzureBackend('account', FAKE_ACCOUNT_KEY, 'container', client_factory=store.client)
+
+Injected costs, adjustable at any time on the store:
+- `latency`: seconds per request (round trip)
+- `bandwidth`: bytes per second of the transferred content (None: unlimited)
+- `connect_latency`: seconds to open a new connection (TCP + TLS handshake)
+- `pool_size`: open connections per client; further concurrent requests wait for a free connection
+
+As in the SDK, every client has its own connection pool, large uploads are split into blocks
+(`max_single_put_size`, `max_block_size`) and listings are paged. `stats` counts the requests,
+opened connections and transferred bytes.
+
+"""
+
+import base64
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+from urllib.parse import quote
+
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+
+# Account key for generate_blob_sas, which needs a base64 encoded key
+FAKE_ACCOUNT_KEY = base64.b64encode(b'fake-account-key').decode('ascii')
+
+# Defaults of the SDK
+MAX_SINGLE_PUT_SIZE = 64 * 1024 * 1024
+MAX_BLOCK_SIZE = 4 * 1024 * 1024
+LIST_PAGE_SIZE = 5000
+POOL_SIZE = 10
+
+
+@dataclass
+class FakeContentSettings:
+    content_md5: Optional[bytearray]
+
+
+@dataclass
+class FakeBlobProperties:
+    name: str
+    size: int
+    last_modified: datetime
+    etag: str
+    content_settings: FakeContentSettings
+
+
+class FakeBlobStore:
+    """The blobs of all containers and the injected costs of the requests."""
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None,
+                 connect_latency: float = 0.0, pool_size: int = POOL_SIZE):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.connect_latency = connect_latency
+        self.pool_size = pool_size
+        self._blobs: Dict[str, Dict[str, bytes]] = {}
+        self._properties: Dict[str, Dict[str, FakeBlobProperties]] = {}
+        self._lock = threading.Lock()
+        self._etag = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'connections_opened': 0, 'bytes_uploaded': 0, 'bytes_downloaded': 0}
+
+    def _count(self, **counters):
+        with self._lock:
+            for counter, value in counters.items():
+                self.stats[counter] += value
+
+    def _transfer_seconds(self, size: int) -> float:
+        return size / self.bandwidth if self.bandwidth else 0.0
+
+    def client(self, account_url: str, credential=None, **kwargs) -> 'FakeBlobServiceClient':
+        """Creates a client, called like `BlobServiceClient(account_url=..., credential=..., **kwargs)`."""
+        return FakeBlobServiceClient(self, account_url, **kwargs)
+
+    # Storage operations, called by the clients while holding a connection
+
+    def put(self, container: str, name: str, content: bytes, overwrite: bool, single_put: bool = True):
+        # As Azure, the MD5 is only computed for blobs uploaded in one request
+        content_md5 = bytearray(hashlib.md5(content).digest()) if single_put else None
+        with self._lock:
+            blobs = self._blobs.setdefault(container, {})
+            if name in blobs and not overwrite:
+                raise ResourceExistsError(f"The specified blob already exists: {name}")
+            self._etag += 1
+            blobs[name] = content
+            self._properties.setdefault(container, {})[name] = FakeBlobProperties(
+                name=name, size=len(content), last_modified=datetime.now(timezone.utc), etag=f'"0x{self._etag:X}"',
+                content_settings=FakeContentSettings(content_md5),
+            )
+
+    def get(self, container: str, name: str) -> bytes:
+        with self._lock:
+            try:
+                return self._blobs[container][name]
+            except KeyError:
+                raise ResourceNotFoundError(f"The specified blob does not exist: {name}")
+
+    def get_properties(self, container: str, name: str) -> FakeBlobProperties:
+        with self._lock:
+            try:
+                return self._properties[container][name]
+            except KeyError:
+                raise ResourceNotFoundError(f"The specified blob does not exist: {name}")
+
+    def properties(self, container: str, name_starts_with: Optional[str] = None):
+        with self._lock:
+            return [properties for name, properties in sorted(self._properties.get(container, {}).items())
+                    if not name_starts_with or name.startswith(name_starts_with)]
+
+
+class FakeBlobServiceClient:
+    """A client with its own connection pool, like one `BlobServiceClient`."""
+
+    def __init__(self, store: FakeBlobStore, account_url: str, max_single_put_size: int = MAX_SINGLE_PUT_SIZE,
+                 max_block_size: int = MAX_BLOCK_SIZE, **kwargs):
+        self.store = store
+        self.url = account_url.rstrip('/')
+        self.max_single_put_size = max_single_put_size
+        self.max_block_size = max_block_size
+        self._pool = threading.Condition()
+        self._idle_connections = 0
+        self._open_connections = 0
+
+    @contextmanager
+    def request(self, size: int = 0) -> Iterator[None]:
+        """Holds a connection of the pool for one request and waits for its latency and transfer time."""
+        with self._pool:
+            while not self._idle_connections and self._open_connections >= self.store.pool_size:
+                self._pool.wait()
+            new_connection = not self._idle_connections
+            if new_connection:
+                self._open_connections += 1
+            else:
+                self._idle_connections -= 1
+
+        try:
+            if new_connection:
+                self.store._count(connections_opened=1)
+                time.sleep(self.store.connect_latency)
+            self.store._count(requests=1)
+            time.sleep(self.store.latency + self.store._transfer_seconds(size))
+            yield
+        finally:
+            with self._pool:
+                self._idle_connections += 1
+                self._pool.notify()
+
+    def get_container_client(self, container: str) -> 'FakeContainerClient':
+        return FakeContainerClient(self, container)
+
+
+class FakeContainerClient:
+
+    def __init__(self, service: FakeBlobServiceClient, container: str):
+        self.service = service
+        self.container_name = container
+
+    def get_blob_client(self, blob: str) -> 'FakeBlobClient':
+        return FakeBlobClient(self.service, self.container_name, blob)
+
+    def list_blobs(self, name_starts_with: Optional[str] = None) -> Iterator[FakeBlobProperties]:
+        """Lists the blobs page by page, every page is one request."""
+        blobs = self.service.store.properties(self.container_name, name_starts_with)
+        for start in range(0, max(len(blobs), 1), LIST_PAGE_SIZE):
+            with self.service.request():
+                page = blobs[start:start + LIST_PAGE_SIZE]
+            yield from page
+
+
+class FakeDownloader:
+    """The result of `download_blob`, like the StorageStreamDownloader of the SDK."""
+
+    def __init__(self, content: bytes):
+        self._content = content
+
+    def readall(self) -> bytes:
+        return self._content
+
+    def chunks(self) -> Iterator[bytes]:
+        for start in range(0, len(self._content), MAX_BLOCK_SIZE):
+            yield self._content[start:start + MAX_BLOCK_SIZE]
+
+
+class FakeBlobClient:
+
+    def __init__(self, service: FakeBlobServiceClient, container: str, blob: str):
+        self.service = service
+        self.container_name = container
+        self.blob_name = blob
+        self.url = f"{service.url}/{container}/{quote(blob)}"
+
+    def upload_blob(self, data, overwrite: bool = False):
+        """Uploads str, bytes or a binary file object, in blocks if larger than `max_single_put_size`."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        elif not isinstance(data, (bytes, bytearray)):
+            data = data.read()
+
+        size = len(data)
+        store = self.service.store
+        if size <= self.service.max_single_put_size:
+            with self.service.request(size):
+                store.put(self.container_name, self.blob_name, bytes(data), overwrite)
+        else:
+            # Put Block for every block, then Put Block List
+            for start in range(0, size, self.service.max_block_size):
+                with self.service.request(min(self.service.max_block_size, size - start)):
+                    pass
+            with self.service.request():
+                store.put(self.container_name, self.blob_name, bytes(data), overwrite, single_put=False)
+        store._count(bytes_uploaded=size)
+
+    def get_blob_properties(self) -> FakeBlobProperties:
+        with self.service.request():
+            return self.service.store.get_properties(self.container_name, self.blob_name)
+
+    def download_blob(self) -> FakeDownloader:
+        store = self.service.store
+        try:
+            content = store.get(self.container_name, self.blob_name)
+        except ResourceNotFoundError:
+            # The failed request costs a round trip as well
+            with self.service.request():
+                raise
+        with self.service.request(len(content)):
+            pass
+        store._count(bytes_downloaded=len(content))
+        return FakeDownloader(content)
@@ -0,0 +1,170 @@
+"""
+generate_catalogue.py
+
+Generates a synthetic BIM requirements catalogue (`M_Workflows.csv`, `M_Models.csv`,
+`M_Elements.csv`, `M_Attributes.csv`) with the shape of the real catalogues:
+
+- language specific columns for every language (names, descriptions, allowed values, phases)
+- comma separated links (attributes -> elements, models, workflows; workflows -> models)
+- decimal comma sort keys ("1,5") as entered in Excel
+- project phases as comma separated lists, some attributes without phase
+- element images (small PNG files) for a part of the elements
+
+Usage:
+    python -m benchmarks.generate_catalogue data/bench_medium --scale medium
+
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+LANGUAGES = ['DE', 'EN', 'FR', 'IT']
+
+# Number of workflows, models, elements and attributes
+SCALES = {
+    'small': {'workflows': 5, 'models': 8, 'elements': 200, 'attributes': 2000},
+    'medium': {'workflows': 20, 'models': 20, 'elements': 1000, 'attributes': 10000},
+    'large': {'workflows': 40, 'models': 40, 'elements': 3000, 'attributes': 50000},
+}
+
+IFC_ENTITIES = ['IfcWall', 'IfcSlab', 'IfcDoor', 'IfcWindow', 'IfcColumn', 'IfcBeam', 'IfcSpace', 'IfcRoof', 'IfcStair']
+PSETS = ['Pset_WallCommon', 'Pset_SlabCommon', 'Pset_DoorCommon', 'Pset_SpaceCommon', 'CH_Custom', 'CH_Cost']
+DATA_TYPES = [('IfcBoolean', 'True, False', r'^(True|False)$', ''),
+              ('IfcLabel', '', '', ''),
+              ('IfcLengthMeasure', '', r'^\d+(\.\d+)?$', 'mm'),
+              ('IfcAreaMeasure', '', r'^\d+(\.\d+)?$', 'm2'),
+              ('IfcLabel', 'EI30, EI60, EI90', r'^EI(30|60|90)$', '')]
+PHASES = ['11', '21', '31', '32', '33', '41', '51', '52', '53']
+STATUS = ['active', 'active', 'active', 'new', 'changed']
+WORDS = ['wall', 'fire', 'resistance', 'load', 'bearing', 'external', 'acoustic', 'thermal', 'insulation',
+         'material', 'surface', 'finish', 'storey', 'reference', 'classification', 'cost', 'group']
+
+# 1x1 pixel PNG, the page only needs an existing image
+PNG_PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _links(rng: random.Random, prefix: str, count: int, max_links: int) -> str:
+    ids = rng.sample(range(count), rng.randint(1, min(max_links, count)))
+    return ', '.join(f'{prefix}{i}' for i in ids)
+
+
+def _sort_key(rng: random.Random, index: int) -> str:
+    # Decimal comma keys as entered in Excel, some keys are left empty
+    if rng.random() < 0.02:
+        return ''
+    return f'{index},5' if rng.random() < 0.2 else str(index)
+
+
+def generate_catalogue(workflows: int, models: int, elements: int, attributes: int,
+                       languages: List[str] = LANGUAGES, image_share: float = 0.3, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Generates the four import files of a master template.
+
+    Parameters:
+    workflows, models, elements, attributes (int): Number of rows per file.
+    languages (List[str]): The language suffixes of the language specific columns.
+    image_share (float): Share of elements with an image.
+    seed (int): Seed of the random generator, the same seed gives the same catalogue.
+
+    Returns:
+    Dict[str, pd.DataFrame]: The files by file name, e.g. 'M_Attributes.csv'.
+    """
+    rng = random.Random(seed)
+
+    workflows_df = pd.DataFrame({
+        'WorkflowID': [f'W{i}' for i in range(workflows)],
+        'WorkflowCode': [f'UC{i:03d}' for i in range(workflows)],
+        'SortWorkflow': range(workflows),
+        **{f'WorkflowName{lang}': [f'Usecase {i} {lang}' for i in range(workflows)] for lang in languages},
+        **{f'WorkflowDescription{lang}': [_text(rng, 12) for _ in range(workflows)] for lang in languages},
+        'ModelForWorkflow': [_links(rng, 'M', models, 4) for _ in range(workflows)],
+    })
+
+    models_df = pd.DataFrame({
+        'ModelID': [f'M{i}' for i in range(models)],
+        **{f'ModelName{lang}': [f'Model {i} {lang}' for i in range(models)] for lang in languages},
+        **{f'ModelDescription{lang}': [_text(rng, 15) for _ in range(models)] for lang in languages},
+        **{f'FileName{lang}': [f'XX_{i:02d}_{lang}.ifc' for i in range(models)] for lang in languages},
+        'SortModels': [_sort_key(rng, i) for i in range(models)],
+    })
+
+    elements_df = pd.DataFrame({
+        'ElementID': [f'E{i}' for i in range(elements)],
+        **{f'ElementName{lang}': [f'Element {i} {lang}' for i in range(elements)] for lang in languages},
+        'SortElement': [_sort_key(rng, i) for i in range(elements)],
+        'IfcEntityIfc4.0Name': [rng.choice(IFC_ENTITIES) for _ in range(elements)],
+        **{f'ElementDescription{lang}': [_text(rng, 25) for _ in range(elements)] for lang in languages},
+        'ImageName': [f'element_{i}.png' if rng.random() < image_share else None for i in range(elements)],
+        **{f'ContainedIn{lang}': ['IfcBuildingStorey'] * elements for lang in languages},
+    })
+
+    data_types = [rng.choice(DATA_TYPES) for _ in range(attributes)]
+    phases = [', '.join(sorted(rng.sample(PHASES, rng.randint(1, 4)))) if rng.random() < 0.9 else '' for _ in range(attributes)]
+    attributes_df = pd.DataFrame({
+        'AttributeID': [f'A{i}' for i in range(attributes)],
+        'AttributeName': [f'Attribute{i % 500}' for i in range(attributes)],
+        'SortAttribute': [i % 50 for i in range(attributes)],
+        **{f'AttributeDescription{lang}': [_text(rng, 20) for _ in range(attributes)] for lang in languages},
+        'Pset': [rng.choice(PSETS) for _ in range(attributes)],
+        **{f'AllowedValues{lang}': [data_type[1] for data_type in data_types] for lang in languages},
+        **{f'RegexCheck{lang}': [data_type[2] for data_type in data_types] for lang in languages},
+        'DataTyp': [data_type[0] for data_type in data_types],
+        'Unit': [data_type[3] for data_type in data_types],
+        'IFC2x3': ['x'] * attributes,
+        'IFC4': ['x'] * attributes,
+        'IFC4.3': ['x' if rng.random() < 0.8 else '' for _ in range(attributes)],
+        'Applicability': [''] * attributes,
+        'Status': [rng.choice(STATUS) for _ in range(attributes)],
+        'ElementLink': [_links(rng, 'E', elements, 3) for _ in range(attributes)],
+        'ModelLink': [_links(rng, 'M', models, 2) for _ in range(attributes)],
+        'WorkflowLink': [_links(rng, 'W', workflows, 3) for _ in range(attributes)],
+        **{f'ProjectPhase{lang}': phases for lang in languages},
+    })
+
+    return {
+        'M_Workflows.csv': workflows_df,
+        'M_Models.csv': models_df,
+        'M_Elements.csv': elements_df,
+        'M_Attributes.csv': attributes_df,
+    }
+
+
+def write_catalogue(folder: Path, catalogue: Dict[str, pd.DataFrame], write_images: bool = True):
+    """Writes the import files (and the element images) into a version folder."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    for file_name, df in catalogue.items():
+        df.to_csv(folder / file_name, index=False)
+
+    if write_images:
+        for image_name in catalogue['M_Elements.csv']['ImageName'].dropna():
+            (folder / image_name).write_bytes(PNG_PIXEL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic requirements catalogue")
+    parser.add_argument("folder", help="Version folder to write the import files to")
+    parser.add_argument("--scale", choices=SCALES.keys(), default='small', help="Size of the catalogue (default: small)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator (default: 0)")
+    parser.add_argument("--no-images", action='store_true', help="Do not write element images")
+    args = parser.parse_args()
+
+    catalogue = generate_catalogue(**SCALES[args.scale], seed=args.seed)
+    write_catalogue(Path(args.folder), catalogue, write_images=not args.no_images)
+    print(f"Catalogue ({args.scale}) written to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+run_benchmarks.py
+
+Benchmarks of the build pipeline and the requirements page on a synthetic catalogue
+(see generate_catalogue.py).
+
+The catalogue is generated into a temporary data folder (`DATA_DIR`), the real versions in
+`data/` are not touched. Every benchmark is repeated and the fastest and the median run are
+stored in `benchmarks/results/` as JSON. `--compare` reports the change against an earlier
+result and fails if a benchmark got slower than `--threshold`.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scale medium --repeat 3
+    python -m benchmarks.run_benchmarks --scale medium --compare benchmarks/results/<earlier>.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.generate_catalogue import SCALES, generate_catalogue, write_catalogue
+
+RESULTS_FOLDER = Path(__file__).parent / 'results'
+
+VERSION = 'bench'
+
+
+def _benchmarks(workers: int) -> Dict[str, Callable]:
+    """The benchmarks in execution order, each one returns the number of processed rows."""
+    # Imported after DATA_DIR is set
+    from src.import_csv import import_csv
+    from src.create_formated_excel_export import create_formated_excel_export
+    from src.create_libal_import_file import create_libal_import_file
+    from src.create_data_for_web import create_data_for_web
+    from src.load_data import load_file
+    from src.requirements_data import filter_columns_by_language, get_project_phases, prepare_requirements_data, split_by_model_and_element
+    from src.search_index import create_search_index, load_search_index, search
+    from src.facet_index import apply_facets, build_facet_index, load_workflow_links
+    from src.sort import SORT_RANK_COLUMN, sort_dataframe
+
+    def bench_import_csv():
+        import_csv(VERSION, 'M')
+        return len(load_file(VERSION, f'RawData_{VERSION}.xlsx'))
+
+    def bench_formated_excel_export():
+        create_formated_excel_export(VERSION, 'M', max_workers=workers)
+
+    def bench_libal_import_file():
+        create_libal_import_file(VERSION, 'M', max_workers=workers)
+
+    def bench_data_for_web():
+        create_data_for_web(VERSION)
+
+    web_data = {}
+
+    def bench_sort_dataframe():
+        if 'shuffled' not in web_data:
+            df = load_file(VERSION, 'data_for_web.csv').drop(columns=[SORT_RANK_COLUMN])
+            web_data['shuffled'] = df.sample(frac=1, random_state=0)
+        return len(sort_dataframe(web_data['shuffled']))
+
+    def bench_requirements_page():
+        if 'data' not in web_data:
+            web_data['data'] = load_file(VERSION, 'data_for_web.csv')
+        data = web_data['data']
+        phases = get_project_phases(data, 'DE')[:2]
+        prepared = prepare_requirements_data(data, 'DE', phases)
+        split_by_model_and_element(prepared, 'DE')
+        return len(prepared)
+
+    def bench_search_index():
+        create_search_index(VERSION)
+
+    def bench_search():
+        if 'index' not in web_data:
+            web_data['index'] = load_search_index(VERSION, 'DE')
+        # Every prefix of a two word query, as typed
+        query = ' '.join(web_data['index']['terms'][[len(web_data['index']['terms']) // 3, len(web_data['index']['terms']) // 2]])
+        return sum(len(search(web_data['index'], query[:end])[0]) for end in range(1, len(query) + 1))
+
+    def bench_facets():
+        if 'facets' not in web_data:
+            web_data.setdefault('data', load_file(VERSION, 'data_for_web.csv'))
+            web_data['facets'] = build_facet_index(filter_columns_by_language(web_data['data'], 'DE'), 'DE', load_workflow_links(VERSION))
+        index = web_data['facets']
+        # One value more selected per facet, as clicked in the sidebar
+        selections = {}
+        for facet, entry in index['facets'].items():
+            selections[facet] = entry['values'][:1].tolist()
+            mask, _ = apply_facets(index, selections)
+        return int(mask.sum())
+
+    return {
+        'import_csv': bench_import_csv,
+        'create_formated_excel_export': bench_formated_excel_export,
+        'create_libal_import_file': bench_libal_import_file,
+        'create_data_for_web': bench_data_for_web,
+        'sort_dataframe': bench_sort_dataframe,
+        'requirements_page': bench_requirements_page,
+        'create_search_index': bench_search_index,
+        'search': bench_search,
+        'facets': bench_facets,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scale: str, repeat: int = 3, workers: int = 1, only: Optional[List[str]] = None) -> Dict:
+    """
+    Generates a catalogue of the given scale and runs the benchmarks on it.
+
+    Returns:
+    Dict: Environment, scale and per benchmark `min_seconds`, `median_seconds`, `runs` and `rows`.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ['DATA_DIR'] = data_dir
+        try:
+            write_catalogue(Path(data_dir) / VERSION, generate_catalogue(**SCALES[scale]))
+
+            for name, benchmark in _benchmarks(workers).items():
+                # Later benchmarks need the output of the earlier ones, they are always executed once
+                runs = repeat if not only or name in only else 1
+                timings = []
+                rows = None
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    rows = benchmark()
+                    timings.append(time.perf_counter() - start)
+
+                if only and name not in only:
+                    continue
+                results[name] = {
+                    'min_seconds': round(min(timings), 4),
+                    'median_seconds': round(statistics.median(timings), 4),
+                    'runs': runs,
+                    'rows': rows,
+                }
+                print(f"{name}: {results[name]['min_seconds']:.3f}s (median {results[name]['median_seconds']:.3f}s)", file=sys.stderr)
+
+        finally:
+            del os.environ['DATA_DIR']
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'scale': scale,
+        'size': SCALES[scale],
+        'workers': workers,
+        'results': results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compares the fastest runs with a baseline result.
+
+    Returns:
+    List[str]: The benchmarks that are slower than `1 + threshold` times the baseline.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        ratio = result['min_seconds'] / max(baseline['results'][name]['min_seconds'], 1e-9)
+        print(f"{name}: {ratio:.2f}x of baseline", file=sys.stderr)
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the build pipeline on a synthetic catalogue")
+    parser.add_argument("--scale", choices=SCALES.keys(), default='small', help="Size of the catalogue (default: small)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (default: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="Export processes, see EXPORT_MAX_WORKERS (default: 1)")
+    parser.add_argument("--only", nargs='+', help="Only time these benchmarks")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against --compare (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    # The build steps print their progress, stdout is kept for the result
+    with redirect_stdout(sys.stderr):
+        result = run_benchmarks(args.scale, args.repeat, args.workers, args.only)
+
+    RESULTS_FOLDER.mkdir(exist_ok=True)
+    result_path = RESULTS_FOLDER / f"{datetime.now():%Y%m%d_%H%M%S}_{args.scale}.json"
+    result_path.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    print(json.dumps(result, indent=2))
+    print(f"Stored in {result_path}", file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare_results(result, baseline, args.threshold)
+        if regressions:
+            print(f"Slower than the baseline: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+storage_benchmark.py
+
+Benchmarks the Azure storage path offline, against the in-process fake of fake_blob_service.py
+with injected latency and bandwidth.
+
+A synthetic catalogue (see generate_catalogue.py) is uploaded to the fake and built into the
+web data. Then are timed:
+- `create_projects`: copying the base files of the master into `--projects` new project versions,
+  `--concurrency` at a time (as the bulk project creation in the admin area)
+- `page_load`: the storage calls of one load of the requirements page (versions, web data and
+  the image links of the elements)
+
+Besides the timings, every benchmark reports the requests, opened connections and transferred
+bytes per run, so connection reuse and caching can be compared independently of the machine.
+
+Usage:
+    python -m benchmarks.storage_benchmark --latency 20 --bandwidth 50 --connect-latency 100
+    python -m benchmarks.storage_benchmark --projects 10 --concurrency 4
+
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.fake_blob_service import FAKE_ACCOUNT_KEY, FakeBlobStore
+from benchmarks.generate_catalogue import PNG_PIXEL, SCALES, generate_catalogue
+from benchmarks.run_benchmarks import RESULTS_FOLDER, _git_commit
+from src import storage_backends
+from src.create_data_for_web import create_data_for_web
+from src.import_csv import import_csv
+from src.load_data import copy_base_files, get_download_link, get_versions, load_file, store_file
+from src.storage_backends import AzureBackend
+
+VERSION = 'bench'
+
+# Elements shown with their image on one page load
+PAGE_IMAGES = 20
+
+
+def upload_catalogue(scale: str):
+    """Uploads the import files and images of a synthetic master and builds its web data."""
+    catalogue = generate_catalogue(**SCALES[scale])
+    for file_name, df in catalogue.items():
+        store_file(df.to_csv(index=False), VERSION, file_name)
+    for image_name in catalogue['M_Elements.csv']['ImageName'].dropna():
+        store_file(PNG_PIXEL, VERSION, image_name)
+
+    import_csv(VERSION, 'M')
+    create_data_for_web(VERSION)
+
+
+def _benchmarks(projects: int, concurrency: int) -> Dict[str, Callable]:
+    """The benchmarks, each one returns the number of processed items."""
+    runs = {'create_projects': 0}
+
+    def bench_create_projects():
+        runs['create_projects'] += 1
+        project_versions = [f"{VERSION}-P-{runs['create_projects']}-{i}" for i in range(projects)]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda project_version: copy_base_files(VERSION, project_version), project_versions))
+        return len(project_versions)
+
+    def bench_page_load():
+        get_versions()
+        data = load_file(VERSION, 'data_for_web.csv')
+        image_names = data['ImageName'].dropna().unique()[:PAGE_IMAGES]
+        for image_name in image_names:
+            get_download_link(VERSION, image_name)
+        return len(data)
+
+    return {
+        'create_projects': bench_create_projects,
+        'page_load': bench_page_load,
+    }
+
+
+def run_storage_benchmark(scale: str = 'small', repeat: int = 3, latency: float = 0.02, bandwidth: Optional[float] = 50e6,
+                          connect_latency: float = 0.1, pool_size: int = 10, projects: int = 5, concurrency: int = 1) -> Dict:
+    """
+    Runs the storage benchmarks against a fake Azure Blob Storage.
+
+    Parameters:
+    latency, connect_latency (float): Seconds per request and per new connection.
+    bandwidth (float): Bytes per second, None for unlimited.
+    pool_size (int): Connections per client.
+
+    Returns:
+    Dict: Settings and per benchmark `min_seconds`, `median_seconds`, `runs`, `rows` and the
+          `requests`, `connections_opened` and `bytes_*` of the last run.
+    """
+    store = FakeBlobStore(pool_size=pool_size)
+    storage_backends.set_backend(AzureBackend('benchaccount', FAKE_ACCOUNT_KEY, 'bench', client_factory=store.client))
+    results = {}
+    try:
+        # The catalogue is set up without injected costs
+        upload_catalogue(scale)
+        store.latency, store.bandwidth, store.connect_latency = latency, bandwidth, connect_latency
+
+        for name, benchmark in _benchmarks(projects, concurrency).items():
+            timings = []
+            for _ in range(repeat):
+                store.reset_stats()
+                start = time.perf_counter()
+                rows = benchmark()
+                timings.append(time.perf_counter() - start)
+
+            results[name] = {
+                'min_seconds': round(min(timings), 4),
+                'median_seconds': round(statistics.median(timings), 4),
+                'runs': repeat,
+                'rows': rows,
+                **store.stats,
+            }
+            print(f"{name}: {results[name]['min_seconds']:.3f}s, {store.stats['requests']} requests, "
+                  f"{store.stats['connections_opened']} connections", file=sys.stderr)
+    finally:
+        storage_backends.set_backend(None)
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'scale': scale,
+        'latency': latency,
+        'bandwidth': bandwidth,
+        'connect_latency': connect_latency,
+        'pool_size': pool_size,
+        'projects': projects,
+        'concurrency': concurrency,
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Azure storage path against a local fake")
+    parser.add_argument("--scale", choices=SCALES.keys(), default='small', help="Size of the catalogue (default: small)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (default: 3)")
+    parser.add_argument("--latency", type=float, default=20, help="Milliseconds per request (default: 20)")
+    parser.add_argument("--bandwidth", type=float, default=50, help="MB per second, 0 for unlimited (default: 50)")
+    parser.add_argument("--connect-latency", type=float, default=100, help="Milliseconds per new connection (default: 100)")
+    parser.add_argument("--pool-size", type=int, default=10, help="Connections per client (default: 10)")
+    parser.add_argument("--projects", type=int, default=5, help="Project versions created per run (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Projects created at the same time (default: 1)")
+    args = parser.parse_args(argv)
+
+    # The build steps print their progress, stdout is kept for the result
+    with redirect_stdout(sys.stderr):
+        result = run_storage_benchmark(
+            args.scale, args.repeat, args.latency / 1000, args.bandwidth * 1e6 or None,
+            args.connect_latency / 1000, args.pool_size, args.projects, args.concurrency,
+        )
+
+    RESULTS_FOLDER.mkdir(exist_ok=True)
+    result_path = RESULTS_FOLDER / f"{datetime.now():%Y%m%d_%H%M%S}_storage_{args.scale}.json"
+    result_path.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    print(json.dumps(result, indent=2))
+    print(f"Stored in {result_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+xlsx_benchmark.py
+
+Compares the Excel readers on a RawData-like workbook: the former `pd.read_excel` call
+(openpyxl) against the reader used by `load_file` (see file_schemas.get_read_excel_options).
+
+The workbook is generated from the attributes of a synthetic catalogue (see generate_catalogue.py).
+Both readers must return the same DataFrame, otherwise the benchmark fails.
+
+Usage:
+    python -m benchmarks.xlsx_benchmark --rows 50000 --repeat 3
+
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.generate_catalogue import generate_catalogue
+from benchmarks.run_benchmarks import RESULTS_FOLDER, _git_commit
+from src.file_schemas import get_read_excel_options
+
+
+def generate_workbook(rows: int) -> bytes:
+    """A workbook with one sheet of `rows` attribute rows."""
+    catalogue = generate_catalogue(workflows=20, models=20, elements=1000, attributes=rows)
+    buffer = io.BytesIO()
+    catalogue['M_Attributes.csv'].to_excel(buffer, index=False, engine='xlsxwriter')
+    return buffer.getvalue()
+
+
+def _time(reader: Callable[[], pd.DataFrame], repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = reader()
+        timings.append(time.perf_counter() - start)
+    return df, timings
+
+
+def run_xlsx_benchmark(rows: int = 50000, repeat: int = 3) -> Dict:
+    """
+    Returns:
+    Dict: Size of the workbook and per reader `min_seconds` and `median_seconds`.
+    """
+    content = generate_workbook(rows)
+    readers = {
+        'read_excel_openpyxl': lambda: pd.read_excel(io.BytesIO(content)),
+        f"load_file_{get_read_excel_options()['engine']}": lambda: pd.read_excel(io.BytesIO(content), **get_read_excel_options()),
+    }
+
+    results = {}
+    frames = []
+    for name, reader in readers.items():
+        df, timings = _time(reader, repeat)
+        frames.append(df)
+        results[name] = {'min_seconds': round(min(timings), 4), 'median_seconds': round(statistics.median(timings), 4)}
+        print(f"{name}: {results[name]['min_seconds']:.3f}s", file=sys.stderr)
+
+    if not frames[0].equals(frames[1]):
+        raise AssertionError("The readers returned different DataFrames")
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'rows': rows,
+        'columns': len(frames[0].columns),
+        'workbook_mb': round(len(content) / 1e6, 2),
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Excel readers on a generated workbook")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows of the workbook (default: 50000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per reader (default: 3)")
+    args = parser.parse_args(argv)
+
+    result = run_xlsx_benchmark(args.rows, args.repeat)
+
+    RESULTS_FOLDER.mkdir(exist_ok=True)
+    result_path = RESULTS_FOLDER / f"{datetime.now():%Y%m%d_%H%M%S}_xlsx_{args.rows}.json"
+    result_path.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    print(json.dumps(result, indent=2))
+    print(f"Stored in {result_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
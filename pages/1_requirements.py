@@ -16,29 +16,70 @@ import asyncio
 from dotenv import load_dotenv
 
 from src.sort import sort_dataframe
-from src.load_data import load_file, get_versions, get_project_path, get_download_link
+from src.requirements_data import filter_columns_by_language, split_by_model_and_element
+from src.facet_index import WORKFLOW_LINKS_FILE, apply_facets, build_facet_index, load_workflow_links
+from src.search_index import SEARCH_INDEX_FILE, get_search_index, search
+from src.load_data import get_file_etag, load_bytes, load_file, get_versions, get_project_path, get_download_link
+from src.storage_backends import get_backend
+from src.storage_metrics import cached_call, mark_cache_miss
 from src.utils import load_config
 from src.ui_elements import custom_sidebar  
+from src.page_profiler import finish_page_profiling, profile_phase, start_page_profiling
 
 from src.utils import load_config
 
 config = load_config()
 MAIN_LANGUAGE = config.get('MAIN_LANGUAGE', False)
 FRONTEND_LANGUAGES = config.get('FRONTEND_LANGUAGES', MAIN_LANGUAGE)
+SEARCH_RESULTS = config.get('SEARCH_RESULTS') or 50
 
 # Constants
 DATA_FOLDER = 'data' #better logic?
 TRANSLATIONS_FILE = 'translations.json'
 #EXCEL_FILE_PATTERN = "Elementplan_{version}_raw_data.xlsx"
 
+# Translation of the label of every sidebar filter (translations['sidebar_filters']), see facet_index.py
+FACET_LABELS = {
+    'project_phase': 'project_phase',
+    'model': 'model',
+    'workflow': 'usecase',
+    'ifc_entity': 'ifc_entity',
+    'pset': 'pset',
+    'data_type': 'data_type',
+}
+
 
 @st.cache_data
-def load_data(version: str) -> pd.DataFrame:
+def load_data(version: str, etag: str = None) -> pd.DataFrame:
+    # The ETag is part of the cache key, a rebuilt version is loaded again
+    mark_cache_miss()
     df = load_file(version, 'data_for_web.csv')
     #Potential for Performance increase?
     return df
 
 
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_search_index(version: str, language_suffix: str, etag: str = None) -> Dict:
+    # Not copied on every rerun like st.cache_data, the index is only read.
+    # The ETag of the index file is part of the cache key, see `get_search_index_etag`
+    mark_cache_miss()
+    return get_search_index(version, language_suffix)
+
+
+def get_search_index_etag(version: str, language_suffix: str) -> str:
+    """The ETag of the stored index, of the web data the index is built from if there is none (versions built before)."""
+    return (get_file_etag(version, SEARCH_INDEX_FILE.format(language=language_suffix))
+            or get_file_etag(version, 'data_for_web.csv'))
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_facet_index(version: str, language_suffix: str, etag: str = None, links_etag: str = None,
+                     _data: pd.DataFrame = None) -> Dict:
+    # Built once per version and language from the loaded data and the workflow links, see facet_index.py
+    mark_cache_miss()
+    return build_facet_index(_data, language_suffix, load_workflow_links(version))
+
+
 @st.cache_data
 def load_translations(json_path: Path) -> Dict:
     with open(json_path, 'r', encoding='utf-8') as file:
@@ -48,49 +89,70 @@ def x_get_versions(data_folder: Path) -> List[str]:
     return sorted([f.name for f in data_folder.iterdir() 
                    if f.is_dir() and f.name != '__pycache__'], reverse=True)
 
-def filter_columns_by_language(df: pd.DataFrame, language_suffix: str) -> pd.DataFrame:
-    common_columns = [
-        'AttributeID', 'AttributeName', 'SortAttribute', 'Pset', 'DataTyp', 'Unit',
-        'IFC2x3', 'IFC4', 'IFC4.3', 'Applicability', 'ElementID', 'ModelID',
-        'WorkflowID', 'SortElement', 'IfcEntityIfc4.0Name', 'SortModels', 'Status', 'ImageName'
-    ]
-    language_specific_columns = [col for col in df.columns if col.endswith(language_suffix)]
-    columns_to_keep = common_columns + language_specific_columns
-    return df[columns_to_keep]
-
-def filter_by_project_phase(data: pd.DataFrame, language_suffix: str, translations: Dict) -> pd.DataFrame:
-    project_phase_column = f'ProjectPhase{language_suffix}'
-    if project_phase_column not in data.columns:
-        st.warning(f"No Data available for: {language_suffix}")
-        return data
+def filter_by_facets(data: pd.DataFrame, version: str, language_suffix: str, translations: Dict) -> pd.DataFrame:
+    """Sidebar filters (project phase, model, workflow, IFC entity, Pset, data type) with the number of requirements per value."""
+    index = cached_call(get_backend().name, 'facet_index', load_facet_index, version, language_suffix,
+                        get_file_etag(version, 'data_for_web.csv'), get_file_etag(version, WORKFLOW_LINKS_FILE), data)
+
+    # Selected values missing in this version or language (e.g. after switching it) are dropped
+    selections = {}
+    for facet, entry in index['facets'].items():
+        key = f"{facet}_filter"
+        selections[facet] = [value for value in st.session_state.get(key, []) if value in entry['values']]
+        st.session_state[key] = selections[facet]
+
+    mask, counts = apply_facets(index, selections)
+
+    for facet, entry in index['facets'].items():
+        value_counts = dict(zip(entry['values'].tolist(), counts[facet].tolist()))
+        label = translations['sidebar_filters'][FACET_LABELS[facet]][language_suffix]
+        st.sidebar.multiselect(
+            label,
+            options=[value for value, count in value_counts.items() if count or value in selections[facet]],
+            key=f"{facet}_filter",
+            format_func=lambda value, value_counts=value_counts: f"{value} ({value_counts[value]})",
+            placeholder=label
+        )
 
-    all_phases = set()
-    for phases in data[project_phase_column].dropna():
-        all_phases.update(phase.strip() for phase in phases.split(','))
-    all_phases = sorted(list(all_phases))
-      
-    selected_phases = st.sidebar.multiselect(
-        translations['sidebar_filters']['project_phase'][language_suffix],
-        options=all_phases,
-        default=[],
-        key="project_phase_filter",
-        placeholder=translations['sidebar_filters']['project_phase'][language_suffix]
-    )
-    
-    if not selected_phases:
+    if mask is None:
         return data
 
-    mask = data[project_phase_column].fillna('').apply(
-        lambda x: any(phase in [p.strip() for p in x.split(',')] for phase in selected_phases)
-    )
     filtered_data = data[mask]
-    
+
     if filtered_data.empty:
-        st.warning(f"No data found for the selected phase(s): {', '.join(selected_phases)}")
-    
+        st.warning(f"No data found for the selected filters: {', '.join(value for values in selections.values() for value in values)}")
+
     return filtered_data
 
 
+def display_search(data: pd.DataFrame, version: str, language_suffix: str, translations: Dict):
+    """Search box above the model tabs, lists the best hits within the shown (filtered) requirements."""
+    label = translations['plan']['search'][language_suffix]
+    query = st.text_input(label, key="requirements_search", placeholder=label, label_visibility="collapsed")
+    if not query.strip():
+        return
+
+    with profile_phase('search'):
+        index = cached_call(get_backend().name, 'search_index', load_search_index,
+                            version, language_suffix, get_search_index_etag(version, language_suffix))
+        # The index labels of the data are the rows of data_for_web.csv
+        rows, _ = search(index, query, limit=SEARCH_RESULTS, rows=data.index.to_numpy())
+
+    columns = {
+        f'ModelName{language_suffix}': 'ModelName',
+        f'ElementName{language_suffix}': 'ElementName',
+        'IfcEntityIfc4.0Name': 'IfcEntityIfc4.0Name',
+        'AttributeName': 'AttributeName',
+        'Pset': 'Pset',
+        f'AttributeDescription{language_suffix}': 'AttributeDescription',
+    }
+    hits = data.loc[rows, list(columns)].rename(columns={
+        column: translations['column_names'][name][language_suffix] for column, name in columns.items()
+    })
+    st.caption(f"{translations['plan']['search_hits'][language_suffix]}: {len(hits)}")
+    st.dataframe(hits, hide_index=True, use_container_width=True)
+
+
 def x_display_download_button(version: str, file_name: str):
     """
     This function displays a download button in the sidebar for an existing file.
@@ -119,11 +181,10 @@ def display_download_button(version: str, file_name: str):
         # Display a direct link for Azure-hosted files
         st.sidebar.markdown(f"[{file_name}]({filepath})")
 
-    else:  # Case for local files
+    else:  # Case for local, in-memory and SQLite files
 
-        # Display a download button for local files
-        with open(filepath, "rb") as file:
-            file_data = file.read()
+        # Display a download button for files of the other backends
+        file_data = load_bytes(version, file_name)
 
         st.sidebar.download_button(
             label=file_name,
@@ -309,7 +370,8 @@ def display_element_data_html_columns(element_data: pd.DataFrame, language_suffi
 
         try:
             if not pd.isna(picture_name) and isinstance(picture_name, str) and picture_name.strip():
-                img_url = get_download_link(version=version, file_name=picture_name, data_folder='data')
+                with profile_phase('image_link'):
+                    img_url = get_download_link(version=version, file_name=picture_name, data_folder='data')
                 right_column.image(img_url, use_column_width=True)
             else:
                 right_column.write("")
@@ -373,10 +435,12 @@ def sidebar_select_language(translations, current_language_suffix):
 def main():
     
     data_folder = get_project_path(DATA_FOLDER)
-    available_version = get_versions(data_folder)
+    with profile_phase('get_versions'):
+        available_version = get_versions(data_folder)
 
     organisation_folder = get_project_path('organisation_data')
-    translations = load_translations(organisation_folder / TRANSLATIONS_FILE)
+    with profile_phase('load_translations'):
+        translations = load_translations(organisation_folder / TRANSLATIONS_FILE)
 
     if 'language_suffix' not in st.session_state:
         st.session_state['language_suffix'] = MAIN_LANGUAGE
@@ -394,7 +458,9 @@ def main():
 
     # Load data for the selected version
     try:
-        data = load_data(selected_version)
+        with profile_phase('load_data'):
+            data = cached_call(get_backend().name, 'web_data', load_data,
+                               selected_version, get_file_etag(selected_version, 'data_for_web.csv'))
     except FileNotFoundError as e:
         st.error(f"The data for version {selected_version} is missing.")
         return
@@ -407,7 +473,8 @@ def main():
 
     # Filter data by the selected language and handle missing data early
     try:
-        data_filtered_by_language = filter_columns_by_language(data, language_suffix)
+        with profile_phase('filter_columns_by_language'):
+            data_filtered_by_language = filter_columns_by_language(data, language_suffix)
     except KeyError:
         st.warning(f"No data available for the selected language: {language_suffix}")
         return
@@ -424,23 +491,29 @@ def main():
 
     # Proceed only if data is available
     try:
-        data_filtered_by_phase = filter_by_project_phase(data_filtered_by_language, language_suffix, translations)
+        with profile_phase('filter_by_facets'):
+            data_filtered = filter_by_facets(data_filtered_by_language, selected_version, language_suffix, translations)
         
         st.sidebar.markdown("---")
         #download_url_elementplan = get_download_link(version=selected_version,file_name=f'Elementplan_{language_suffix}_{selected_version}.xlsx', data_folder='data' )
         button_text_plan = translations['home']['download_elementplan_button'][language_suffix]
         file_name = f'Elementplan_{language_suffix}_{selected_version}.xlsx'
 
-        display_download_button(selected_version, file_name)
+        with profile_phase('download_button'):
+            display_download_button(selected_version, file_name)
         
-        model_data_sorted = sort_dataframe(data_filtered_by_phase)
+        display_search(data_filtered, selected_version, language_suffix, translations)
+
+        with profile_phase('sort_dataframe'):
+            model_data_sorted = sort_dataframe(data_filtered)
         
-        tab_labels = model_data_sorted[f'ModelName{language_suffix}'].dropna().unique().tolist()
+        with profile_phase('split_by_model_and_element'):
+            models = split_by_model_and_element(model_data_sorted, language_suffix)
+        tab_labels = [model_name for model_name, _, _ in models]
 
         tabs = st.tabs(tab_labels)
-        for tab, file_name in zip(tabs, tab_labels):
-            with tab:
-                model_df = model_data_sorted[model_data_sorted[f'ModelName{language_suffix}'] == file_name]
+        for tab, (model_name, model_df, elements) in zip(tabs, models):
+            with tab, profile_phase(f'render tab {model_name}'):
                 header_content = model_df[f'ModelName{language_suffix}'].unique()
                 
                 if len(header_content) == 1:
@@ -456,9 +529,8 @@ def main():
                     st.write(model_description)
                     st.markdown("---")
                 
-                for element_name in model_df[f'ElementName{language_suffix}'].unique():
+                for _, element_data in elements:
                     with st.container():
-                        element_data = model_df[model_df[f'ElementName{language_suffix}'] == element_name]
                         #Different Options
                         #display_element_data_expander(element_data, language_suffix, translations)
                         display_element_data_html_columns(element_data, language_suffix, translations, selected_version)
@@ -469,4 +541,8 @@ def main():
         #st.error(f"No data available for the selected project phase: {str(e)}")
         return
 
-main()
\ No newline at end of file
+start_page_profiling('requirements')
+try:
+    main()
+finally:
+    finish_page_profiling()
@@ -7,29 +7,29 @@ Here you can:
 - Create new Master Versions as template
 - Create new projects from these templates and configure them by selecting usecases
 - See which projects use which version and have which usecasess/workflows.
+- Compare the import files of two versions.
 
 """
 
 
 import streamlit as st
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from dotenv import load_dotenv
 from st_aggrid import AgGrid, GridOptionsBuilder,GridUpdateMode
 from st_aggrid.grid_options_builder import GridOptionsBuilder
 
 from src.load_data import load_file, store_file, create_storage_folder
-from src.check_imports_data_structure import (
-    required_workflows_columns,
-    required_models_columns,
-    required_elements_columns,
-    required_attributes_columns,
-    check_required_columns,
-)
-
-from src.batch_processing_import import batch_processing_import
+from src.check_imports_data_structure import hash_upload, read_upload, validate_uploads
+
+from src.compare_two_versions import diff_versions, summarize_diff
+from src.job_runner import is_build_active, submit_build, list_jobs
+from src.project_index import get_project_overview, get_projects_using_workflow, load_project_index, rebuild_project_index
+from src.bulk_projects import create_projects_for_every_workflow
 from src.password_utils import check_password, logout_button
 from src.ui_elements import custom_sidebar  
+from src.page_profiler import finish_page_profiling, profile_phase, start_page_profiling
 from src.utils import load_config, extract_zip
 from src.load_data import load_file, get_versions, get_project_path, copy_base_files
 
@@ -41,29 +41,73 @@ FRONTEND_LANGUAGES = config.get('FRONTEND_LANGUAGES')
 VAR_PROJECT_NUMBER = config.get('VARIABLES', {}).get('PROJECT_NUMBER')
 VAR_PROJECT_NAME = config.get('VARIABLES', {}).get('PROJECT_NAME')
 
+# The import files with the label of their upload field
+UPLOAD_FILES = {
+    'M_Attributes.csv': 'Upload Attributes CSV',
+    'M_Elements.csv': 'Upload Elements CSV',
+    'M_Models.csv': 'Upload Models CSV',
+    'M_Workflows.csv': 'Upload Workflows CSV',
+}
+
+# Rows per page of the upload preview
+PREVIEW_ROWS = 100
+
+
+def show_issues(issues):
+    """Shows the issues of a validation report, errors block the build, warnings do not."""
+    for issue in issues:
+        text = issue['message']
+        if issue['values']:
+            text += f": {', '.join(issue['values'])}"
+        if issue['rows']:
+            more = ', ...' if issue['count'] > len(issue['rows']) else ''
+            text += f" (line {', '.join(str(row) for row in issue['rows'])}{more})"
+        if issue['severity'] == 'error':
+            st.error(text)
+        else:
+            st.warning(text)
+
 
-def check_files(version_name, file_name, required_columns):
-    """Load and validate the file against the required columns."""
-    df = load_file(version_name, file_name)  # Load the file content
+@st.cache_data(max_entries=8, show_spinner=False)
+def check_uploads(upload_hashes, _uploads):
+    """Validates the uploaded files, cached by their file names and content hashes."""
+    return validate_uploads(_uploads)
 
-    message = check_required_columns(df, required_columns)
-    if message is not None:
-        st.error(message)
-        return False
-    else:
-        st.success('All necessary columns exist')
-        st.dataframe(df)
-        return True
 
-def upload_field(folder_name, upload_text, csv_file_name):
-    """Handle file upload and save to the appropriate storage location."""
+def show_preview(file_name, content, content_hash):
+    """Shows one page of the uploaded file instead of the whole table."""
+    df = read_upload(content, file_name, content_hash)
+    pages = max((len(df) - 1) // PREVIEW_ROWS + 1, 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"preview_{file_name}")
+    start = (page - 1) * PREVIEW_ROWS
+    st.dataframe(df.iloc[start:start + PREVIEW_ROWS])
+    st.caption(f"Rows {start + 1}-{min(start + PREVIEW_ROWS, len(df))} of {len(df)}")
+
+
+def upload_field(upload_text):
+    """Handle file upload, returns the content of the uploaded file."""
     uploaded_file = st.file_uploader(upload_text, type=["csv"])
     if uploaded_file is not None:
-        file_content = uploaded_file.read()
-        # Save the file in either local storage or Azure Blob storage
-        store_file(file_content, folder_name, csv_file_name)
-        #st.success(f"File '{csv_file_name}' has been saved.")
-        return csv_file_name  # Return the name of the saved file
+        return uploaded_file.getvalue()
+
+
+def store_uploads(folder_name, uploads, upload_hashes):
+    """Save the uploaded files in parallel, files are only stored again if their content changed."""
+    stored = st.session_state.setdefault('stored_uploads', {})
+    changed = {
+        file_name: content for file_name, content in uploads.items()
+        if stored.get((folder_name, file_name)) != upload_hashes[file_name]
+    }
+    if not changed:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(changed)) as executor:
+        results = executor.map(lambda item: store_file(item[1], folder_name, item[0]), changed.items())
+        for file_name, result in zip(changed, results):
+            if result is False:
+                st.error(f"Failed to save '{file_name}'.")
+            else:
+                stored[(folder_name, file_name)] = upload_hashes[file_name]
 
 def get_available_languages(df: pd.DataFrame) -> List[str]:
     language_columns = [col for col in df.columns if col.startswith('AttributeDescription') and len(col) > len('AttributeDescription')]
@@ -94,7 +138,8 @@ def get_language_options(data):
 def replace_project_details_string(project_number, project_name):
     """Replace the strings defined in config with the actual project number and name"""
 
-    df = load_file(project_number, "M_Attributes.csv")
+    # Untyped, the file is stored again with only the placeholders replaced
+    df = load_file(project_number, "M_Attributes.csv", schema=False)
     
     project_number_var = config["VARIABLES"]["PROJECT_NUMBER"]
     project_name_var = config["VARIABLES"]["PROJECT_NAME"]
@@ -154,25 +199,21 @@ def clear_session_state():
 
 
 def create_new_version_for_every_workflow(selected_master_template):
+    """Builds a project for every workflow in parallel and reports the progress live."""
+    progress = st.progress(0.0, text="Merging the master template...")
+
+    def update_progress(completed, total, task, result):
+        progress.progress(completed / total, text=f"{completed}/{total} projects built ({task['project_version']})")
 
-    workflows_df = load_file(selected_master_template, "M_Workflows.csv")
-
-    for index, row in workflows_df.iterrows():
-        # Extract workflow details
-        workflow_code = row['WorkflowCode']
-        project_version = f"{selected_master_template}-P-{workflow_code}"
-        copy_base_files(selected_master_template, project_version)
-
-        df = load_file(project_version, "M_Workflows.csv")
-        df['Selected'] = False
-        df.at[index, 'Selected'] = True
-        if not pd.isna(row['ModelForWorkflow']):
-            filtered_df = df[df['Selected'] == True]
-            st.info(f"Project created for: {workflow_code}")
-            store_file(filtered_df.to_csv(index=False), project_version, "M_Workflows.csv")
-            batch_processing_import(project_version, "P")
+    results = create_projects_for_every_workflow(selected_master_template, progress_callback=update_progress)
+
+    for result in results:
+        if result['status'] == 'created':
+            st.info(f"Project created for: {result['workflow_code']}")
+        elif result['status'] == 'skipped':
+            st.warning(f"Skipping workflow {result['workflow_code']} as no model is assigned to the workflow/usecase.")
         else:
-            st.warning(f"Skipping workflow {workflow_code} as no model is assigned to the workflow/usecase.")
+            st.error(f"Error when creating the project for {result['workflow_code']}: {result['error']}")
 
 
 def display_workflow_with_checkboxes(df, selection_option, language):
@@ -264,56 +305,44 @@ def tab_upload_new_version():
     
     # File upload section
     if st.session_state.project_state.get('folder_created', False) and not st.session_state.project_state.get('version_online', False):
-        col1, col2, col3, col4, col5 = st.columns(5)
-        check1 = check2 = check3 = check4 = False
+        columns = dict(zip(UPLOAD_FILES, st.columns(5)))
 
         folder_name = st.session_state.project_state['folder_name']
 
-        with col1:
-            file_name1 = upload_field(folder_name, 'Upload Attributes CSV', 'M_Attributes.csv')
-            if file_name1 is not None:
-                try:
-                    check1 = check_files(folder_name, file_name1, required_attributes_columns)
-                except Exception as e:
-                    st.error(f"Error checking Attributes file: {str(e)}")
-
-        with col2:
-            file_name2 = upload_field(folder_name, 'Upload Elements CSV', 'M_Elements.csv')
-            if file_name2 is not None:
-                try:
-                    check2 = check_files(folder_name, file_name2, required_elements_columns)
-                except Exception as e:
-                    st.error(f"Error checking Elements file: {str(e)}")
-
-        with col3:
-            file_name3 = upload_field(folder_name, 'Upload Models CSV', 'M_Models.csv')
-            if file_name3 is not None:
-                try:
-                    check3 = check_files(folder_name, file_name3, required_models_columns)
-                except Exception as e:
-                    st.error(f"Error checking Models file: {str(e)}")
-
-        with col4:
-            file_name4 = upload_field(folder_name,'Upload Workflows CSV', 'M_Workflows.csv')
-            if file_name4 is not None:
-                try:
-                    check4 = check_files(folder_name, file_name4, required_workflows_columns)
-                except Exception as e:
-                    st.error(f"Error checking Workflows file: {str(e)}")
-
-        with col5:
-            pass
-
-
-        # Check if all files are uploaded and valid
-        all_files_valid = check1 and check2 and check3 and check4
+        uploads = {}
+        for file_name, upload_text in UPLOAD_FILES.items():
+            with columns[file_name]:
+                content = upload_field(upload_text)
+                if content is not None:
+                    uploads[file_name] = content
+
+        # Validated from the uploaded bytes, the stored files are only needed by the build
+        report = None
+        if uploads:
+            upload_hashes = {file_name: hash_upload(content) for file_name, content in uploads.items()}
+            store_uploads(folder_name, uploads, upload_hashes)
+            try:
+                report = check_uploads(tuple(upload_hashes.items()), uploads)
+            except Exception as e:
+                st.error(f"Error checking the files: {str(e)}")
+
+        if report is not None:
+            for file_name, content in uploads.items():
+                with columns[file_name]:
+                    issues = report['files'][file_name]['issues']
+                    show_issues(issues)
+                    if not any(issue['severity'] == 'error' for issue in issues):
+                        st.success('All necessary columns exist')
+                        show_preview(file_name, content, upload_hashes[file_name])
+
+        # Check if all files are uploaded and valid, the links between the files are checked once all of them are uploaded
+        all_files_valid = report is not None and len(uploads) == len(UPLOAD_FILES) and report['valid']
 
         # Display the button only if all files are valid
         if all_files_valid:
             if st.button("Process files and create version"):
                 try:
-                    batch_processing_import(st.session_state.project_state['folder_name'], "M")
-                    st.success(f"New Version {st.session_state.project_state['folder_name']} is now online")
+                    submit_build(st.session_state.project_state['folder_name'], "M")
                     st.session_state.project_state['version_online'] = True
                     
                     st.rerun()
@@ -324,7 +353,7 @@ def tab_upload_new_version():
 
     # Option to create a new version after successful upload
     if st.session_state.project_state.get('version_online', False):
-        st.success(f"Version {st.session_state.project_state['folder_name']} is online.")
+        st.success(f"Build of version {st.session_state.project_state['folder_name']} started, see 'Build Jobs' for the progress.")
         if st.button('Create a new Master Version'):
             st.session_state.project_state = {
                 'folder_created': False,
@@ -336,7 +365,31 @@ def tab_upload_new_version():
             st.rerun()
 
 def tab_project_overview():
-    pass
+    """Shows the built versions from the project index (see project_index.py) without loading their files."""
+    versions = load_project_index()
+    if versions is None:
+        st.write("No project index yet, it is written with every build.")
+        if st.button("Create the project index from the built versions"):
+            with st.spinner("Reading the built versions..."):
+                rebuild_project_index()
+            st.rerun()
+        return
+
+    overview = get_project_overview(versions)
+    masters = sorted(overview['Master Template'].unique())
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_masters = st.multiselect("Master Template:", masters, key='overview_masters')
+    with col2:
+        workflow_code = st.text_input("Projects using the workflow (code):", key='overview_workflow')
+
+    if selected_masters:
+        overview = overview[overview['Master Template'].isin(selected_masters)]
+    if workflow_code:
+        overview = overview[overview['Version'].isin(get_projects_using_workflow(versions, workflow_code.strip()))]
+
+    st.dataframe(overview, hide_index=True, use_container_width=True)
+    st.caption(f"{(overview['Type'] == 'Project').sum()} projects of {overview['Master Template'].nunique()} master templates")
 
 def tab_create_project():
     # Initialize session state variables
@@ -404,7 +457,7 @@ def tab_create_project():
             project_version = st.session_state.project_state['version']
 
             with col1:
-                data = load_file(project_version, "M_Attributes.csv")
+                data = load_file(project_version, "M_Attributes.csv", columns=['AttributeDescription*'])
                 language_options = get_language_options(data)
                 project_language = st.selectbox("Select the Project Language:", language_options['ShortName'])
                 st.session_state.project_state['language'] = project_language
@@ -426,10 +479,13 @@ def tab_create_project():
             
             if st.button('Update Project Configuration'):
                 try:
+                    # The inputs of a queued or running build must not change under it
+                    if is_build_active(selected_project):
+                        raise ValueError(f"A build of {selected_project} is already queued or running.")
                     filtered_df = workflows_sel[workflows_sel['Selected'] == True]
                     store_file(filtered_df.to_csv(index=False), selected_project, "M_Workflows.csv")
                     replace_project_details_string(selected_project, project_name)
-                    batch_processing_import(selected_project, "P")
+                    submit_build(selected_project, "P")
                     st.session_state.project_state.update({
                         'language': project_language,
                         'create_project_step': 3
@@ -440,7 +496,7 @@ def tab_create_project():
 
         
         if st.session_state.project_state['create_project_step']  == 3:
-            st.success(f"Project configuration updated successfully")
+            st.success(f"Project configuration updated, the build is running. See 'Build Jobs' for the progress.")
             if st.button("Create a new project"):
                 st.session_state.project_state = {
                     'version': "",
@@ -494,6 +550,64 @@ def tab_create_project_for_every_workflow():
                     st.success("New Projects for workflows/usecases created")
 
 
+def tab_compare_versions():
+    """Compares the import files of two versions, see compare_two_versions.py."""
+    available_versions = get_versions(get_project_path('data')) or []
+    if len(available_versions) < 2:
+        st.write("At least two versions are needed for a comparison")
+        return
+
+    # The versions are sorted newest first, by default the latest version is compared to the one before
+    col1, col2 = st.columns(2)
+    with col1:
+        old_version = st.selectbox("Old version:", available_versions, index=1, key='diff_old_version')
+    with col2:
+        new_version = st.selectbox("New version:", available_versions, index=0, key='diff_new_version')
+
+    if st.button("Compare versions"):
+        with st.spinner("Comparing the versions..."):
+            st.session_state['version_diff'] = diff_versions(old_version, new_version)
+
+    diff = st.session_state.get('version_diff')
+    if diff is None or (diff['old_version'], diff['new_version']) != (old_version, new_version):
+        return
+
+    st.dataframe(summarize_diff(diff), hide_index=True, use_container_width=True)
+
+    file_name = st.selectbox("Show the changes of:", list(diff['files']), key='diff_file_name')
+    result = diff['files'][file_name]
+    if result['changes']:
+        changes = pd.DataFrame(result['changes']).rename(columns={'key': result['key'], 'column': 'Column', 'old': 'Old', 'new': 'New'})
+        st.dataframe(changes.head(PREVIEW_ROWS * 10), hide_index=True, use_container_width=True)
+        if len(changes) > PREVIEW_ROWS * 10:
+            st.caption(f"First {PREVIEW_ROWS * 10} of {len(changes)} changed cells")
+    with st.expander(f"Added ({len(result['added'])}) and removed ({len(result['removed'])}) {result['key']}s"):
+        st.write("Added:", ", ".join(result['added']) or "-")
+        st.write("Removed:", ", ".join(result['removed']) or "-")
+
+
+@st.fragment(run_every=2)
+def tab_build_jobs():
+    """Shows the state of the background builds, refreshed every 2 seconds."""
+    jobs = list_jobs()
+    if not jobs:
+        st.write("No builds have been started yet.")
+        return
+
+    jobs_df = pd.DataFrame([{
+        'Version': job['version'],
+        'Type': job['master_or_project'],
+        'Status': job['status'],
+        'Stage': job['stage'],
+        'Submitted': job['submitted'],
+        'Finished': job['finished'],
+        'Seconds': job['seconds'],
+        'Stage Timings': ", ".join(f"{stage['stage']}: {stage['seconds']:.1f}s" for stage in job['stages']),
+        'Error': job['error'],
+    } for job in jobs])
+    st.dataframe(jobs_df, hide_index=True, use_container_width=True)
+
+
 def main():
 
     if 'language_suffix' not in st.session_state:
@@ -507,28 +621,33 @@ def main():
         logout_button()
         
         st.title("Admin Area")
-        tab1, tab2, tab3, tab4, tab5= st.tabs(['Project Overview','New Masters Template', 'Create Project Version', 'Create Project for every Workflow', '...' ])
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(['Project Overview','New Masters Template', 'Create Project Version', 'Create Project for every Workflow', 'Compare Versions', 'Build Jobs' ])
 
-        with tab1:
+        with tab1, profile_phase('render tab Project Overview'):
             st.subheader("Project overview")
             tab_project_overview()
             
 
-        with tab2:
+        with tab2, profile_phase('render tab New Masters Template'):
             st.subheader("New Masters Template")
             tab_upload_new_version()
 
-        with tab3:
+        with tab3, profile_phase('render tab Create Project Version'):
             st.subheader("Create Project Version")
             tab_create_project()
 
-        with tab4:
+        with tab4, profile_phase('render tab Create Project for every Workflow'):
             st.subheader("Create Project for every Workflow")
             st.warning("Please be carefull and only use this in the staging area!")
             tab_create_project_for_every_workflow()
             
-        with tab5:
-            st.subheader("...")
+        with tab5, profile_phase('render tab Compare Versions'):
+            st.subheader("Compare Versions")
+            tab_compare_versions()
+
+        with tab6, profile_phase('render tab Build Jobs'):
+            st.subheader("Build Jobs")
+            tab_build_jobs()
     
     
 
@@ -545,4 +664,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    start_page_profiling('admin')
+    try:
+        main()
+    finally:
+        finish_page_profiling()
@@ -1,22 +1,77 @@
-import os
-import sys
-from pathlib import Path
-from io import StringIO
+"""
+batch_processing_import.py
+
+Builds a version: imports the uploaded CSV files and creates the Excel exports and the web data.
+
+Used by the admin area (as background job, see job_runner.py) and from the command line, e.g. to
+rebuild many versions after a template change from cron or CI:
+
+    python -m src.batch_processing_import "V2.1-P-*" --workers 4 --report build_report.json
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+Versions can be given as names or glob patterns. Versions whose inputs did not change since their
+last build (see build_manifest.py) are skipped unless `--force` is given. A JSON report with the
+status and the stage timings of every version is written to stdout or to `--report`.
+
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
 
 from src.import_csv import import_csv
 from src.create_formated_excel_export import create_formated_excel_export
 from src.create_libal_import_file import create_libal_import_file
 from src.create_data_for_web import create_data_for_web
+from src.regex_checks import create_regex_checks
+from src.fingerprint_index import create_fingerprint_index
+from src.search_index import create_search_index
+from src.translations import load_translation_service
+from src.build_manifest import is_up_to_date, store_manifest
+from src.project_index import update_project_index
+from src.instrumentation import build_report, collect, stage
+from src.load_data import get_project_path, get_versions, store_file
+from src.utils import load_config
+
+config = load_config()
 
+# Store a detailed report (stage and storage measurements) of every build in the version folder
+BUILD_REPORT = config.get('BUILD_REPORT', False)
+BUILD_REPORT_FILE = 'build_report.json'
 
-VERSION = 'test'
-master_or_project = 'M' #Master = 'M', Project Version = 'P', Update from Project = "U"
 
+def _run_stage(stage_name: str, progress_callback, func, *args, **kwargs):
+    """
+    Runs one build stage, measured by instrumentation.stage, and reports its start (seconds=None)
+    and duration to the callback.
+    """
+    print(f"Executing {stage_name}.py...")
+    if progress_callback:
+        progress_callback(stage_name, None)
+
+    with stage(stage_name, version=args[0]) as record:
+        result = func(*args, **kwargs)
+
+    if progress_callback:
+        progress_callback(stage_name, record['wall_seconds'])
+    return result
 
 
-def batch_processing_import(version:str, master_or_project:str):
+def stage_recorder(stages: List[Dict], progress_callback=None):
+    """A stage callback that adds the finished stages to `stages` (for the manifest) and passes every call on to `progress_callback`."""
+    def record_stage(stage_name, seconds):
+        if seconds is not None:
+            stages.append({'stage': stage_name, 'seconds': seconds})
+        if progress_callback:
+            progress_callback(stage_name, seconds)
+    return record_stage
+
+
+def batch_processing_import(version:str, master_or_project:str, progress_callback=None, max_workers=None):
     """
     Executes scripts based on the provided version and type.
 
@@ -26,37 +81,207 @@ def batch_processing_import(version:str, master_or_project:str):
                              Acceptable values are:
                              - "M" for Master
                              - "P" for Project
-    
+    progress_callback (Callable): Optional, called as `progress_callback(stage, seconds)` when a
+                                  stage starts (seconds is None) and when it is finished.
+    max_workers (int): Number of export processes per exporter, see parallel_export.py.
+
+    Returns:
+    Files in the Version folder and the build manifest (input hashes and stage timings)
+    as Dict, see build_manifest.py.
+    """
+    start = time.perf_counter()
+    stages = []
+    record_stage = stage_recorder(stages, progress_callback)
+
+    with collect() as records:
+        # Execute import_csv.py
+        _run_stage('import_csv', record_stage, import_csv, version, master_or_project)
+
+        create_outputs(version, master_or_project, max_workers=max_workers, progress_callback=record_stage)
+
+        manifest = finish_build(version, master_or_project, start, stages, progress_callback=record_stage)
+
+    if BUILD_REPORT:
+        report = build_report(records, version=version, master_or_project=master_or_project, seconds=manifest['seconds'])
+        store_file(json.dumps(report, indent=2), version, BUILD_REPORT_FILE)
+
+    return manifest
+
+
+def finish_build(version: str, master_or_project: str, start: float, stages: List[Dict], progress_callback=None) -> Dict:
+    """
+    The last steps of every build, once the import files and the outputs of the version are stored:
+    the fingerprint index, the build manifest and the entry of the project index.
+    Shared by `batch_processing_import` and the workflow projects of bulk_projects.py.
+
+    Parameters:
+    version (str): The built version.
+    master_or_project (str): "M" for Master, "P" for Project.
+    start (float): `time.perf_counter()` at the start of the build.
+    stages (List[Dict]): The finished stages as `{'stage': name, 'seconds': duration}`, see build_manifest.py.
+    progress_callback (Callable): Stage callback, see `stage_recorder` to have the fingerprint
+                                  stage in the manifest.
+
     Returns:
-    Files in the Version folder
+    Dict: The build manifest.
     """
-    # Add the parent directory to sys.path
-    current_dir = Path(__file__).parent
-    parent_dir = current_dir.parent
-    sys.path.append(str(parent_dir))
+    # Hashes of the imported rows to find changes between versions, see fingerprint_index.py
+    _run_stage('fingerprint_index', progress_callback, create_fingerprint_index, version)
 
-    # Set the VERSION environment variable
-    os.environ['VERSION'] = version
+    manifest = store_manifest(version, master_or_project, stages, time.perf_counter() - start)
+    update_project_index(version, master_or_project, manifest)
+    return manifest
 
-    # Execute import_csv.py
-    print("Executing import_csv.py...")
-    import_csv(version, master_or_project)
+
+def create_outputs(version: str, master_or_project: str, translations=None, max_workers=None, progress_callback=None):
+    """
+    Creates the exports, the web data with its search index and the regex checks from the stored `RawData_{version}.xlsx` and `M_Attributes.csv`.
+
+    Parameters:
+    version (str): The version to build.
+    master_or_project (str): "M" for Master, "P" for Project.
+    translations (TranslationService): Shared translations, loaded once if not given.
+    max_workers (int): Number of export processes per exporter, see parallel_export.py.
+    progress_callback (Callable): Optional stage callback, see `batch_processing_import`.
+    """
+    # Loaded once and shared by the exports of all languages
+    if translations is None:
+        translations = load_translation_service()
 
     # Execute create_formated_excel_export.py
-    print("Executing create_formated_excel_export.py...")
-    create_formated_excel_export(version, master_or_project)
+    _run_stage('create_formated_excel_export', progress_callback, create_formated_excel_export,
+               version, master_or_project, max_workers=max_workers, translations=translations)
 
     # Execute create_libal_import_file.py
-    print("Executing create_libal_import_file.py...")
-    create_libal_import_file(version, master_or_project)
+    _run_stage('create_libal_import_file', progress_callback, create_libal_import_file,
+               version, master_or_project, max_workers=max_workers)
+
+    _run_stage('create_data_for_web', progress_callback, create_data_for_web, version)
 
-    print("Executing create_data_for_web.py...")
+    # Full-text search of the requirements page, see search_index.py
+    _run_stage('search_index', progress_callback, create_search_index, version)
 
-    create_data_for_web(version)
+    # Compiled RegexCheck patterns for other tools, see regex_checks.py
+    _run_stage('regex_checks', progress_callback, create_regex_checks, version)
 
     print("All scripts executed successfully.")
 
 
+def get_version_type(version: str) -> str:
+    """Project versions are named `{master}-P-{project}`, everything else is a master template."""
+    return 'P' if '-P-' in version else 'M'
+
+
+def resolve_versions(patterns: List[str], available_versions: List[str]) -> List[str]:
+    """
+    Expands version names and glob patterns (e.g. "V2.1-P-*") to the matching existing versions.
+
+    Raises:
+    ValueError: If a pattern does not match any version.
+    """
+    versions = []
+    for pattern in patterns:
+        matches = fnmatch.filter(available_versions, pattern)
+        if not matches:
+            raise ValueError(f"No version matches '{pattern}'")
+        versions.extend(match for match in sorted(matches) if match not in versions)
+    return versions
+
+
+def build_version(version: str, master_or_project: Optional[str] = None, force: bool = False,
+                  max_workers: Optional[int] = None) -> Dict:
+    """
+    Builds one version unless it is up to date. Errors are reported in the result instead of raised.
+
+    Returns:
+    Dict: `version`, `type`, `status` ('built', 'skipped' or 'failed'), `seconds`, `stages`
+          and `error` if the build failed.
+    """
+    master_or_project = master_or_project or get_version_type(version)
+    result = {'version': version, 'type': master_or_project, 'stages': [], 'error': None}
+    start = time.perf_counter()
+
+    try:
+        if not force and is_up_to_date(version, master_or_project):
+            result['status'] = 'skipped'
+        else:
+            manifest = batch_processing_import(version, master_or_project, max_workers=max_workers)
+            result.update({'status': 'built', 'stages': manifest['stages']})
+    except Exception as e:
+        result.update({'status': 'failed', 'error': str(e)})
+
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def build_versions(versions: List[str], master_or_project: Optional[str] = None, force: bool = False,
+                   workers: int = 1) -> List[Dict]:
+    """
+    Builds several versions, `workers` of them in parallel.
+
+    Parameters:
+    versions (List[str]): The versions to build.
+    master_or_project (str): "M" or "P" for all versions, None to derive it from the version name.
+    force (bool): Rebuild versions even if they are up to date.
+    workers (int): Number of versions built at the same time.
+
+    Returns:
+    List[Dict]: One result per version (see `build_version`), in the order of `versions`.
+    """
+    if workers <= 1 or len(versions) <= 1:
+        return [build_version(version, master_or_project, force) for version in versions]
+
+    results = {}
+    # The versions are built in parallel, the exports of one version run serially
+    with ProcessPoolExecutor(max_workers=min(workers, len(versions))) as executor:
+        futures = {
+            executor.submit(build_version, version, master_or_project, force, 1): version
+            for version in versions
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print(f"{result['version']}: {result['status']} ({result['seconds']:.1f}s)", file=sys.stderr)
+
+    return [results[version] for version in versions]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build one or many versions (import, Excel exports and web data)")
+    parser.add_argument("versions", nargs='+', help="Version names or glob patterns, e.g. 'V2.1-P-*'")
+    parser.add_argument("--type", choices=['M', 'P'], default=None,
+                        help="Build as Master (M) or Project (P), default: 'P' for versions containing '-P-'")
+    parser.add_argument("--workers", type=int, default=1, help="Number of versions built in parallel (default: 1)")
+    parser.add_argument("--force", action='store_true', help="Rebuild versions even if they are up to date")
+    parser.add_argument("--report", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        versions = resolve_versions(args.versions, get_versions(get_project_path('data')))
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    # The build steps print their progress, stdout is kept for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        results = build_versions(versions, args.type, args.force, args.workers)
+    report = {
+        'seconds': round(time.perf_counter() - start, 3),
+        'built': sum(result['status'] == 'built' for result in results),
+        'skipped': sum(result['status'] == 'skipped' for result in results),
+        'failed': sum(result['status'] == 'failed' for result in results),
+        'versions': results,
+    }
+
+    report_json = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            file.write(report_json)
+    else:
+        print(report_json)
+
+    return 1 if report['failed'] else 0
+
 
 if __name__ == "__main__":
-    batch_processing_import(VERSION, master_or_project)
\ No newline at end of file
+    sys.exit(main())
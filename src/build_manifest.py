@@ -0,0 +1,115 @@
+"""
+build_manifest.py
+
+Records which inputs a version was built from, so unchanged versions can be skipped when
+many versions are rebuilt at once (see the command line of batch_processing_import.py).
+
+After every successful build `build_manifest.json` is stored in the version folder. It contains
+the SHA-256 hash of every build input (the four import files of the version, the translations
+and the configuration) and the timings of the build stages. A version is up to date if the hashes
+of its current inputs equal the ones in the manifest.
+
+The manifest also contains the ETags of the inputs. If none of them changed the version is up to
+date without downloading and hashing the inputs; the hashes are only compared if an input was
+written since the build (e.g. uploaded again with the same content).
+
+"""
+
+import hashlib
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.load_data import get_file_etag, get_project_path, load_bytes, store_file
+
+MANIFEST_FILE = 'build_manifest.json'
+
+VERSION_INPUT_FILES = ['M_Workflows.csv', 'M_Models.csv', 'M_Elements.csv', 'M_Attributes.csv']
+
+# Inputs shared by all versions, relative to the project folder
+SHARED_INPUT_FILES = ['organisation_data/translations.json', 'config.yaml']
+
+
+def _hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def compute_input_hashes(version: str) -> Dict[str, Optional[str]]:
+    """
+    Returns the SHA-256 hash of every build input of a version (None if a file is missing).
+    """
+    hashes = {}
+    for file_name in VERSION_INPUT_FILES:
+        try:
+            hashes[file_name] = _hash_bytes(load_bytes(version, file_name))
+        except FileNotFoundError:
+            hashes[file_name] = None
+
+    for file_name in SHARED_INPUT_FILES:
+        path = get_project_path(file_name)
+        hashes[file_name] = _hash_bytes(path.read_bytes()) if path.exists() else None
+
+    return hashes
+
+
+def compute_input_etags(version: str) -> Dict[str, Optional[str]]:
+    """
+    Returns the ETag of every build input of a version (None if a file is missing), from the file
+    metadata only.
+    """
+    etags = {file_name: get_file_etag(version, file_name) for file_name in VERSION_INPUT_FILES}
+
+    for file_name in SHARED_INPUT_FILES:
+        path = get_project_path(file_name)
+        if path.exists():
+            stat = os.stat(path)
+            etags[file_name] = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        else:
+            etags[file_name] = None
+
+    return etags
+
+
+def load_manifest(version: str) -> Optional[Dict]:
+    """Returns the stored manifest of a version, or None if the version was never built."""
+    try:
+        return json.loads(load_bytes(version, MANIFEST_FILE))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def store_manifest(version: str, master_or_project: str, stages: List[Dict], seconds: float) -> Dict:
+    """
+    Stores the manifest of a finished build.
+
+    Parameters:
+    version (str): The built version.
+    master_or_project (str): "M" for Master, "P" for Project.
+    stages (List[Dict]): The build stages as `{'stage': name, 'seconds': duration}`.
+    seconds (float): The total duration of the build.
+
+    Returns:
+    Dict: The stored manifest.
+    """
+    manifest = {
+        'version': version,
+        'master_or_project': master_or_project,
+        'built': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(seconds, 3),
+        'stages': stages,
+        'inputs': compute_input_hashes(version),
+        'input_etags': compute_input_etags(version),
+    }
+    store_file(json.dumps(manifest, indent=2), version, MANIFEST_FILE)
+    return manifest
+
+
+def is_up_to_date(version: str, master_or_project: str) -> bool:
+    """True if the version was built as `master_or_project` from exactly its current inputs."""
+    manifest = load_manifest(version)
+    if manifest is None or manifest.get('master_or_project') != master_or_project:
+        return False
+    if manifest.get('input_etags') == compute_input_etags(version):
+        return True
+    return manifest.get('inputs') == compute_input_hashes(version)
@@ -0,0 +1,116 @@
+"""
+bulk_projects.py
+
+Creates one project version per workflow/usecase of a master template
+("Create Project for every Workflow" in the admin area).
+
+The master files are loaded and merged once. Every workflow project is derived from that shared
+merge (filter to the workflow, sort, store the raw data and the workflow links, create the exports
+and web data, then the fingerprints, manifest and project index entry as every build) and the
+projects are built concurrently in a process pool, so the run time scales with the CPU cores
+instead of the number of workflows.
+
+Output:
+-------
+- One project version `{master}-P-{WorkflowCode}` per workflow with assigned models.
+
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.batch_processing_import import create_outputs, finish_build, stage_recorder
+from src.import_csv import merge_import_data, prepare_raw_data, store_raw_data, store_workflow_links
+from src.load_data import copy_base_files, load_file, store_file
+from src.parallel_export import run_tasks
+from src.translations import load_translation_service
+
+
+def get_workflow_project_version(master_version: str, workflow_code: str) -> str:
+    return f"{master_version}-P-{workflow_code}"
+
+
+def build_workflow_project(merged_df: pd.DataFrame, task: Dict, master_version: str, translations) -> Dict:
+    """
+    Builds the project version of one workflow from the shared master merge.
+    Runs in a worker process, errors are reported in the result instead of raised.
+    """
+    project_version = task['project_version']
+    result = {'workflow_code': task['workflow_code'], 'project_version': project_version}
+
+    start = time.perf_counter()
+    stages = []
+    record_stage = stage_recorder(stages)
+    try:
+        copy_base_files(master_version, project_version)
+        store_file(pd.DataFrame([task['workflow']]).to_csv(index=False), project_version, "M_Workflows.csv")
+
+        project_df = merged_df[merged_df['WorkflowID'] == task['workflow_id']]
+        store_workflow_links(project_df, project_version)
+        store_raw_data(prepare_raw_data(project_df), project_version)
+
+        # The projects are already built in parallel, the exports of one project run serially
+        create_outputs(project_version, "P", translations=translations, max_workers=1, progress_callback=record_stage)
+        finish_build(project_version, "P", start, stages, progress_callback=record_stage)
+        result['status'] = 'created'
+    except Exception as e:
+        result.update({'status': 'failed', 'error': str(e)})
+
+    return result
+
+
+def create_projects_for_every_workflow(master_version: str, max_workers: Optional[int] = None,
+                                       progress_callback: Optional[Callable] = None) -> List[Dict]:
+    """
+    Creates a project version for every workflow of a master template.
+
+    Parameters:
+    master_version (str): The master template version.
+    max_workers (int): Number of projects built in parallel, see parallel_export.get_max_workers.
+    progress_callback (Callable): Called as `progress_callback(completed, total, task, result)`
+                                  whenever a project is finished.
+
+    Returns:
+    List[Dict]: One result per workflow with `workflow_code`, `project_version`, `status`
+                ('created', 'skipped' or 'failed') and `error` if applicable.
+    """
+    workflows_df = load_file(master_version, "M_Workflows.csv")
+    workflows_df['Selected'] = True
+
+    merged_df = merge_import_data(
+        workflows_df,
+        load_file(master_version, "M_Models.csv"),
+        load_file(master_version, "M_Elements.csv"),
+        load_file(master_version, "M_Attributes.csv"),
+    )
+
+    skipped = []
+    tasks = []
+    for _, row in workflows_df.iterrows():
+        workflow_code = row['WorkflowCode']
+        project_version = get_workflow_project_version(master_version, workflow_code)
+
+        if pd.isna(row['ModelForWorkflow']):
+            skipped.append({
+                'workflow_code': workflow_code,
+                'project_version': project_version,
+                'status': 'skipped',
+                'error': 'No model is assigned to the workflow/usecase.',
+            })
+            continue
+
+        tasks.append({
+            'workflow_code': workflow_code,
+            'workflow_id': row['WorkflowID'],
+            'project_version': project_version,
+            'workflow': row.to_dict(),
+        })
+
+    translations = load_translation_service()
+    results = run_tasks(
+        build_workflow_project, merged_df, tasks, master_version, translations,
+        max_workers=max_workers, progress_callback=progress_callback,
+    )
+    return skipped + results
@@ -1,11 +1,46 @@
+"""
+check_imports_data_structure.py
+
+Validation of the import files (M_Workflows.csv, M_Models.csv, M_Elements.csv, M_Attributes.csv)
+before they are processed by import_csv.py.
+
+`validate_files` checks every file once with vectorized pandas operations and returns a report:
+- required columns (see `required_*_columns` in config.yaml)
+- empty and duplicate IDs
+- links to IDs that do not exist (`ElementLink`, `ModelLink`, `WorkflowLink`, `ModelForWorkflow`)
+- sort keys that are not numeric (decimal commas as "1,5" are accepted)
+- `RegexCheck*` patterns that do not compile and `AllowedValues*` not matching them (see regex_checks.py)
+
+Uploads are validated from their bytes (`validate_uploads`), the files are parsed and validated in
+parallel threads and the parsed files are cached by their content hash.
+
+The report is a Dict:
+    {'valid': bool, 'errors': int, 'warnings': int, 'seconds': float,
+     'files': {file_name: {'rows': int, 'issues': [issue, ...]}}}
+Every issue names the `check`, `severity` ("error" or "warning"), `column`, a `message`, the
+number of affected rows (`count`) and the first affected `rows` (line numbers of the file) and `values`.
+
+"""
+
+import csv
+import hashlib
+import io
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
 import yaml
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.file_schemas import SORT_PREFIX, get_read_csv_options, matches_column
+from src.load_data import load_file
+from src.regex_checks import ALLOWED_VALUES_PREFIX, REGEX_PREFIX, check_allowed_values
+
 with open("config.yaml", "r") as file:
     config_data = yaml.safe_load(file)
 
@@ -14,24 +49,304 @@ required_models_columns = config_data["required_models_columns"]
 required_elements_columns = config_data["required_elements_columns"]
 required_attributes_columns = config_data["required_attributes_columns"]
 
-def check_required_columns(df: pd.DataFrame, required_columns: List[str]) -> None:
-    missing_columns = []
-    for column in required_columns:
-        if '*' in column:
-            base_column = column[:-1]
-            if not any(col.startswith(base_column) for col in df.columns):
-                missing_columns.append(column)
-        elif column not in df.columns:
-            missing_columns.append(column)
-    
-    if missing_columns:
-        #raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
-        return (f"Missing required columns: {', '.join(missing_columns)}")
-    
-def check_for_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
+IMPORT_FILES = ['M_Workflows.csv', 'M_Models.csv', 'M_Elements.csv', 'M_Attributes.csv']
+
+REQUIRED_COLUMNS = dict(zip(IMPORT_FILES, [
+    required_workflows_columns,
+    required_models_columns,
+    required_elements_columns,
+    required_attributes_columns,
+]))
+
+ID_COLUMNS = dict(zip(IMPORT_FILES, ['WorkflowID', 'ModelID', 'ElementID', 'AttributeID']))
+
+# Columns with comma separated IDs of another file
+LINK_COLUMNS = {
+    'M_Workflows.csv': {'ModelForWorkflow': 'M_Models.csv'},
+    'M_Attributes.csv': {
+        'ElementLink': 'M_Elements.csv',
+        'ModelLink': 'M_Models.csv',
+        'WorkflowLink': 'M_Workflows.csv',
+    },
+}
+
+# Rows and values listed per issue, the count covers all of them
+MAX_REPORTED_ROWS = 20
+
+# The header is line 1 of the file
+_FIRST_LINE = 2
+
+# Number of parsed uploads kept in memory, see read_upload
+UPLOAD_CACHE_SIZE = 8
+_upload_cache = OrderedDict()
+_upload_cache_lock = threading.Lock()
+
+
+def missing_columns(columns: List[str], required_columns: List[str]) -> List[str]:
+    """The required columns (patterns as in config.yaml) without a matching column."""
+    return [required for required in required_columns if not any(matches_column(column, [required]) for column in columns)]
+
+
+def check_required_columns(df: pd.DataFrame, required_columns: List[str]) -> Optional[str]:
+    missing = missing_columns(df.columns, required_columns)
+    if missing:
+        return (f"Missing required columns: {', '.join(missing)}")
+
+
+def _issue(check: str, severity: str, column: Optional[str], message: str, mask: pd.Series,
+           values: Optional[pd.Series] = None) -> Dict:
+    rows = mask.index[mask.to_numpy()]
+    if values is None:
+        values = pd.Series([], dtype=object)
+    return {
+        'check': check,
+        'severity': severity,
+        'column': column,
+        'message': message,
+        'count': int(mask.sum()),
+        'rows': [int(row) + _FIRST_LINE for row in rows[:MAX_REPORTED_ROWS]],
+        'values': [str(value) for value in values.unique()[:MAX_REPORTED_ROWS]],
+    }
+
+
+def _is_empty(series: pd.Series) -> pd.Series:
+    return series.isna() | (series.astype(str).str.strip() == '')
+
+
+def check_for_empty_rows(df: pd.DataFrame, id_column: Optional[str] = None) -> pd.DataFrame:
     """ Check for rows with no ID"""
-    pass
+    id_column = id_column or df.columns[0]
+    return df[_is_empty(df[id_column])]
+
+
+def check_for_missing_values_in_column(df: pd.DataFrame, column_name: str) -> dict:
+    """The number and line numbers of the rows without a value in the column."""
+    mask = _is_empty(df[column_name])
+    return _issue('missing_values', 'warning', column_name, f"{column_name} has no value", mask)
+
+
+def get_ids(df: pd.DataFrame, id_column: str) -> pd.Index:
+    """The distinct, stripped IDs of a file."""
+    return pd.Index(df[id_column].dropna().astype(str).str.strip().unique())
+
+
+def split_links(value: str) -> List[str]:
+    """The IDs of a link cell: "E1, E2" -> ["E1", "E2"], quoted IDs may contain commas (as in import_csv.py)."""
+    links = next(csv.reader([value], skipinitialspace=True)) if '"' in value else value.split(',')
+    return [link.strip() for link in links if link.strip()]
+
+
+def _check_ids(df: pd.DataFrame, id_column: str) -> List[Dict]:
+    issues = []
+    empty = _is_empty(df[id_column])
+    if empty.any():
+        issues.append(_issue('empty_id', 'error', id_column, f"Rows without {id_column}", empty))
+
+    ids = df[id_column].astype(str).str.strip()
+    duplicated = ids.duplicated(keep=False) & ~empty
+    if duplicated.any():
+        issues.append(_issue('duplicate_id', 'error', id_column, f"{id_column} is not unique",
+                             duplicated, ids[duplicated]))
+    return issues
+
+
+def _check_links(df: pd.DataFrame, column: str, known_ids: pd.Index, target_file: str) -> List[Dict]:
+    # Link cells repeat a few combinations of IDs, every distinct cell is parsed once
+    cells = df[column].dropna().astype(str)
+    known = set(known_ids)
+    dangling_cells = {}
+    for cell in cells.unique():
+        dangling = [link for link in split_links(cell) if link not in known]
+        if dangling:
+            dangling_cells[cell] = dangling
+    if not dangling_cells:
+        return []
+    mask = df[column].isin(list(dangling_cells))
+    dangling_ids = pd.Series([link for links in dangling_cells.values() for link in links], dtype=object)
+    return [_issue('dangling_link', 'error', column, f"{column} refers to IDs missing in {target_file}",
+                   mask, dangling_ids)]
+
+
+def _check_sort_keys(df: pd.DataFrame) -> List[Dict]:
+    issues = []
+    for column in [column for column in df.columns if column.startswith(SORT_PREFIX)]:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            continue
+        text = values.astype(str).str.strip()
+        numbers = pd.to_numeric(text.str.replace(',', '.', regex=False), errors='coerce')
+        invalid = numbers.isna() & ~_is_empty(values)
+        if invalid.any():
+            issues.append(_issue('non_numeric_sort', 'warning', column,
+                                 f"{column} is not numeric, these rows are sorted last", invalid, text[invalid]))
+    return issues
+
+
+def _check_regex_patterns(df: pd.DataFrame) -> List[Dict]:
+    issues = []
+    failed = check_allowed_values(df)
+    for language, checks in failed.groupby('language', sort=False):
+        regex_column = f'{REGEX_PREFIX}{language}'
+        invalid = checks[checks['error'].notna()]
+        if not invalid.empty:
+            mask = df.index.to_series().isin(invalid['row'])
+            issues.append(_issue('invalid_regex', 'error', regex_column,
+                                 f"{regex_column} contains invalid regular expressions", mask, invalid['pattern']))
+
+        mismatched = checks[checks['error'].isna()]
+        if not mismatched.empty:
+            allowed_column = f'{ALLOWED_VALUES_PREFIX}{language}'
+            mask = df.index.to_series().isin(mismatched['row'])
+            issues.append(_issue('invalid_allowed_value', 'warning', allowed_column,
+                                 f"{allowed_column} contains values not matching {regex_column}",
+                                 mask, mismatched['invalid_values'].explode()))
+    return issues
+
+
+def validate_file(df: pd.DataFrame, file_name: str, known_ids: Optional[Dict[str, pd.Index]] = None) -> List[Dict]:
+    """
+    Validates one import file.
+
+    Parameters:
+    df (pd.DataFrame): The file, loaded untyped (`load_file(..., schema=False)`).
+    file_name (str): The name of the file, e.g. 'M_Attributes.csv'.
+    known_ids (Dict[str, pd.Index]): The IDs per file (see `get_ids`) to check the links against.
+                                     Links to files missing here are not checked.
+
+    Returns:
+    List[Dict]: The issues, empty if the file is valid.
+    """
+    known_ids = known_ids or {}
+    missing = missing_columns(df.columns, REQUIRED_COLUMNS.get(file_name, []))
+    issues = []
+    if missing:
+        issues.append({
+            'check': 'required_columns',
+            'severity': 'error',
+            'column': None,
+            'message': f"Missing required columns: {', '.join(missing)}",
+            'count': len(missing),
+            'rows': [],
+            'values': missing,
+        })
+
+    id_column = ID_COLUMNS.get(file_name)
+    if id_column in df.columns:
+        issues.extend(_check_ids(df, id_column))
+
+    for column, target_file in LINK_COLUMNS.get(file_name, {}).items():
+        if column in df.columns and target_file in known_ids:
+            issues.extend(_check_links(df, column, known_ids[target_file], target_file))
+
+    issues.extend(_check_sort_keys(df))
+    issues.extend(_check_regex_patterns(df))
+    return issues
+
+
+def validate_files(frames: Dict[str, pd.DataFrame], max_workers: Optional[int] = None,
+                   load_errors: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Validates the import files together, the links are checked against the IDs of the given files.
+
+    Parameters:
+    frames (Dict[str, pd.DataFrame]): The loaded files by file name.
+    max_workers (int): Number of files validated at the same time (threads), by default all of them.
+    load_errors (Dict[str, str]): Files that could not be loaded and the error, reported as error.
+
+    Returns:
+    Dict: The validation report, see the module docstring.
+    """
+    start = time.perf_counter()
+    known_ids = {
+        file_name: get_ids(df, ID_COLUMNS[file_name])
+        for file_name, df in frames.items()
+        if ID_COLUMNS.get(file_name) in df.columns
+    }
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(frames), 1)) as executor:
+        results = executor.map(lambda item: validate_file(item[1], item[0], known_ids), frames.items())
+        files = {file_name: {'rows': len(df), 'issues': issues} for (file_name, df), issues in zip(frames.items(), results)}
+
+    for file_name, message in (load_errors or {}).items():
+        files[file_name] = {'rows': 0, 'issues': [{
+            'check': 'load', 'severity': 'error', 'column': None, 'message': message,
+            'count': 1, 'rows': [], 'values': [],
+        }]}
+
+    issues = [issue for result in files.values() for issue in result['issues']]
+    errors = sum(issue['severity'] == 'error' for issue in issues)
+    return {
+        'valid': errors == 0,
+        'errors': errors,
+        'warnings': len(issues) - errors,
+        'seconds': round(time.perf_counter() - start, 4),
+        'files': files,
+    }
+
+
+def validate_version(version: str, file_names: Optional[List[str]] = None) -> Dict:
+    """
+    Loads and validates the import files of a version. Files that can not be loaded are reported as error.
+
+    Parameters:
+    version (str): The version folder.
+    file_names (List[str]): The files to validate, by default all import files.
+    """
+    frames = {}
+    load_errors = {}
+    for file_name in file_names or IMPORT_FILES:
+        try:
+            frames[file_name] = load_file(version, file_name, schema=False)
+        except Exception as e:
+            load_errors[file_name] = str(e)
+    return validate_files(frames, load_errors=load_errors)
+
+
+def hash_upload(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_upload(content: bytes, file_name: str, content_hash: Optional[str] = None) -> pd.DataFrame:
+    """
+    Parses an uploaded file as `load_file(..., schema=False)` would after storing it, without the
+    storage round trip. The last parsed uploads are cached by their content hash; treat the returned
+    DataFrame as read-only. `content_hash` (see `hash_upload`) saves hashing the content again.
+    """
+    key = (file_name, content_hash or hash_upload(content))
+    with _upload_cache_lock:
+        if key in _upload_cache:
+            _upload_cache.move_to_end(key)
+            return _upload_cache[key]
+
+    df = pd.read_csv(io.BytesIO(content), **get_read_csv_options(file_name, schema=False))
+
+    with _upload_cache_lock:
+        _upload_cache[key] = df
+        while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+            _upload_cache.popitem(last=False)
+    return df
+
+
+def validate_uploads(uploads: Dict[str, bytes], max_workers: Optional[int] = None) -> Dict:
+    """
+    Validates uploaded import files, parsed and validated at the same time (threads).
+
+    Parameters:
+    uploads (Dict[str, bytes]): The content of the uploaded files by file name.
+    max_workers (int): Number of files parsed and validated at the same time, by default all of them.
+
+    Returns:
+    Dict: The validation report, see the module docstring.
+    """
+    def parse(item):
+        file_name, content = item
+        try:
+            return file_name, read_upload(content, file_name), None
+        except Exception as e:
+            return file_name, None, f"Failed to read {file_name}: {str(e)}"
 
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(uploads), 1)) as executor:
+        parsed = list(executor.map(parse, uploads.items()))
 
-def check_for_missing_values_in_column(df:pd.DataFrame, column_name: str) -> dict:
-    pass
\ No newline at end of file
+    frames = {file_name: df for file_name, df, error in parsed if error is None}
+    load_errors = {file_name: error for file_name, _, error in parsed if error is not None}
+    return validate_files(frames, max_workers, load_errors)
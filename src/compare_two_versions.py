@@ -1,37 +1,208 @@
+"""
+compare_two_versions.py
 
+Differences between two versions of the import files (M_Workflows.csv, M_Models.csv,
+M_Elements.csv, M_Attributes.csv), shown in the admin area.
+
+The rows of a file are matched by their ID (WorkflowID, ModelID, ElementID, AttributeID). Every
+cell is reduced to a 64-bit hash (`pd.util.hash_array`), so a row is compared as a fingerprint of
+one hash per column: rows are only looked at value by value if a hash differs. This keeps the
+comparison of 100k-row catalogues within seconds.
+
+`diff_versions` returns per file:
+- `added` / `removed`: the IDs only in the new / old version
+- `changed`: the IDs whose values changed, and `changes` with one record per changed cell
+  (`key`, `column`, `old`, `new`)
+- `added_columns` / `removed_columns` and the number of `unchanged` rows
+
+The result of a version pair is stored in the storage folder `.diffs` with the ETags of the
+compared files and reused until one of them changes.
+
+Usage:
+    python -m src.compare_two_versions V1.0 V1.1 --report diff.json
+
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
-import os
 
-#TODO: #5 Finish code and incorprate it into admin tools/page
+from src.check_imports_data_structure import ID_COLUMNS, IMPORT_FILES
+from src.load_data import create_storage_folder, get_file_etag, load_bytes, store_file
+from src.storage_backends import get_backend
+from src.storage_metrics import record_cache
 
-v1 = 'SampleV.01'
-v2 = 'SampleV.02'
-data_dir_v1 = os.path.join('..', 'data', v1)
-data_dir_v2 = os.path.join('..', 'data', v2)
+DIFFS_FOLDER = '.diffs'
 
-def get_data_path() -> Path:
-    if os.getenv('STREAMLIT_CLOUD'):
-        return Path('/mount/src/pragmatic_bim_requirements_manager') / 'data' / VERSION
-    else:
-        return Path(__file__).parent.parent / 'data' / VERSION
 
+def _normalize(series: pd.Series) -> np.ndarray:
+    # Compared as text, empty cells equal empty strings
+    return series.astype(object).where(series.notna(), '').astype(str).to_numpy(dtype=object)
+
+
+def _hashes(values: List[np.ndarray], rows: int) -> np.ndarray:
+    if not values:
+        return np.zeros((rows, 0), dtype=np.uint64)
+    return np.column_stack([pd.util.hash_array(column_values) for column_values in values])
+
+
+def column_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """The fingerprints of the rows: one uint64 hash per row and column."""
+    return _hashes([_normalize(df[column]) for column in columns], len(df))
+
+
+def diff_frames(old_df: pd.DataFrame, new_df: pd.DataFrame, key_column: str) -> Dict:
+    """
+    Compares two versions of a file by their key column.
+
+    Parameters:
+    old_df (pd.DataFrame): The file of the old version, see `load_text`.
+    new_df (pd.DataFrame): The file of the new version, see `load_text`.
+    key_column (str): The ID column the rows are matched by. Of duplicate IDs the first row is compared.
+
+    Returns:
+    Dict: The differences, see the module docstring.
+    """
+    old_df = old_df.assign(**{key_column: _normalize(old_df[key_column])}).drop_duplicates(key_column)
+    new_df = new_df.assign(**{key_column: _normalize(new_df[key_column])}).drop_duplicates(key_column)
+    old_keys = pd.Index(old_df[key_column])
+    new_keys = pd.Index(new_df[key_column])
+
+    columns = [column for column in new_df.columns if column in old_df.columns and column != key_column]
+    common_keys = new_keys.intersection(old_keys, sort=False)
+    old_rows = old_keys.get_indexer(common_keys)
+    new_rows = new_keys.get_indexer(common_keys)
 
+    old_values = [_normalize(old_df[column]) for column in columns]
+    new_values = [_normalize(new_df[column]) for column in columns]
+    differs = _hashes(old_values, len(old_df))[old_rows] != _hashes(new_values, len(new_df))[new_rows]
+    changed_rows = differs.any(axis=1)
 
-file_name_attributes_v1 = os.path.join(data_dir_v1, 'Attributes-Export_All.csv')
-file_name_attributes_v2 = os.path.join(data_dir_v2, 'Attributes-Export_All.csv')
+    # Values are only read for the changed cells
+    changes = []
+    for position in np.flatnonzero(differs.any(axis=0)):
+        rows = np.flatnonzero(differs[:, position])
+        changes.extend(
+            {'key': key, 'column': columns[position], 'old': old, 'new': new}
+            for key, old, new in zip(common_keys[rows], old_values[position][old_rows[rows]], new_values[position][new_rows[rows]])
+        )
 
-print(f"Path 1: {file_name_attributes_v1}")
-print(f"Path 2: {file_name_attributes_v2}")
+    return {
+        'key': key_column,
+        'added': new_keys.difference(old_keys, sort=False).tolist(),
+        'removed': old_keys.difference(new_keys, sort=False).tolist(),
+        'changed': common_keys[changed_rows].tolist(),
+        'unchanged': int((~changed_rows).sum()),
+        'added_columns': [column for column in new_df.columns if column not in old_df.columns],
+        'removed_columns': [column for column in old_df.columns if column not in new_df.columns],
+        'changes': changes,
+    }
 
-#file_name_elements = os.path.join(data_dir, 'Elements-Export_All.csv')
-#file_name_models = os.path.join(data_dir, 'Models-Export_All.csv')
 
+def load_text(version: str, file_name: str) -> pd.DataFrame:
+    """A file with every cell as the text in the file, so "1" and "1.0" are compared as written."""
+    return pd.read_csv(io.BytesIO(load_bytes(version, file_name)), dtype=str, keep_default_na=False)
 
-df1 = pd.read_csv(file_name_attributes_v1)
-df2 = pd.read_csv(file_name_attributes_v2)
 
-# Compare the dataframes
-comparison = df1.compare(df2)
+def _diff_file_name(old_version: str, new_version: str) -> str:
+    return f'{old_version}__{new_version}.json'
+
+
+def _input_etags(old_version: str, new_version: str, file_names: List[str]) -> Dict[str, List[Optional[str]]]:
+    return {file_name: [get_file_etag(old_version, file_name), get_file_etag(new_version, file_name)] for file_name in file_names}
+
+
+def load_cached_diff(old_version: str, new_version: str, input_etags: Dict) -> Optional[Dict]:
+    """The stored diff of the version pair, None if there is none or a compared file changed since."""
+    try:
+        diff = json.loads(load_bytes(DIFFS_FOLDER, _diff_file_name(old_version, new_version)))
+    except (FileNotFoundError, ValueError):
+        return None
+    if diff.get('input_etags') != input_etags:
+        return None
+    return diff
+
+
+def diff_versions(old_version: str, new_version: str, file_names: Optional[List[str]] = None,
+                  use_cache: bool = True) -> Dict:
+    """
+    Compares the import files of two versions.
+
+    Parameters:
+    old_version (str): The version compared against, e.g. 'V1.0'.
+    new_version (str): The changed version, e.g. 'V1.1'.
+    file_names (List[str]): The files to compare, by default all import files.
+    use_cache (bool): False to compare again even if a stored diff is up to date.
+
+    Returns:
+    Dict: {'old_version', 'new_version', 'seconds', 'input_etags', 'files': {file_name: diff}},
+          see `diff_frames`. Files missing in one of the versions are left out.
+    """
+    file_names = file_names or IMPORT_FILES
+    input_etags = _input_etags(old_version, new_version, file_names)
+    if use_cache:
+        cached = load_cached_diff(old_version, new_version, input_etags)
+        record_cache(get_backend().name, 'version_diff', cached is not None)
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
+    files = {}
+    for file_name in file_names:
+        if None in input_etags[file_name]:
+            continue
+        old_df = load_text(old_version, file_name)
+        new_df = load_text(new_version, file_name)
+        files[file_name] = diff_frames(old_df, new_df, ID_COLUMNS[file_name])
+
+    diff = {
+        'old_version': old_version,
+        'new_version': new_version,
+        'seconds': round(time.perf_counter() - start, 3),
+        'input_etags': input_etags,
+        'files': files,
+    }
+    create_storage_folder(DIFFS_FOLDER)
+    store_file(json.dumps(diff, ensure_ascii=False), DIFFS_FOLDER, _diff_file_name(old_version, new_version))
+    return diff
+
+
+def summarize_diff(diff: Dict) -> pd.DataFrame:
+    """One row per file with the number of added, removed, changed and unchanged rows."""
+    return pd.DataFrame([{
+        'File': file_name,
+        'Added': len(result['added']),
+        'Removed': len(result['removed']),
+        'Changed': len(result['changed']),
+        'Unchanged': result['unchanged'],
+        'Changed Cells': len(result['changes']),
+        'Added Columns': ", ".join(result['added_columns']),
+        'Removed Columns': ", ".join(result['removed_columns']),
+    } for file_name, result in diff['files'].items()])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the import files of two versions")
+    parser.add_argument("old_version", help="The version compared against")
+    parser.add_argument("new_version", help="The changed version")
+    parser.add_argument("--force", action='store_true', help="Compare again even if a stored diff is up to date")
+    parser.add_argument("--report", help="Write the JSON diff to this file instead of printing a summary")
+    args = parser.parse_args(argv)
+
+    diff = diff_versions(args.old_version, args.new_version, use_cache=not args.force)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(diff, indent=2, ensure_ascii=False))
+    else:
+        print(summarize_diff(diff).to_string(index=False))
+    return 0
+
 
-# Output the differences
-print(comparison)
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,14 +34,24 @@ from pathlib import Path
 import os
 import sys
 from src.sort import sort_dataframe
+from src.instrumentation import add_rows_out
+from src.parallel_export import run_for_languages
+from src.grouping_formats import (
+    GROUPING_COLUMNS,
+    add_static_formats,
+    compute_grouping_styles,
+    iter_rows,
+    write_static_rows,
+)
 import json
 import re
 import io
+import tempfile
+import xlsxwriter
 
-from src.load_data import load_file, store_file, get_project_path
-from src.utils import load_config, load_translations
-
-TRANSLATIONS_FILE = 'translations.json'
+from src.load_data import load_file, store_file, store_file_stream
+from src.translations import load_translation_service
+from src.utils import load_config
 
 
 # Define the columns/
@@ -51,6 +61,10 @@ column_dict = config['contract_excel_columns']
 column_order = list(column_dict.keys())
 column_widths = list(column_dict.values())
 
+EXPORT_STREAMING = config.get('EXPORT_STREAMING', False)
+EXPORT_STATIC_FORMATS = config.get('EXPORT_STATIC_FORMATS', False)
+STREAMING_CHUNK_ROWS = 1000
+
 
 def _get_available_languages(df):
         language_columns = [col for col in df.columns if col.startswith('ElementName')]
@@ -122,37 +136,9 @@ def _explode_phases_to_matrix(df, column, lang):
                 df.at[index, f'Phase_{phase}'] = 'X'
     return df
 
-def _translate_column_names(df, language):
-    print("Start Translating")
-
-    data_folder = get_project_path('organisation_data')
-    translations = load_translations(data_folder / TRANSLATIONS_FILE)
-
-    
-    # Get the column translations for the specified language
-    column_translations = translations['column_names']
-    
-    # Function to remove language postfix
-    def remove_language_postfix(column_name):
-        return re.sub(r'(DE|EN|FR|IT)$', '', column_name)
-    
-    # Create a mapping of original column names to translated names
-    translation_map = {}
-    for col in df.columns:
-        # Remove language postfix
-        base_name = remove_language_postfix(col)
-        
-        # Look for a translation
-        if base_name in column_translations and language in column_translations[base_name]:
-            translation_map[col] = column_translations[base_name][language]
-        else:
-            # If no translation found, keep the base name without language postfix
-            translation_map[col] = base_name
-    
-    # Rename the columns in the DataFrame
-    df.rename(columns=translation_map, inplace=True)
-    print(df.columns)
-    
+def _translate_column_names(df, language, translations):
+    """Renames the columns to the given language using the build's TranslationService."""
+    df.rename(columns=translations.column_name_map(df.columns, language), inplace=True)
     return df
 
 
@@ -165,7 +151,133 @@ def _create_filtered_df(df, language):
     return df[filtered_columns]
 
 
-def _export_with_custom_widths(df, column_widths, language, VERSION):
+def _add_formats(workbook):
+    """Registers the cell formats used by the Elementplan sheets on the workbook."""
+    return {
+        'default': workbook.add_format({
+            'text_wrap': True,
+            'valign': 'top',
+        }),
+        'grey_text': workbook.add_format({'font_color': '#d3d3d3'}),
+        'black_text': workbook.add_format({
+            'top': 1,
+            'text_wrap': True,
+            'valign': 'top',
+            'font_color': 'black'
+        }),
+        'centered': workbook.add_format({
+            'text_wrap': True,
+            'valign': 'top',
+            'align': 'center',
+        }),
+        # Same as the header pandas writes
+        'header': workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}),
+    }
+
+
+def _is_centered(col_num, col_name):
+    return 11 <= col_num <= 23 or col_name == 'Sort'
+
+
+def _format_worksheet(worksheet, columns, row_count, column_widths, formats, static_formats=False):
+    """
+    Applies the column widths, filter, frozen panes and grouping formats to a model sheet.
+
+    With `static_formats` the grouping is written per cell (see grouping_formats.py) and no
+    conditional formats are added.
+    """
+    default_column_width = 8
+    default_format = formats['default']
+    grey_text_format = formats['grey_text']
+    black_text_format = formats['black_text']
+    centered_format = formats['centered']
+
+    for col_num, col_name in enumerate(columns):
+        width = column_widths[col_num] if col_num < len(column_widths) else default_column_width
+        
+        if _is_centered(col_num, col_name):
+            worksheet.set_column(col_num, col_num, width, centered_format)
+        else:
+            worksheet.set_column(col_num, col_num, width, default_format)
+
+    worksheet.autofilter(0, 0, row_count, len(columns) - 1)
+
+    # Freeze panes at C2
+    worksheet.freeze_panes(1, 3)
+
+    if static_formats:
+        return
+
+    # Apply a thin top border and black text starting from column C if column C is different from above
+    worksheet.conditional_format(1, 2, row_count, len(columns) - 1, {
+        'type': 'formula',
+        'criteria': '=$C2<>$C1',
+        'format': black_text_format
+    })
+
+    # Apply a line across all cells if column A is different from above
+    worksheet.conditional_format(1, 0, row_count, len(columns) - 1, {
+        'type': 'formula',
+        'criteria': '=$A2<>$A1',
+        'format': black_text_format
+    })
+
+    # Apply a line from column F onward, even if the cells are empty
+    worksheet.conditional_format(1, 5, row_count, len(columns) - 1, {
+        'type': 'formula',
+        'criteria': '=$F2<>$F1',
+        'format': black_text_format
+    })
+
+    # Always apply a thin line starting from column G onward, including empty cells
+    worksheet.conditional_format(1, 6, row_count, len(columns) - 1, {
+        'type': 'no_errors',
+        'format': black_text_format
+    })
+
+    # Apply grey text formatting to columns A to F where the value is the same as the row above
+    for col in range(6):
+        col_letter = chr(65 + col)
+        worksheet.conditional_format(1, col, row_count, col, {
+            'type': 'formula',
+            'criteria': f'=${col_letter}2=${col_letter}1',
+            'format': grey_text_format
+        })
+
+
+def _write_sheet_rows(workbook, sheet_name, df, positions, columns, column_widths, formats, static_formats=None):
+    """
+    Writes one model sheet row by row, in row order (as required by the constant memory mode).
+
+    The rows at `positions` of `df` are written with the running 'Sort' number appended.
+    If `static_formats` (from grouping_formats.add_static_formats) are given, the grouping is
+    written as static cell formats instead of conditional formats.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    # The formats have to be set before the rows are streamed
+    _format_worksheet(worksheet, columns, len(positions), column_widths, formats, static_formats=static_formats is not None)
+    worksheet.write_row(0, 0, columns, formats['header'])
+
+    rows = (
+        values + [row_num]
+        for row_num, values in enumerate(iter_rows(df, positions, STREAMING_CHUNK_ROWS), start=1)
+    )
+
+    if static_formats is None:
+        for row_num, values in enumerate(rows, start=1):
+            worksheet.write_row(row_num, 0, values)
+    else:
+        styles = compute_grouping_styles(df.iloc[positions, :GROUPING_COLUMNS], len(columns))
+        centered = [_is_centered(col_num, col_name) for col_num, col_name in enumerate(columns)]
+        write_static_rows(worksheet, rows, styles, centered, static_formats)
+
+
+def _sheet_columns(df, language, translations):
+    """The translated column names of a model sheet, including the appended 'Sort' column."""
+    return list(_translate_column_names(df.iloc[:0].assign(Sort=0), language, translations).columns)
+
+
+def _export_with_custom_widths(df, column_widths, language, VERSION, translations, static_formats=False):
 
     if f'ModelName{language}' in df.columns:
         unique_models = df[f'ModelName{language}'].dropna().unique()
@@ -175,94 +287,96 @@ def _export_with_custom_widths(df, column_widths, language, VERSION):
 
         with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
             workbook = writer.book
+            formats = _add_formats(workbook)
+
+            if static_formats:
+                model_positions = df.groupby(f'ModelName{language}', sort=False).indices
+                columns = _sheet_columns(df, language, translations)
+                cell_formats = add_static_formats(workbook)
+                for model in unique_models:
+                    _write_sheet_rows(workbook, model[:31], df, model_positions[model], columns, column_widths, formats, cell_formats)
+            else:
+                for model in unique_models:
+                    filtered_df = df[df[f'ModelName{language}'] == model]
+                    filtered_df['Sort'] = range(1, len(filtered_df) + 1)
+                    
+                    filtered_df = _translate_column_names(filtered_df, language, translations)
 
-            default_format = workbook.add_format({
-                'text_wrap': True,
-                'valign': 'top',
-            })
-            default_column_width = 8
 
-            grey_text_format = workbook.add_format({'font_color': '#d3d3d3'})
+                    filtered_df.to_excel(writer, sheet_name=model[:31], index=False, startrow=0)  # Start writing data from row 1
+                    
+                    worksheet = writer.sheets[model[:31]]
+                    _format_worksheet(worksheet, filtered_df.columns, len(filtered_df), column_widths, formats)
 
-            black_text_format = workbook.add_format({
-                'top': 1,
-                'text_wrap': True,
-                'valign': 'top',
-                'font_color': 'black'
-            })
+        excel_buffer.seek(0)
+        
+        store_file(excel_buffer.getvalue(), VERSION, output_file_name)
+        print(f"Excel file exported to: {output_file_name}")    
 
-            centered_format = workbook.add_format({
-                'text_wrap': True,
-                'valign': 'top',
-                'align': 'center',
-            })
 
-            for model in unique_models:
-                filtered_df = df[df[f'ModelName{language}'] == model]
-                filtered_df['Sort'] = range(1, len(filtered_df) + 1)
-                
-                filtered_df = _translate_column_names(filtered_df, language)
+def _export_streaming(df, column_widths, language, VERSION, translations, static_formats=False):
+    """
+    Writes the Elementplan with xlsxwriter's `constant_memory` mode.
 
+    The rows of every model sheet are streamed into a temporary file, sheet by sheet, and the
+    finished workbook is uploaded from that file in chunks. Only one chunk of rows is held in
+    memory at any time, independent of the size of the catalogue.
+    """
+    model_column = f'ModelName{language}'
+    if model_column not in df.columns:
+        return
 
-                filtered_df.to_excel(writer, sheet_name=model[:31], index=False, startrow=0)  # Start writing data from row 1
-                
-                worksheet = writer.sheets[model[:31]]
+    output_file_name = f'Elementplan_{language}_{VERSION}.xlsx'
+    unique_models = df[model_column].dropna().unique()
+    model_positions = df.groupby(model_column, sort=False).indices
+    columns = _sheet_columns(df, language, translations)
 
-                for col_num, col_name in enumerate(filtered_df.columns):
-                    width = column_widths[col_num] if col_num < len(column_widths) else default_column_width
-                    
-                    if 11 <= col_num <= 23 or col_name == 'Sort':
-                        worksheet.set_column(col_num, col_num, width, centered_format)
-                    else:
-                        worksheet.set_column(col_num, col_num, width, default_format)
-
-                worksheet.autofilter(0, 0, len(filtered_df), len(filtered_df.columns) - 1)
-
-                # Freeze panes at C2
-                worksheet.freeze_panes(1, 3)
-
-                # Apply a thin top border and black text starting from column C if column C is different from above
-                worksheet.conditional_format(1, 2, len(filtered_df), len(filtered_df.columns) - 1, {
-                    'type': 'formula',
-                    'criteria': '=$C2<>$C1',
-                    'format': black_text_format
-                })
-
-                # Apply a line across all cells if column A is different from above
-                worksheet.conditional_format(1, 0, len(filtered_df), len(filtered_df.columns) - 1, {
-                    'type': 'formula',
-                    'criteria': '=$A2<>$A1',
-                    'format': black_text_format
-                })
-
-                # Apply a line from column F onward, even if the cells are empty
-                worksheet.conditional_format(1, 5, len(filtered_df), len(filtered_df.columns) - 1, {
-                    'type': 'formula',
-                    'criteria': '=$F2<>$F1',
-                    'format': black_text_format
-                })
-
-                # Always apply a thin line starting from column G onward, including empty cells
-                worksheet.conditional_format(1, 6, len(filtered_df), len(filtered_df.columns) - 1, {
-                    'type': 'no_errors',
-                    'format': black_text_format
-                })
-
-                # Apply grey text formatting to columns A to F where the value is the same as the row above
-                for col in range(6):
-                    col_letter = chr(65 + col)
-                    worksheet.conditional_format(1, col, len(filtered_df), col, {
-                        'type': 'formula',
-                        'criteria': f'=${col_letter}2=${col_letter}1',
-                        'format': grey_text_format
-                    })
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_file = Path(temp_dir) / output_file_name
+        workbook = xlsxwriter.Workbook(str(temp_file), {'constant_memory': True, 'tmpdir': temp_dir})
+        formats = _add_formats(workbook)
+        cell_formats = add_static_formats(workbook) if static_formats else None
 
-        excel_buffer.seek(0)
-        
-        store_file(excel_buffer.getvalue(), VERSION, output_file_name)
-        print(f"Excel file exported to: {output_file_name}")    
+        for model in unique_models:
+            _write_sheet_rows(workbook, str(model)[:31], df, model_positions[model], columns, column_widths, formats, cell_formats)
+
+        workbook.close()
+
+        with open(temp_file, 'rb') as file:
+            store_file_stream(file, VERSION, output_file_name)
+    print(f"Excel file exported to: {output_file_name}")
+
+
+def _export_language(df, language, version, translations, streaming=False, static_formats=False):
+    """Exports the Elementplan of one language, runs in a worker process of the export pool."""
+    filtered_df = _create_filtered_df(df, language)
+    if streaming:
+        _export_streaming(filtered_df, column_widths, language, version, translations, static_formats)
+    else:
+        _export_with_custom_widths(filtered_df, column_widths, language, version, translations, static_formats)
+    return f'Elementplan_{language}_{version}.xlsx'
+
+
+def create_formated_excel_export(version, master_or_project, max_workers=None, streaming=None, static_formats=None, translations=None):
+    """
+    Creates one formated Elementplan per language.
+
+    Parameters:
+    version (str): The version to export.
+    master_or_project (str): "M" for Master, "P" for Project.
+    max_workers (int): Number of export processes, defaults to `EXPORT_MAX_WORKERS` in config.yaml.
+    streaming (bool): Write the workbooks in constant memory mode, defaults to `EXPORT_STREAMING`.
+    static_formats (bool): Write the row grouping as static cell formats instead of conditional
+                           formats, defaults to `EXPORT_STATIC_FORMATS`.
+    translations (TranslationService): The translations of the build, loaded if not given.
+    """
+    if translations is None:
+        translations = load_translation_service()
+    if streaming is None:
+        streaming = EXPORT_STREAMING
+    if static_formats is None:
+        static_formats = EXPORT_STATIC_FORMATS
 
-def create_formated_excel_export(version, master_or_project):
     df = load_file(version, f'RawData_{version}.xlsx')
 
     languages = _get_available_languages(df)
@@ -272,9 +386,10 @@ def create_formated_excel_export(version, master_or_project):
     df = _explode_phases_to_matrix(df, column_lang, first_lang)
     df_sorted = sort_dataframe(df)
     df = _rename_phase_columns(df_sorted)  # Assumes this function exists
-    column_widths = list(column_dict.values())
 
-    for language in languages:
-        filtered_df = _create_filtered_df(df, language)
-        output_file_path = _export_with_custom_widths(filtered_df, column_widths, language, version)
-        print(output_file_path)
\ No newline at end of file
+    # The sheets of one workbook are written by a single xlsxwriter instance,
+    # so the languages (one workbook each) are the unit of parallelism.
+    output_files = run_for_languages(_export_language, df, languages, version, translations, streaming, static_formats, max_workers=max_workers)
+    for output_file in output_files:
+        print(output_file)
+    add_rows_out(len(df) * len(output_files))
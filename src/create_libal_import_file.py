@@ -32,10 +32,18 @@ import os
 import io
 from dotenv import load_dotenv
 from src.sort import sort_dataframe
+from src.instrumentation import add_rows_out
+from src.parallel_export import run_for_languages
+from src.grouping_formats import add_static_formats, compute_grouping_styles, iter_rows, write_static_rows
+from src.utils import load_config
 
 from src.load_data import load_file, store_file
 
 
+config = load_config()
+
+EXPORT_STATIC_FORMATS = config.get('EXPORT_STATIC_FORMATS', False)
+
 #VERSION = 'V16.6'
 #VERSION = 'SampleV.01'
 #languages = ['DE','EN','FR','IT'] 
@@ -128,7 +136,50 @@ def explode_phases_to_matrix(df, column, lang):
 
 
 
-def libal_config_export(df, column_widths, language, export_file_type_name, VERSION):
+def _add_conditional_formats(worksheet, row_count, column_count, black_text_format, grey_text_format):
+    """Adds the formula based grouping formats (lines and grey repeated values) to the config sheet."""
+    # Apply a thin top border and black text starting from column C if column C is different from above
+    worksheet.conditional_format(1, 2, row_count, column_count - 1, {
+        'type': 'formula',
+        'criteria': '=$C2<>$C1',
+        'format': black_text_format
+    })
+
+    # Apply a line across all cells if column A is different from above
+    worksheet.conditional_format(1, 0, row_count, column_count - 1, {
+        'type': 'formula',
+        'criteria': '=$A2<>$A1',
+        'format': black_text_format
+    })
+
+    # Apply a line from column F onward, even if the cells are empty
+    worksheet.conditional_format(1, 5, row_count, column_count - 1, {
+        'type': 'formula',
+        'criteria': '=$F2<>$F1',
+        'format': black_text_format
+    })
+
+    # Always apply a thin line starting from column G onward, including empty cells
+    worksheet.conditional_format(1, 6, row_count, column_count - 1, {
+        'type': 'no_errors',
+        'format': black_text_format
+    })
+
+    # Apply grey text formatting to columns A to F where the value is the same as the row above
+    for col in range(6):
+        col_letter = chr(65 + col)
+        worksheet.conditional_format(1, col, row_count, col, {
+            'type': 'formula',
+            'criteria': f'=${col_letter}2=${col_letter}1',
+            'format': grey_text_format
+        })
+
+
+def libal_config_export(df, column_widths, language, export_file_type_name, VERSION, static_formats=False):
+    """
+    Writes the Libal config sheet. With `static_formats` the row grouping is written as static
+    cell formats (see grouping_formats.py) instead of conditional formats.
+    """
     excel_buffer = io.BytesIO()
 
     with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
@@ -158,14 +209,21 @@ def libal_config_export(df, column_widths, language, export_file_type_name, VERS
         sheet_name = 'Config'
         df['Sort'] = range(1, len(df) + 1)
 
-        df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=0)
+        centered = [11 <= col_num <= 22 or col_name == 'Sort' for col_num, col_name in enumerate(df.columns)]
 
-        worksheet = writer.sheets[sheet_name]
+        if static_formats:
+            worksheet = workbook.add_worksheet(sheet_name)
+            header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            worksheet.write_row(0, 0, list(df.columns), header_format)
+            write_static_rows(worksheet, iter_rows(df), compute_grouping_styles(df), centered, add_static_formats(workbook))
+        else:
+            df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=0)
+            worksheet = writer.sheets[sheet_name]
 
         for col_num, col_name in enumerate(df.columns):
             width = column_widths[col_num] if col_num < len(column_widths) else default_column_width
             
-            if 11 <= col_num <= 22 or col_name == 'Sort':
+            if centered[col_num]:
                 worksheet.set_column(col_num, col_num, width, centered_format)
             else:
                 worksheet.set_column(col_num, col_num, width, default_format)
@@ -175,41 +233,8 @@ def libal_config_export(df, column_widths, language, export_file_type_name, VERS
         # Freeze panes at C2
         worksheet.freeze_panes(1, 3)
 
-        # Apply a thin top border and black text starting from column C if column C is different from above
-        worksheet.conditional_format(1, 2, len(df), len(df.columns) - 1, {
-            'type': 'formula',
-            'criteria': '=$C2<>$C1',
-            'format': black_text_format
-        })
-
-        # Apply a line across all cells if column A is different from above
-        worksheet.conditional_format(1, 0, len(df), len(df.columns) - 1, {
-            'type': 'formula',
-            'criteria': '=$A2<>$A1',
-            'format': black_text_format
-        })
-
-        # Apply a line from column F onward, even if the cells are empty
-        worksheet.conditional_format(1, 5, len(df), len(df.columns) - 1, {
-            'type': 'formula',
-            'criteria': '=$F2<>$F1',
-            'format': black_text_format
-        })
-
-        # Always apply a thin line starting from column G onward, including empty cells
-        worksheet.conditional_format(1, 6, len(df), len(df.columns) - 1, {
-            'type': 'no_errors',
-            'format': black_text_format
-        })
-
-        # Apply grey text formatting to columns A to F where the value is the same as the row above
-        for col in range(6):
-            col_letter = chr(65 + col)
-            worksheet.conditional_format(1, col, len(df), col, {
-                'type': 'formula',
-                'criteria': f'=${col_letter}2=${col_letter}1',
-                'format': grey_text_format
-            })
+        if not static_formats:
+            _add_conditional_formats(worksheet, len(df), len(df.columns), black_text_format, grey_text_format)
 
     excel_buffer.seek(0)  # Reset the buffer pointer to the beginning
 
@@ -226,7 +251,30 @@ def create_filtered_df(df, language):
     filtered_columns = [col for col in filtered_columns if col in df.columns]
     return df[filtered_columns]
 
-def create_libal_import_file(version, master_or_project):
+LIBAL_COLUMN_WIDTHS = [20, 20, 20, 20, 35, 45, 20, 20, 20, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8]
+EXPORT_FILE_TYPE_NAME = 'Libal_Config'
+
+
+def export_language(df, language, version, static_formats=False):
+    """Exports the Libal config of one language, runs in a worker process of the export pool."""
+    filtered_df = create_filtered_df(df, language)
+    libal_config_export(filtered_df, LIBAL_COLUMN_WIDTHS, language, EXPORT_FILE_TYPE_NAME, version, static_formats)
+    return f'{EXPORT_FILE_TYPE_NAME}_{language}_{version}.xlsx'
+
+
+def create_libal_import_file(version, master_or_project, max_workers=None, static_formats=None):
+    """
+    Creates one Libal config file per language.
+
+    Parameters:
+    version (str): The version to export.
+    master_or_project (str): "M" for Master, "P" for Project.
+    max_workers (int): Number of export processes, defaults to `EXPORT_MAX_WORKERS` in config.yaml.
+    static_formats (bool): Write the row grouping as static cell formats, defaults to `EXPORT_STATIC_FORMATS`.
+    """
+    if static_formats is None:
+        static_formats = EXPORT_STATIC_FORMATS
+
     df = load_file(version, f'RawData_{version}.xlsx')
 
     languages = get_available_languages(df)
@@ -236,11 +284,8 @@ def create_libal_import_file(version, master_or_project):
     df = explode_phases_to_matrix(df, column_lang, first_lang)
     df_sorted = sort_dataframe(df)
     df = rename_phase_columns(df_sorted)
-    column_widths = [20, 20, 20, 20, 35, 45, 20, 20, 20, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8]
-
-    export_file_type_name = 'Libal_Config'
 
-    for language in languages:
-        filtered_df = create_filtered_df(df, language)
-        output_file_path = libal_config_export(filtered_df, column_widths, language, export_file_type_name, version)
-        print(output_file_path)
\ No newline at end of file
+    output_files = run_for_languages(export_language, df, languages, version, static_formats, max_workers=max_workers)
+    for output_file in output_files:
+        print(output_file)
+    add_rows_out(len(df) * len(output_files))
@@ -16,15 +16,16 @@ from docxcompose.composer import Composer
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils import load_config, load_translations
-from src.load_data import get_project_path, load_file, get_download_link
+from src.utils import load_config
+from src.load_data import load_file, load_bytes
+from src.translations import load_translation_service
 
 
-def create_titel_page(version, language_code):
-    organisation_folder = get_project_path('organisation_data')
-    translations = load_translations(organisation_folder / 'translations.json')
+def create_titel_page(version, language_code, translations=None):
+    if translations is None:
+        translations = load_translation_service()
 
-    titel = translations['word_report']['titel'][language_code]
+    titel = translations.text('word_report', 'titel', language=language_code)
 
     today_date = datetime.today().strftime('%Y-%m-%d')
     
@@ -65,11 +66,11 @@ def merge_documents(output_path, temp_docs):
     # Save the final merged document
     composer.save(output_path)
 
-def create_element_overview(version, language_code):
-    organisation_folder = get_project_path('organisation_data')
-    translations = load_translations(organisation_folder / 'translations.json')
+def create_element_overview(version, language_code, translations=None):
+    if translations is None:
+        translations = load_translation_service()
 
-    titel = translations['word_report']['titel'][language_code]
+    titel = translations.text('word_report', 'titel', language=language_code)
     today_date = datetime.today().strftime('%Y-%m-%d')
 
     # Load the workflow data from the CSV file
@@ -106,10 +107,13 @@ def create_element_overview(version, language_code):
         
         picture_name = row['ImageName']
 
-        if pd.isna(picture_name):
-            image_path = None
-        else:
-            image_path = get_download_link(version=version, file_name=picture_name, data_folder='data')
+        image_path = None
+        if not pd.isna(picture_name):
+            # Read from the storage backend, the image is not necessarily a local file
+            try:
+                image_path = BytesIO(load_bytes(version, picture_name))
+            except FileNotFoundError:
+                print(f"Image {picture_name} not found")
 
         # Create a temporary output path for each row's document
         output_path_temp = f'organisation_data/temp/{index}.docx'
@@ -182,9 +186,9 @@ def populate_template(template_path, data, output_path, image_key="Image", image
 
 ### --- works ---
 
-def create_usecase_table(version, language_code):
-    organisation_folder = get_project_path('organisation_data')
-    translations = load_translations(organisation_folder / 'translations.json')
+def create_usecase_table(version, language_code, translations=None):
+    if translations is None:
+        translations = load_translation_service()
 
     today_date = datetime.today().strftime('%Y-%m-%d')
 
@@ -220,10 +224,12 @@ def create_usecase_table(version, language_code):
     return(output_path)
 
 
-titel_doc = create_titel_page('V1', 'DE')
+translations = load_translation_service()
 
-usecase_doc = create_usecase_table('V1', 'DE')
+titel_doc = create_titel_page('V1', 'DE', translations)
 
-element_doc = create_element_overview('V1', 'DE')
+usecase_doc = create_usecase_table('V1', 'DE', translations)
+
+element_doc = create_element_overview('V1', 'DE', translations)
 
 
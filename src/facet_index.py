@@ -0,0 +1,193 @@
+"""
+facet_index.py
+
+The sidebar filters of the requirements page (pages/1_requirements.py): project phase, model,
+workflow, IFC entity, Pset and data type, with the number of requirements per value.
+
+`build_facet_index` runs once per loaded version and language and stores a bitmap of its rows
+for every value of every facet (one bit per row, packed into 64-bit words, about 12 KB per value
+for 100k rows). `ProjectPhase*` holds several comma separated values per row, the other facets one.
+A rerun of the page then only combines bitmaps:
+- the rows of the selected values of a facet: `|` of their bitmaps (a row with any selected value)
+- the rows matching all facets: `&` of the facets with a selection
+- the count of a value: the bits of its bitmap within the rows matching the selections of the
+  *other* facets, so every count is the number of rows shown after adding this value
+
+The rows are the positions in the data the index was built from.
+
+A requirement can belong to several workflows, but the web data keeps only one of them (the
+import keeps one row per model, element and attribute). The workflow facet is therefore built
+from `workflow_links.csv`, which the import stores with every workflow of every requirement.
+Versions built before that file existed have no workflow facet.
+
+"""
+
+import io
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.load_data import load_bytes
+
+# Filter columns by facet, "{language}" is replaced by the language suffix
+FACET_COLUMNS = {
+    'project_phase': 'ProjectPhase{language}',
+    'model': 'ModelName{language}',
+    'workflow': 'WorkflowName{language}',
+    'ifc_entity': 'IfcEntityIfc4.0Name',
+    'pset': 'Pset',
+    'data_type': 'DataTyp',
+}
+
+# Facets with comma separated values
+MULTI_VALUE_FACETS = {'project_phase'}
+
+# Facets built from the workflow links instead of the data
+LINKED_FACETS = {'workflow'}
+
+WORKFLOW_LINKS_FILE = 'workflow_links.csv'
+
+# The columns identifying a requirement in the data and in the workflow links
+ROW_KEY = ['ModelID', 'ElementID', 'AttributeID']
+
+
+def _facet_values(column: pd.Series, multi_value: bool) -> pd.Series:
+    # The values by row (index = row position), a row of a multi value facet may be repeated
+    values = column.reset_index(drop=True).dropna().astype(str)
+    if multi_value:
+        values = values.str.split(',').explode()
+    values = values.str.strip()
+    return values[values != '']
+
+
+def _words(row_count: int) -> int:
+    return (row_count + 63) // 64
+
+
+def _linked_values(data: pd.DataFrame, links: pd.DataFrame, column: str) -> pd.Series:
+    # The values of the links by row of the data (index = row position), one per row and value
+    keys = data[ROW_KEY].astype(str).reset_index(drop=True)
+    keys['row'] = np.arange(len(keys))
+    links = links.dropna(subset=[column])
+    linked = keys.merge(links[ROW_KEY].astype(str).assign(value=links[column].str.strip()), on=ROW_KEY)
+    linked = linked[linked['value'] != ''].drop_duplicates(subset=['row', 'value'])
+    return pd.Series(linked['value'].to_numpy(), index=linked['row'].to_numpy())
+
+
+def _build_bitmaps(values: pd.Series, row_count: int) -> Dict:
+    codes, uniques = pd.factorize(values, sort=True)
+    rows = values.index.to_numpy(dtype=np.int64)
+
+    bitmaps = np.zeros((len(uniques), _words(row_count) * 8), dtype=np.uint8)
+    np.bitwise_or.at(bitmaps, (codes, rows >> 3), (1 << (rows & 7)).astype(np.uint8))
+    return {
+        'values': np.asarray(uniques, dtype=str),
+        'bitmaps': bitmaps.view('<u8'),
+        'counts': np.bincount(codes, minlength=len(uniques)),
+    }
+
+
+def build_facet(column: pd.Series, multi_value: bool = False) -> Dict:
+    """
+    The index of one facet.
+
+    Returns:
+    Dict: 'values': the sorted values, 'bitmaps': one row of 64-bit words per value (bit i of the
+          words: row i has the value), 'counts': the number of rows per value.
+    """
+    return _build_bitmaps(_facet_values(column, multi_value), len(column))
+
+
+def build_linked_facet(data: pd.DataFrame, links: pd.DataFrame, column: str) -> Dict:
+    """The index of a facet whose values are assigned to the rows by `links` (see `ROW_KEY`), as `build_facet`."""
+    return _build_bitmaps(_linked_values(data, links, column), len(data))
+
+
+def build_facet_index(data: pd.DataFrame, language_suffix: str, workflow_links: Optional[pd.DataFrame] = None) -> Dict:
+    """
+    The facets of the requirements in a language, see the module docstring.
+
+    Parameters:
+    data (pd.DataFrame): The web data.
+    language_suffix (str): The language suffix, e.g. 'DE'.
+    workflow_links (pd.DataFrame): The workflow links of the version (see `load_workflow_links`),
+                                   None to leave out the workflow facet.
+
+    Returns:
+    Dict: 'rows': the number of rows, 'facets': {facet: see `build_facet`} for the facets with a column in `data`.
+    """
+    facets = {}
+    for facet, column in FACET_COLUMNS.items():
+        column = column.format(language=language_suffix)
+        if facet in LINKED_FACETS:
+            if workflow_links is not None and column in workflow_links.columns:
+                facets[facet] = build_linked_facet(data, workflow_links, column)
+        elif column in data.columns:
+            facets[facet] = build_facet(data[column], facet in MULTI_VALUE_FACETS)
+    return {'rows': len(data), 'facets': facets}
+
+
+def load_workflow_links(version: str) -> Optional[pd.DataFrame]:
+    """The workflow links of a version, None if the version has none (built before)."""
+    try:
+        content = load_bytes(version, WORKFLOW_LINKS_FILE)
+    except FileNotFoundError:
+        return None
+    return pd.read_csv(io.BytesIO(content), dtype=str)
+
+
+def get_value_codes(facet: Dict, selected_values: List[str]) -> np.ndarray:
+    """The positions of the selected values in the values of the facet, unknown values are left out."""
+    selected_values = np.asarray(selected_values, dtype=str)
+    positions = np.searchsorted(facet['values'], selected_values)
+    positions = positions[positions < len(facet['values'])]
+    return positions[np.isin(facet['values'][positions], selected_values)]
+
+
+def get_facet_bitmap(facet: Dict, selected_values: List[str]) -> np.ndarray:
+    """The rows with at least one of the selected values."""
+    return np.bitwise_or.reduce(facet['bitmaps'][get_value_codes(facet, selected_values)], axis=0)
+
+
+def to_row_mask(bitmap: np.ndarray, row_count: int) -> np.ndarray:
+    """The bitmap of rows as boolean mask."""
+    return np.unpackbits(bitmap.view(np.uint8), count=row_count, bitorder='little').view(bool)
+
+
+def _combine(bitmaps: List[np.ndarray]) -> Optional[np.ndarray]:
+    if not bitmaps:
+        return None
+    return np.bitwise_and.reduce(bitmaps, axis=0)
+
+
+def apply_facets(index: Dict, selections: Dict[str, List[str]]) -> Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Filters the requirements by the selected values of every facet.
+
+    Parameters:
+    index (Dict): The facet index, see `build_facet_index`.
+    selections (Dict[str, List[str]]): The selected values by facet, facets without selection match all rows.
+
+    Returns:
+    Tuple: The boolean mask of the matching rows (None if nothing is selected) and the counts by
+           facet, aligned with the values of the facet.
+    """
+    selected = {
+        facet: get_facet_bitmap(index['facets'][facet], values)
+        for facet, values in selections.items()
+        if values and facet in index['facets']
+    }
+
+    counts = {}
+    for facet, entry in index['facets'].items():
+        others = _combine([bitmap for other, bitmap in selected.items() if other != facet])
+        if others is None:
+            counts[facet] = entry['counts']
+        else:
+            counts[facet] = np.bitwise_count(entry['bitmaps'] & others).sum(axis=1)
+
+    matching = _combine(list(selected.values()))
+    if matching is None:
+        return None, counts
+    return to_row_mask(matching, index['rows']), counts
@@ -0,0 +1,124 @@
+"""
+file_schemas.py
+
+Column types of the CSV files, derived from the `required_*_columns` definitions in config.yaml.
+
+Without a schema pandas infers the type of every column and keeps text as Python objects. For the
+columns of the schema `load_file` instead:
+- reads the columns with few distinct values (`CATEGORY_COLUMNS`) as category, which stores every
+  distinct value only once
+- converts the sort keys (`Sort*`) to numbers, with decimal commas ("1,5") as entered in Excel
+- reads only the requested columns (`columns=['AttributeDescription*']`), the others are skipped
+  by the parser
+
+Excel files are read with the calamine engine (Rust) if python-calamine is installed, it parses
+large workbooks several times faster than openpyxl with the same result.
+
+"""
+
+import importlib.util
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.utils import load_config
+
+config = load_config()
+
+# Parser of the CSV files: "c" (pandas default) or "pyarrow" (multithreaded, used if pyarrow is installed).
+# Loads of selected columns always use "c", pyarrow does not select columns by pattern.
+CSV_ENGINE = config.get('CSV_ENGINE') or 'c'
+
+# Excel reader: "auto" (calamine if installed, else openpyxl), "calamine" or "openpyxl"
+XLSX_ENGINE = config.get('XLSX_ENGINE') or 'auto'
+
+CATEGORY_COLUMNS = ['Pset', 'DataTyp', 'Unit', 'IfcEntityIfc4.0Name']
+
+SORT_PREFIX = 'Sort'
+
+FILE_SCHEMAS = {
+    'M_Workflows.csv': config.get('required_workflows_columns', []),
+    'M_Models.csv': config.get('required_models_columns', []),
+    'M_Elements.csv': config.get('required_elements_columns', []),
+    'M_Attributes.csv': config.get('required_attributes_columns', []),
+}
+# The web data contains the columns of all import files
+FILE_SCHEMAS['data_for_web.csv'] = [column for columns in list(FILE_SCHEMAS.values()) for column in columns]
+
+# Files written by the build, their sort keys are already numeric
+GENERATED_FILES = ['data_for_web.csv']
+
+
+def matches_column(column: str, patterns: List[str]) -> bool:
+    """True if the column is one of the patterns, "Name*" stands for all columns starting with "Name"."""
+    return any(column.startswith(pattern[:-1]) if pattern.endswith('*') else column == pattern for pattern in patterns)
+
+
+def get_schema_dtypes(file_name: str) -> Dict[str, str]:
+    """
+    The dtypes of the fixed (non language specific) schema columns of a file for `pd.read_csv`.
+    The sort keys of the import files are read as text and converted by `convert_sort_columns`.
+    """
+    dtypes = {}
+    for column in FILE_SCHEMAS.get(file_name, []):
+        if column in CATEGORY_COLUMNS:
+            dtypes[column] = 'category'
+        elif column.startswith(SORT_PREFIX):
+            dtypes[column] = 'float64' if file_name in GENERATED_FILES else str
+    return dtypes
+
+
+def convert_sort_columns(df: pd.DataFrame, file_name: str) -> pd.DataFrame:
+    """Converts the sort keys of the schema to numeric in place ("1,5" -> 1.5) and returns the DataFrame."""
+    for column in FILE_SCHEMAS.get(file_name, []):
+        if column.startswith(SORT_PREFIX) and column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column].str.replace(',', '.', regex=False), errors='coerce')
+    return df
+
+
+def get_csv_engine(columns: Optional[List[str]] = None) -> str:
+    if columns or CSV_ENGINE != 'pyarrow' or importlib.util.find_spec('pyarrow') is None:
+        return 'c'
+    return 'pyarrow'
+
+
+def get_usecols(columns: List[str]) -> Callable[[str], bool]:
+    """The `usecols` argument of pandas selecting the columns matching the patterns."""
+    return lambda column: matches_column(column, columns)
+
+
+def get_read_csv_options(file_name: str, columns: Optional[List[str]] = None, schema: bool = True) -> Dict:
+    """
+    The keyword arguments of `pd.read_csv` for a file.
+
+    Parameters:
+    file_name (str): The file name, selects the schema (e.g. 'M_Attributes.csv').
+    columns (List[str]): Only read these columns (patterns as in config.yaml), None for all.
+    schema (bool): False to read the file untyped, e.g. to store it again unchanged.
+    """
+    options = {'engine': get_csv_engine(columns)}
+    if schema:
+        options['dtype'] = get_schema_dtypes(file_name)
+    if columns:
+        options['usecols'] = get_usecols(columns)
+    return options
+
+
+def get_excel_engine() -> str:
+    if XLSX_ENGINE == 'auto':
+        return 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+    return XLSX_ENGINE
+
+
+def get_read_excel_options(columns: Optional[List[str]] = None, sheet_name=0) -> Dict:
+    """
+    The keyword arguments of `pd.read_excel`.
+
+    Parameters:
+    columns (List[str]): Only read these columns (patterns as in config.yaml), None for all.
+    sheet_name (str | int): The sheet to read, by default the first one.
+    """
+    options = {'engine': get_excel_engine(), 'sheet_name': sheet_name}
+    if columns:
+        options['usecols'] = get_usecols(columns)
+    return options
@@ -0,0 +1,245 @@
+"""
+fingerprint_index.py
+
+A compact index of the import files of a version, to find changes without loading and comparing
+the files themselves.
+
+For every row of M_Workflows.csv, M_Models.csv, M_Elements.csv and M_Attributes.csv the index holds
+the ID and stable 64-bit hashes of the row and of every column group. The column groups are the
+required columns of config.yaml, "AttributeDescription*" groups all its languages; other columns
+are groups of their own. The hashes only depend on the text of the cells (see compare_two_versions.py),
+so they are the same for equal rows in every version and process.
+
+The index is written by the build after import_csv (`fingerprints.npz` in the version folder, about
+8 bytes per row and column group) and answers:
+- `diff_indexes`: which IDs were added, removed or changed and which column groups changed
+- `affected_projects`: which projects of a master template contain rows changed by a new template
+  version, and which of these rows the project changed itself (conflicts)
+
+"""
+
+import io
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.check_imports_data_structure import ID_COLUMNS, IMPORT_FILES, REQUIRED_COLUMNS
+from src.compare_two_versions import column_hashes, load_text
+from src.file_schemas import matches_column
+from src.instrumentation import add_rows_out
+from src.load_data import get_versions, load_bytes, store_file
+from src.project_index import get_master_version, get_projects_of_master, load_project_index
+
+FINGERPRINT_INDEX_FILE = 'fingerprints.npz'
+
+
+def get_column_groups(columns: List[str], file_name: str) -> Dict[str, List[str]]:
+    """The columns by group, the groups in the order of their first column."""
+    groups = {}
+    for column in columns:
+        group = next((pattern for pattern in REQUIRED_COLUMNS.get(file_name, []) if matches_column(column, [pattern])), column)
+        groups.setdefault(group, []).append(column)
+    return groups
+
+
+def _combine(hashes: np.ndarray) -> np.ndarray:
+    # Stable combination of the column hashes of every row
+    if hashes.shape[1] == 0:
+        return np.zeros(len(hashes), dtype=np.uint64)
+    return pd.util.hash_pandas_object(pd.DataFrame(hashes), index=False).to_numpy()
+
+
+def build_fingerprints(df: pd.DataFrame, file_name: str) -> Dict:
+    """
+    The fingerprints of a file.
+
+    Parameters:
+    df (pd.DataFrame): The file, see compare_two_versions.load_text.
+    file_name (str): The name of the file, selects the key column and the column groups.
+
+    Returns:
+    Dict: {'key': key column, 'groups': {group: [columns]}, 'keys': IDs, 'rows': row hashes,
+           'group_hashes': one column of hashes per group}. Of duplicate IDs the first row is kept.
+    """
+    key_column = ID_COLUMNS[file_name]
+    df = df.drop_duplicates(key_column)
+    groups = get_column_groups([column for column in df.columns if column != key_column], file_name)
+    hashes = column_hashes(df, [column for columns in groups.values() for column in columns])
+
+    group_hashes = []
+    start = 0
+    for columns in groups.values():
+        group_hashes.append(_combine(hashes[:, start:start + len(columns)]))
+        start += len(columns)
+
+    return {
+        'key': key_column,
+        'groups': groups,
+        'keys': df[key_column].astype(str).to_numpy(),
+        'rows': _combine(hashes),
+        'group_hashes': np.column_stack(group_hashes) if group_hashes else np.zeros((len(df), 0), dtype=np.uint64),
+    }
+
+
+def create_fingerprint_index(version: str) -> Dict[str, Dict]:
+    """Stores the fingerprint index of the import files of a version, see the module docstring."""
+    index = {}
+    for file_name in IMPORT_FILES:
+        try:
+            index[file_name] = build_fingerprints(load_text(version, file_name), file_name)
+        except FileNotFoundError:
+            continue
+
+    meta = {
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'files': {file_name: {'key': entry['key'], 'groups': entry['groups']} for file_name, entry in index.items()},
+    }
+    arrays = {'meta': np.array(json.dumps(meta))}
+    for position, entry in enumerate(index.values()):
+        arrays[f'keys_{position}'] = entry['keys'].astype(str)
+        arrays[f'rows_{position}'] = entry['rows']
+        arrays[f'groups_{position}'] = entry['group_hashes']
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    store_file(buffer.getvalue(), version, FINGERPRINT_INDEX_FILE)
+    add_rows_out(sum(len(entry['keys']) for entry in index.values()))
+    return index
+
+
+def load_fingerprint_index(version: str) -> Optional[Dict[str, Dict]]:
+    """The stored fingerprint index of a version by file name, None if the version has none (built before)."""
+    try:
+        content = load_bytes(version, FINGERPRINT_INDEX_FILE)
+    except FileNotFoundError:
+        return None
+
+    with np.load(io.BytesIO(content), allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays['meta']))
+        return {
+            file_name: {
+                **entry,
+                'keys': arrays[f'keys_{position}'],
+                'rows': arrays[f'rows_{position}'],
+                'group_hashes': arrays[f'groups_{position}'],
+            }
+            for position, (file_name, entry) in enumerate(meta['files'].items())
+        }
+
+
+def get_fingerprint_index(version: str) -> Dict[str, Dict]:
+    """The stored index of a version, built from its files if the version was built before the index existed."""
+    index = load_fingerprint_index(version)
+    if index is None:
+        index = {}
+        for file_name in IMPORT_FILES:
+            try:
+                index[file_name] = build_fingerprints(load_text(version, file_name), file_name)
+            except FileNotFoundError:
+                continue
+    return index
+
+
+def _align(old: Dict, new: Dict):
+    old_keys = pd.Index(old['keys'])
+    new_keys = pd.Index(new['keys'])
+    common_keys = new_keys.intersection(old_keys, sort=False)
+    return old_keys, new_keys, common_keys, old_keys.get_indexer(common_keys), new_keys.get_indexer(common_keys)
+
+
+def diff_file_fingerprints(old: Dict, new: Dict) -> Dict:
+    """
+    Compares the fingerprints of a file in two versions.
+
+    Returns:
+    Dict: 'added', 'removed' and 'changed' IDs, 'unchanged' rows and 'changed_groups': the number of
+          changed rows per column group (groups in both versions with the same columns).
+    """
+    old_keys, new_keys, common_keys, old_rows, new_rows = _align(old, new)
+    changed = old['rows'][old_rows] != new['rows'][new_rows]
+
+    old_groups = list(old['groups'])
+    changed_groups = {}
+    for position, (group, columns) in enumerate(new['groups'].items()):
+        if group in old['groups'] and old['groups'][group] == columns:
+            differs = old['group_hashes'][old_rows, old_groups.index(group)] != new['group_hashes'][new_rows, position]
+            if differs.any():
+                changed_groups[group] = int(differs.sum())
+        else:
+            changed_groups[group] = len(common_keys)
+
+    return {
+        'added': new_keys.difference(old_keys, sort=False).tolist(),
+        'removed': old_keys.difference(new_keys, sort=False).tolist(),
+        'changed': common_keys[changed].tolist(),
+        'unchanged': int((~changed).sum()),
+        'changed_groups': changed_groups,
+    }
+
+
+def diff_indexes(old_index: Dict[str, Dict], new_index: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Compares the fingerprint indexes of two versions per file, see `diff_file_fingerprints`."""
+    return {
+        file_name: diff_file_fingerprints(old_index[file_name], new_index[file_name])
+        for file_name in new_index
+        if file_name in old_index
+    }
+
+
+def get_project_versions(master_version: str) -> List[str]:
+    """The projects created from a master template, from the project index if it exists (see project_index.py)."""
+    versions = load_project_index()
+    if versions is not None:
+        return get_projects_of_master(versions, master_version)
+    return [version for version in get_versions() or [] if get_master_version(version) == master_version]
+
+
+def affected_projects(old_version: str, new_version: str, projects: Optional[List[str]] = None) -> List[Dict]:
+    """
+    The projects of a master template that contain rows changed (or removed) by a new template version.
+
+    Parameters:
+    old_version (str): The master template the projects were created from.
+    new_version (str): The new or changed master template.
+    projects (List[str]): The projects to check, by default all projects of `old_version`.
+
+    Returns:
+    List[Dict]: Per project: 'project', 'affected' (number of rows), 'conflicts' (affected rows the
+                project changed itself) and per file the affected and conflicting IDs.
+    """
+    old_index = get_fingerprint_index(old_version)
+    template_changes = diff_indexes(old_index, get_fingerprint_index(new_version))
+
+    results = []
+    for project in get_project_versions(old_version) if projects is None else projects:
+        project_index = get_fingerprint_index(project)
+        files = {}
+        for file_name, changes in template_changes.items():
+            if file_name not in project_index:
+                continue
+            changed_keys = pd.Index(changes['changed'] + changes['removed'])
+            project_keys = pd.Index(project_index[file_name]['keys'])
+            affected = changed_keys.intersection(project_keys, sort=False)
+            if affected.empty:
+                continue
+
+            # Rows the project changed since it was created from the template
+            old_rows = old_index[file_name]['rows'][pd.Index(old_index[file_name]['keys']).get_indexer(affected)]
+            project_rows = project_index[file_name]['rows'][project_keys.get_indexer(affected)]
+            customized = old_rows != project_rows
+            files[file_name] = {
+                'affected': affected.tolist(),
+                'conflicts': affected[customized].tolist(),
+            }
+
+        results.append({
+            'project': project,
+            'affected': sum(len(result['affected']) for result in files.values()),
+            'conflicts': sum(len(result['conflicts']) for result in files.values()),
+            'files': files,
+        })
+    return results
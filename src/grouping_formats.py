@@ -0,0 +1,121 @@
+"""
+grouping_formats.py
+
+Static replacement for the formula based conditional formats of the Excel exports.
+
+The Elementplan and the Libal config visually group the rows: a thin top border with black text
+where a new group starts (column A, C or F differs from the row above, always from column G on)
+and grey text in the columns A to F where the value repeats the row above. Done with conditional
+formats, Excel and LibreOffice evaluate thousands of formulas on open and while scrolling.
+
+This module computes the same flags once in pandas and writes them as static cell formats.
+The result is visually identical, following the precedence Excel applies to the conditional
+formats (the border/black text rules win over the grey text rule).
+
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PLAIN = 0
+BORDER = 1
+GREY = 2
+
+GROUPING_COLUMNS = 6  # Columns A to F
+
+BASE_FORMAT = {'text_wrap': True, 'valign': 'top'}
+CENTERED_FORMAT = {**BASE_FORMAT, 'align': 'center'}
+BORDER_OVERLAY = {'top': 1, 'font_color': 'black'}
+GREY_OVERLAY = {'font_color': '#d3d3d3'}
+
+
+def _same_as_above(column: pd.Series) -> np.ndarray:
+    """Compares every value with the row above like Excel does (case insensitive, blank equals blank)."""
+    values = column.fillna('').astype(str).str.lower().to_numpy()
+    same = np.zeros(len(values), dtype=bool)
+    same[1:] = values[1:] == values[:-1]
+    return same
+
+
+def compute_grouping_styles(df: pd.DataFrame, column_count: Optional[int] = None) -> np.ndarray:
+    """
+    Computes the grouping style of every data cell.
+
+    Parameters:
+    df (pd.DataFrame): The data of one sheet, in the written column order. Only the
+                       columns A to F are read.
+    column_count (int): Number of written columns, defaults to the columns of `df`.
+
+    Returns:
+    np.ndarray: An array of shape (rows, columns) with PLAIN, BORDER or GREY per cell.
+    """
+    row_count = len(df)
+    if column_count is None:
+        column_count = len(df.columns)
+    styles = np.full((row_count, column_count), PLAIN, dtype=np.int8)
+    if row_count == 0:
+        return styles
+
+    same = [_same_as_above(df.iloc[:, col]) for col in range(min(GROUPING_COLUMNS, column_count))]
+    no_change = np.zeros(row_count, dtype=bool)
+
+    new_a = ~same[0]
+    new_c = ~same[2] if len(same) > 2 else no_change
+    new_f = ~same[5] if len(same) > 5 else no_change
+
+    for col in range(column_count):
+        if col >= GROUPING_COLUMNS:
+            # Line from column G onward on every row
+            styles[:, col] = BORDER
+            continue
+
+        border = new_a.copy()
+        if col >= 2:
+            border |= new_c
+        if col >= 5:
+            border |= new_f
+
+        styles[:, col] = np.where(border, BORDER, np.where(same[col], GREY, PLAIN))
+
+    return styles
+
+
+def add_static_formats(workbook) -> Dict[Tuple[bool, int], object]:
+    """Registers one format per (centered, style) combination on the workbook."""
+    formats = {}
+    for centered, base in ((False, BASE_FORMAT), (True, CENTERED_FORMAT)):
+        formats[(centered, PLAIN)] = workbook.add_format(base)
+        formats[(centered, BORDER)] = workbook.add_format({**base, **BORDER_OVERLAY})
+        formats[(centered, GREY)] = workbook.add_format({**base, **GREY_OVERLAY})
+    return formats
+
+
+def iter_rows(df: pd.DataFrame, positions: Optional[np.ndarray] = None, chunk_size: int = 1000) -> Iterator[List]:
+    """Yields the rows (at `positions`, default all) as lists of Python values, None for empty cells."""
+    if positions is None:
+        positions = np.arange(len(df))
+    for start in range(0, len(positions), chunk_size):
+        chunk = df.iloc[positions[start:start + chunk_size]].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from (list(row) for row in chunk.itertuples(index=False, name=None))
+
+
+def write_static_rows(worksheet, rows: Iterable[List], styles: np.ndarray, centered: List[bool], formats: Dict, start_row: int = 1):
+    """
+    Writes the rows cell by cell with their precomputed static format.
+
+    Parameters:
+    worksheet: The xlsxwriter worksheet.
+    rows (Iterable[List]): The row values in written order (None for empty cells).
+    styles (np.ndarray): The styles from `compute_grouping_styles`, aligned with `rows`.
+    centered (List[bool]): Whether a column uses the centered base format.
+    formats (Dict): The formats from `add_static_formats`.
+    start_row (int): The worksheet row of the first data row.
+    """
+    for row_offset, values in enumerate(rows):
+        row_styles = styles[row_offset]
+        row_num = start_row + row_offset
+        for col_num, value in enumerate(values):
+            worksheet.write(row_num, col_num, value, formats[(centered[col_num], int(row_styles[col_num]))])
@@ -37,6 +37,9 @@ import csv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.load_data import load_file, store_file  # Import from load_file.py
+from src.sort import add_sort_rank
+from src.facet_index import ROW_KEY, WORKFLOW_LINKS_FILE
+from src.instrumentation import add_rows_out
 from src.check_imports_data_structure import (
     required_workflows_columns,
     required_models_columns,
@@ -62,19 +65,41 @@ def _filter_to_models_for_workflows():
     pass
 
 
-def _filter_to_selected_workflows(df, ):
-    #Experimental!
-
+def _select_workflow_rows(df):
+    # The rows of the selected workflows and their models, a requirement once per workflow
     result_df =  df[df['Selected'] == True]
     list_needed_models =_get_models_for_workflows(result_df)
     result_df = result_df[result_df['ModelID'].isin(list_needed_models)]
     result_df['ID'] =  result_df['ModelID'] + result_df['ElementID'] + result_df['AttributeID']
+    return result_df
+
+
+def _filter_to_selected_workflows(df, ):
+    #Experimental!
+
+    result_df = _select_workflow_rows(df)
 
     #Is this realy necessary, or can I adjust the logic
     result_df = result_df.drop_duplicates(subset=['ID']).reset_index(drop=True)
     return result_df
 
 
+def get_workflow_links(merged_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every selected workflow of every requirement, the raw data keeps only one per requirement.
+    Columns: the requirement (`facet_index.ROW_KEY`), `WorkflowID` and the `WorkflowName*` columns.
+    """
+    selected_df = _select_workflow_rows(merged_df)
+    name_columns = [column for column in selected_df.columns if column.startswith('WorkflowName')]
+    links_df = selected_df[ROW_KEY + ['WorkflowID'] + name_columns]
+    return links_df.drop_duplicates(subset=ROW_KEY + ['WorkflowID']).reset_index(drop=True)
+
+
+def store_workflow_links(merged_df: pd.DataFrame, version: str):
+    """Stores the workflow links of the merged data, the workflow filter of the requirements page (see facet_index.py)."""
+    store_file(get_workflow_links(merged_df).to_csv(index=False), version, WORKFLOW_LINKS_FILE)
+
+
 
 def x_process_attributes_df(df: pd.DataFrame) -> pd.DataFrame:
     required_columns = ['ElementID', 'ModelID', 'WorkflowID', 'SortAttribute']
@@ -221,18 +246,27 @@ def import_csv(version:str, master_or_project:str):
         #languages =
 
     #Execution logic
+    merged_df = merge_import_data(workflows_df, models_df, elements_df, attributes_df)
+    store_workflow_links(merged_df, version)
+    merged_df = prepare_raw_data(merged_df)
+    store_raw_data(merged_df, version)
+
+
+def merge_import_data(workflows_df: pd.DataFrame, models_df: pd.DataFrame,
+                      elements_df: pd.DataFrame, attributes_df: pd.DataFrame) -> pd.DataFrame:
+    """Explodes the links of the attributes and merges elements, models and workflows onto them."""
     attributes_df = _process_attributes_df(attributes_df)
     merged_df_step1 = attributes_df.merge(elements_df, left_on='ElementLink', right_on='ElementID', how='left')
     merged_df_step2 = merged_df_step1.merge(models_df, left_on='ModelLink', right_on='ModelID', how='left')
     merged_df_step3 = merged_df_step2.merge(workflows_df, left_on='WorkflowLink', right_on='WorkflowID', how='left')
 
-    merged_df = merged_df_step3
-    
-    #debug 
-    merged_df = _filter_to_selected_workflows(merged_df_step3)
+    return merged_df_step3
 
 
-    
+def prepare_raw_data(merged_df: pd.DataFrame) -> pd.DataFrame:
+    """Reduces the merged data to the selected workflows and sorts it once."""
+    #debug 
+    merged_df = _filter_to_selected_workflows(merged_df)
 
     #Sort not working
 
@@ -244,7 +278,12 @@ def import_csv(version:str, master_or_project:str):
     #available_columns = [col for col in columns_to_check if col in merged_df.columns]
     #sorted_df = merged_df.sort_values(by=available_columns, ascending=[True] * len(available_columns))
 
+    # Coerce the sort keys once and persist the order (SortRank), later sorts are no-ops
+    return add_sort_rank(merged_df)
+
 
+def store_raw_data(merged_df: pd.DataFrame, version: str):
+    """Stores the raw data as `RawData_{version}.xlsx`, the input of all exports."""
     try:
         excel_buffer = io.BytesIO()
         with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
@@ -255,6 +294,7 @@ def import_csv(version:str, master_or_project:str):
         filename = f"RawData_{version}.xlsx"
 
         store_file(excel_buffer.getvalue(), version, filename)
+        add_rows_out(len(merged_df))
 
     except Exception as e:
-        raise ValueError(f"Error exporting DataFrame to Excel: {e}")
\ No newline at end of file
+        raise ValueError(f"Error exporting DataFrame to Excel: {e}")
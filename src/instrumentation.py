@@ -0,0 +1,223 @@
+"""
+instrumentation.py
+
+Structured timing and memory measurements of the build pipeline.
+
+- `stage(name)` measures a build stage: wall time, CPU time (including finished child processes),
+  RSS and peak RSS change, rows in/out and bytes read/written.
+- `instrument_storage(operation)` decorates the storage functions of load_data.py. Every call is
+  counted in storage_metrics.py, but only recorded in detail while a build is collected (inside
+  `collect()` or `stage()`). Their rows and bytes are added to the enclosing stage.
+- Every stage and storage record is logged as one JSON line on the `instrumentation` logger.
+- `collect()` gathers all records of a build, `build_report(records)` summarizes them
+  (stored as `build_report.json` in the version folder if `BUILD_REPORT` is enabled in config.yaml).
+
+Records of worker processes (see parallel_export.py) are returned to the parent and added with
+`merge_records`.
+
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+import psutil
+
+from src.storage_metrics import record_call
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, the peak RSS is then not measured
+    resource = None
+
+logger = logging.getLogger('instrumentation')
+
+COUNTERS = ('rows_in', 'rows_out', 'bytes_read', 'bytes_written')
+
+_state = threading.local()
+
+
+def _collectors() -> List[List[Dict]]:
+    if not hasattr(_state, 'collectors'):
+        _state.collectors = []
+        _state.stages = []
+    return _state.collectors
+
+
+def _stages() -> List[Dict]:
+    _collectors()
+    return _state.stages
+
+
+def is_active() -> bool:
+    """True while a build is collected or a stage is measured in this thread."""
+    return bool(_collectors() or _stages())
+
+
+def _emit(record: Dict):
+    logger.info(json.dumps(record, default=str))
+    for records in _collectors():
+        records.append(record)
+
+
+def _add_to_stage(record: Dict):
+    """Adds the rows and bytes of a storage record to the innermost stage."""
+    stages = _stages()
+    if not stages:
+        return
+    for counter in COUNTERS:
+        if record.get(counter):
+            stages[-1][counter] += record[counter]
+
+
+def add_rows_out(count: int):
+    """Counts rows produced by the current stage (e.g. rows written to an export)."""
+    stages = _stages()
+    if stages:
+        stages[-1]['rows_out'] += count
+
+
+@contextmanager
+def collect() -> Iterator[List[Dict]]:
+    """Collects all stage and storage records emitted inside the block."""
+    records = []
+    _collectors().append(records)
+    try:
+        yield records
+    finally:
+        _collectors().remove(records)
+
+
+def merge_records(records: List[Dict]):
+    """Adds records measured in a worker process to the current collection and stage."""
+    for record in records:
+        for collected in _collectors():
+            collected.append(record)
+        if record['type'] == 'storage':
+            _add_to_stage(record)
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / 1024 / 1024, 1)
+
+
+@contextmanager
+def stage(name: str, **fields) -> Iterator[Dict]:
+    """
+    Measures a build stage.
+
+    Parameters:
+    name (str): The name of the stage, e.g. 'import_csv'.
+    **fields: Additional fields of the record, e.g. the version.
+
+    Yields:
+    Dict: The record, completed and emitted when the block is left.
+    """
+    process = psutil.Process()
+    record = {'type': 'stage', 'stage': name, **fields, **{counter: 0 for counter in COUNTERS}}
+    _stages().append(record)
+
+    rss_start = process.memory_info().rss
+    peak_start = _peak_rss()
+    times_start = os.times()
+    wall_start = time.perf_counter()
+    try:
+        yield record
+        record['status'] = 'ok'
+    except Exception as e:
+        record.update({'status': 'failed', 'error': str(e)})
+        raise
+    finally:
+        times_end = os.times()
+        peak_end = _peak_rss()
+        record.update({
+            'wall_seconds': round(time.perf_counter() - wall_start, 3),
+            'cpu_seconds': round(times_end.user + times_end.system - times_start.user - times_start.system, 3),
+            'child_cpu_seconds': round(times_end.children_user + times_end.children_system
+                                       - times_start.children_user - times_start.children_system, 3),
+            'rss_delta_mb': _mb(process.memory_info().rss - rss_start),
+            'peak_rss_delta_mb': _mb(None if peak_start is None else peak_end - peak_start),
+        })
+        _stages().remove(record)
+        _emit(record)
+
+
+def instrument_storage(operation: str, target: Callable, measure: Optional[Callable] = None, backend: Union[str, Callable] = 'local') -> Callable:
+    """
+    Decorator measuring the calls of a storage function.
+
+    Every call is counted in storage_metrics.py. While a build is collected, the call is also
+    emitted as record and added to the enclosing stage.
+
+    Parameters:
+    operation (str): The name of the operation, e.g. 'load_file'.
+    target (Callable): Called as `target(*args, **kwargs)`, returns the accessed version/file.
+    measure (Callable): Called as `measure(result, *args, **kwargs)`, returns the counters
+                        (`rows_in`, `bytes_read`, ...) of the call and may override its `status`.
+    backend (str | Callable): The storage backend of the function, e.g. 'local' or 'azure', or a function
+                              returning it when the backend is selected at runtime.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            record = {'type': 'storage', 'operation': operation}
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                record['status'] = 'ok'
+                if measure:
+                    record.update(measure(result, *args, **kwargs))
+                return result
+            except Exception as e:
+                record.update({'status': 'failed', 'error': str(e)})
+                raise
+            finally:
+                record['seconds'] = round(time.perf_counter() - start, 4)
+                record_call(
+                    backend() if callable(backend) else backend, operation, time.perf_counter() - start,
+                    bytes_read=record.get('bytes_read'), bytes_written=record.get('bytes_written'),
+                    error=record['status'] != 'ok',
+                )
+                if is_active():
+                    record['target'] = target(*args, **kwargs)
+                    _add_to_stage(record)
+                    _emit(record)
+
+        return wrapper
+    return decorator
+
+
+def build_report(records: List[Dict], **fields) -> Dict:
+    """
+    Summarizes the records of a build: all stages and the storage calls per operation.
+
+    Returns:
+    Dict: `stages` (the stage records) and `storage` (count, seconds, rows and bytes per operation).
+    """
+    storage = {}
+    for record in records:
+        if record['type'] != 'storage':
+            continue
+        summary = storage.setdefault(record['operation'], {'calls': 0, 'seconds': 0.0, **{counter: 0 for counter in COUNTERS}})
+        summary['calls'] += 1
+        summary['seconds'] = round(summary['seconds'] + record['seconds'], 4)
+        for counter in COUNTERS:
+            summary[counter] += record.get(counter) or 0
+
+    return {
+        **fields,
+        'stages': [record for record in records if record['type'] == 'stage'],
+        'storage': storage,
+    }
@@ -0,0 +1,241 @@
+"""
+job_runner.py
+
+Local background job queue for the builds started in the admin area.
+
+`batch_processing_import` can take minutes for large catalogues. Run inside the Streamlit
+script it freezes the admin session and is killed on a browser refresh. Instead, the admin page
+submits the build as a job:
+
+- Jobs run in a process pool (`BUILD_MAX_WORKERS` in config.yaml), so several versions can
+  build at the same time while the page keeps rerunning.
+- The state of every job (status, current stage, stage timings, errors) is persisted as one
+  JSON file in `data/.jobs/`, so it survives page reruns and can be polled from any session.
+- The storage calls of a job are counted in its worker process and added to the counters of
+  the server (storage_metrics.py) when the job finishes.
+- Only one job per version can be queued or running at a time. `submit_build` claims the version
+  by linking a file with the job id to `data/.jobs/{version}.lock`, which fails if the lock
+  exists, so two submits at the same time (e.g. a double click) cannot both queue a build. The
+  job removes the lock when it finishes.
+
+"""
+
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src import storage_metrics
+from src.load_data import get_project_path
+from src.utils import load_config
+
+config = load_config()
+
+BUILD_MAX_WORKERS = config.get('BUILD_MAX_WORKERS', 2)
+
+JOBS_FOLDER = get_project_path('data') / '.jobs'
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """The pool lives as long as the server process, independent of sessions and reruns."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BUILD_MAX_WORKERS)
+    return _executor
+
+
+def _job_path(job_id: str) -> Path:
+    return JOBS_FOLDER / f"{job_id}.json"
+
+
+def _lock_path(version: str) -> Path:
+    return JOBS_FOLDER / f"{version}.lock"
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _write_job(job: Dict):
+    """Writes the job state atomically, readers never see a partially written file."""
+    JOBS_FOLDER.mkdir(parents=True, exist_ok=True)
+    temp_path = _job_path(job['job_id']).with_suffix('.tmp')
+    temp_path.write_text(json.dumps(job, indent=2), encoding='utf-8')
+    os.replace(temp_path, _job_path(job['job_id']))
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    try:
+        return json.loads(_job_path(job_id).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def list_jobs(version: Optional[str] = None) -> List[Dict]:
+    """
+    Returns all jobs (newest first), optionally only the ones of a version.
+
+    Jobs whose worker or server process no longer exists (e.g. after a server restart)
+    are marked as failed.
+    """
+    if not JOBS_FOLDER.exists():
+        return []
+
+    jobs = []
+    for path in JOBS_FOLDER.glob('*.json'):
+        try:
+            job = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+
+        interrupted = (
+            (job['status'] == 'running' and not _process_alive(job.get('pid')))
+            or (job['status'] == 'queued' and not _process_alive(job.get('server_pid')))
+        )
+        if interrupted:
+            job.update({'status': 'failed', 'error': 'The build process was interrupted.', 'finished': _now()})
+            _write_job(job)
+
+        if version is None or job['version'] == version:
+            jobs.append(job)
+
+    return sorted(jobs, key=lambda job: job['submitted'], reverse=True)
+
+
+def is_build_active(version: str) -> bool:
+    """True if a build of the version is queued or running."""
+    return any(job['status'] in ACTIVE_STATUSES for job in list_jobs(version))
+
+
+def _claim_version(job: Dict) -> bool:
+    """Creates the lock of the job's version, False if another job holds it."""
+    # The lock appears with the job id already written: the id is written to a file of its own,
+    # which is then linked to the lock path (fails if the lock exists)
+    claim_path = JOBS_FOLDER / f"{job['job_id']}.claim"
+    claim_path.write_text(job['job_id'], encoding='utf-8')
+    try:
+        os.link(claim_path, _lock_path(job['version']))
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        claim_path.unlink()
+
+
+def _release_version(job: Dict):
+    """Removes the lock of the job's version if the job holds it."""
+    lock_path = _lock_path(job['version'])
+    try:
+        if lock_path.read_text(encoding='utf-8') == job['job_id']:
+            lock_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _release_stale_lock(version: str):
+    # The lock of a job that is no longer active, e.g. of a server that was stopped while it was queued
+    try:
+        job_id = _lock_path(version).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return
+    active = {job['job_id'] for job in list_jobs(version) if job['status'] in ACTIVE_STATUSES}
+    if job_id not in active:
+        _release_version({'version': version, 'job_id': job_id})
+
+
+def _run_job(job_id: str) -> Dict:
+    """Executes a build job in a worker process and records its progress, returns the storage counters of the build."""
+    # Imported here, the worker process only needs the pipeline when a job actually runs
+    from src.batch_processing_import import batch_processing_import
+
+    job = get_job(job_id)
+    job.update({'status': 'running', 'started': _now(), 'pid': os.getpid()})
+    _write_job(job)
+    start = time.perf_counter()
+
+    def record_stage(stage, seconds):
+        if seconds is None:
+            job['stage'] = stage
+        else:
+            job['stages'].append({'stage': stage, 'seconds': round(seconds, 3)})
+        _write_job(job)
+
+    try:
+        batch_processing_import(job['version'], job['master_or_project'], progress_callback=record_stage)
+        job['status'] = 'done'
+    except Exception as e:
+        job.update({'status': 'failed', 'error': str(e)})
+
+    job.update({'stage': None, 'finished': _now(), 'seconds': round(time.perf_counter() - start, 3)})
+    _write_job(job)
+    _release_version(job)
+    return storage_metrics.take()
+
+
+def _merge_storage_metrics(future):
+    # The storage counters of a finished job, see `_run_job`
+    if not future.cancelled() and future.exception() is None:
+        storage_metrics.merge(future.result())
+
+
+def submit_build(version: str, master_or_project: str) -> str:
+    """
+    Queues a build of a version and returns the job id.
+
+    Parameters:
+    version (str): The version to build.
+    master_or_project (str): "M" for Master, "P" for Project.
+
+    Raises:
+    ValueError: If a build of the same version is already queued or running.
+    """
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'version': version,
+        'master_or_project': master_or_project,
+        'status': 'queued',
+        'submitted': _now(),
+        'started': None,
+        'finished': None,
+        'stage': None,
+        'stages': [],
+        'seconds': None,
+        'error': None,
+        'pid': None,
+        'server_pid': os.getpid(),
+    }
+    # The job is written before the lock, so the job of an existing lock can always be looked up
+    _write_job(job)
+    _release_stale_lock(version)
+    if not _claim_version(job):
+        _job_path(job['job_id']).unlink()
+        raise ValueError(f"A build of {version} is already queued or running.")
+
+    try:
+        _get_executor().submit(_run_job, job['job_id']).add_done_callback(_merge_storage_metrics)
+    except Exception as e:
+        job.update({'status': 'failed', 'error': str(e), 'finished': _now()})
+        _write_job(job)
+        _release_version(job)
+        raise
+    return job['job_id']
@@ -2,491 +2,338 @@
 load_files.py i
 
 This module provides an abstraction layer for loading, saving, and managing element plan data
-across different storage options, such as local file storage, Azure Blob Storage, 
+across different storage options, such as local file storage, Azure Blob Storage,
 and potentially other cloud services / Databases.
 
+The storage itself is done by the backend selected in config.yaml, see storage_backends.py.
+
 """
 
 import pandas as pd
 import logging
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-from azure.core.exceptions import AzureError, ResourceExistsError
-from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import os
 import io
-from typing import List
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from src.utils import load_config
+from src.instrumentation import instrument_storage
+from src.file_schemas import convert_sort_columns, get_read_csv_options, get_read_excel_options
+from src.storage_backends import BASE_FILE_SUFFIXES, DATA_DIR_ENV, get_backend, get_data_folder
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 config = load_config()
 
-USE_AZURE_STORAGE = config.get('USE_AZURE_STORAGE', False)
 
-AZURE_ACCOUNT_NAME = os.getenv('AZURE_ACCOUNT_NAME')
-AZURE_ACCOUNT_KEY = os.getenv('AZURE_ACCOUNT_KEY')
-AZURE_CONTAINER_NAME = os.getenv('AZURE_CONTAINER_NAME')
+def _backend_name():
+    # Label of the backend in the storage metrics, see storage_metrics.py
+    return get_backend().name
 
 
+# Measurements of the storage calls during a build, see instrumentation.py
 
+def _file_target(version_name, file_name, *options, **keyword_options):
+    return f"{version_name}/{file_name}"
 
-def create_storage_folder(version_name: str):
-    """Creates a storage folder in either Azure or locally based on configuration."""
-    if USE_AZURE_STORAGE:
-        return _create_azure_directory(version_name)
-    else:
-        return _create_local_directory(version_name)
 
+def _stored_file_target(file_content, version_name, file_name):
+    return f"{version_name}/{file_name}"
 
-def store_file(file_content: str, version_name: str, file_name: str) -> pd.DataFrame:
-    """Saves a file either in Azure Blob or locally based on configuration."""
 
-    if USE_AZURE_STORAGE:
-        return _upload_to_azure(file_content, version_name, file_name)
-    else:
-        return _store_locally(file_content, version_name, file_name)
+def _measure_store(stored, file_content, version_name, file_name):
+    return {'bytes_written': len(file_content), 'status': 'ok' if stored else 'failed'}
 
 
-def load_file(version_name: str, file_name: str) -> pd.DataFrame:
-    """
-    Loads a CSV or Excel file from Azure Blob Storage or the local filesystem based on configuration.
+def _measure_store_stream(stored, file_obj, version_name, file_name):
+    return {'bytes_written': file_obj.tell(), 'status': 'ok' if stored else 'failed'}
 
-    Parameters:
-    ----------
-    version_name : str
-        The name of the version or folder where the file is located.
-    file_name : str
-        The name of the file to be loaded (should be a CSV or Excel file).
 
-    Returns:
-    -------
-    pd.DataFrame
-        The contents of the file as a Pandas DataFrame.
+def _measure_load(result, *args, **kwargs):
+    df, bytes_read = result
+    return {'rows_in': len(df), 'bytes_read': bytes_read}
 
-    Raises:
-    -------
-    RuntimeError:
-        If the file cannot be loaded from Azure Blob Storage or locally.
 
-    Example:
-    --------
-    df = load_file("v1", "example.csv")
-    """
-    try:
-        if USE_AZURE_STORAGE:
-            # Attempt to load the file from Azure Blob Storage
-            return _load_from_azure(version_name, file_name)
-        else:
-            # Load the file from the local filesystem
-            return _load_locally(version_name, file_name)
-    
-    except Exception as e:
-        raise RuntimeError(f"Failed to load file {file_name} from {version_name}: {str(e)}")
+def _measure_load_bytes(content, version_name, file_name):
+    return {'bytes_read': len(content)}
 
-def get_versions(data_folder: Path) -> List[str]:
-    """ Get a list of all the folders/versions"""
-    if USE_AZURE_STORAGE:
-        # Fetch versions from Azure Blob Storage
-        blob_service_client = BlobServiceClient(
-            account_url=f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net",
-            credential=AZURE_ACCOUNT_KEY
-        )
-        container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-        blobs = container_client.list_blobs()
-        return sorted(
-            {blob.name.split('/')[0] for blob in blobs if '__pycache__' not in blob.name},
-            reverse=True
-        )
-    else:
-        # Fetch versions from the local file system
-        return sorted([f.name for f in data_folder.iterdir() 
-                       if f.is_dir() and f.name != '__pycache__'], reverse=True)
 
-def get_project_path(folder_name: str) -> Path:
-    """Get the appropriate project path based on the environment (local or Streamlit Cloud)."""
-    if os.getenv('STREAMLIT_CLOUD'):
-        return Path('/mount/src/pragmatic_bim_requirements_manager') / folder_name
-    else:
-        return Path(__file__).parent.parent / folder_name
-    
+def _copy_target(selected_master_template, project_version):
+    return f"{selected_master_template} -> {project_version}"
 
-import os
-from pathlib import Path
 
+def _download_link_target(version, file_name, data_folder=None):
+    return f"{version}/{file_name}"
 
-def copy_base_files(selected_master_template: str, project_version: str):
-    """Copy all CSV files from the selected master template to the project version folder."""
 
-    # Create the target directory in Azure or locally
-    create_storage_folder(project_version)
+def _versions_target(data_folder=None):
+    return _backend_name()
 
-    # Fetch files from master template folder
-    if USE_AZURE_STORAGE:
-        _copy_files_azure(selected_master_template, project_version)
-    else:
-        _copy_files_local(selected_master_template, project_version)
 
-def get_download_link(version: str, file_name: str, data_folder: str) -> str:
-    """
-    Generates a file path to serve the file.
+def _version_target(version_name):
+    return version_name
 
-    Parameters:
-    ----------
-    version_name : str
-        The name of the version or folder where the file is located.
-    file_name : str
-        The name of the file to be downloaded.
-    data_folder : str
-        The base folder where the local files are stored.
 
-    Returns:
-    -------
-    str
-        Either the local file path or the Azure Link
+def _measure_copy(copied_bytes, selected_master_template, project_version):
+    return {'bytes_read': copied_bytes, 'bytes_written': copied_bytes}
 
-    """
 
-    print("debug start get_download_link")
+def create_storage_folder(version_name: str):
+    """Creates a storage folder in the configured storage backend."""
+    try:
+        get_backend().create_folder(version_name)
+        logger.info(f"Storage folder '{version_name}' created successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create storage folder: {str(e)}")
+        return False
 
-    if USE_AZURE_STORAGE:
-            # Generate Azure download link
-            download_url = _get_azure_download_link(version, file_name)
-            print(download_url)
-    else:
-        # Generate local download link
-        download_url = _get_local_download_link(version, file_name, data_folder)
-        print(download_url)
 
-    return download_url
+@instrument_storage('store_file', _stored_file_target, _measure_store, _backend_name)
+def _write_file(file_content: bytes, version_name: str, file_name: str) -> bool:
+    """Writes the encoded file to the storage backend, measured with the size of the written bytes."""
+    try:
+        get_backend().write_bytes(version_name, file_name, file_content)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save file: {str(e)}")
+        return False
+
+
+def store_file(file_content: str, version_name: str, file_name: str) -> pd.DataFrame:
+    """Saves a file in the configured storage backend."""
+    if isinstance(file_content, str):
+        file_content = file_content.encode('utf-8')
+    return _write_file(file_content, version_name, file_name)
 
-def _get_azure_download_link(version_name: str, file_name: str) -> str:
+
+@instrument_storage('store_file_stream', _stored_file_target, _measure_store_stream, _backend_name)
+def store_file_stream(file_obj: BinaryIO, version_name: str, file_name: str) -> bool:
     """
-    Generates a publicly accessible download link for a file in Azure Blob Storage using a SAS token.
+    Saves a binary file object in the configured storage backend, without reading it into memory at once.
 
     Parameters:
     ----------
+    file_obj : BinaryIO
+        An open binary file object, e.g. a spooled temporary file.
     version_name : str
-        The name of the version or folder where the file is located.
+        The name of the version or folder where the file is stored.
     file_name : str
-        The name of the file to be downloaded.
+        The name of the stored file.
 
     Returns:
     -------
-    str
-        The publicly accessible download URL with SAS token for the file in Azure Blob Storage.
+    bool
+        True if the file was stored successfully.
     """
+    try:
+        get_backend().write_stream(version_name, file_name, file_obj)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save file: {str(e)}")
+        return False
 
-    print("Generating SAS download link from Azure Blob Storage")
 
-    blob_service_client = _azure_blob_service_client()
-    container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-    blob_name = f"{version_name}/{file_name}"
-    blob_client = container_client.get_blob_client(blob_name)
+class _CountingReader(io.RawIOBase):
+    """Counts the bytes read from a stream; the parser may close the reader, the stream stays open."""
 
-    print(f"Blob client for {version_name}/{file_name} created.")
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.bytes_read = 0
 
-    # Set expiration for SAS token (e.g., 1 hour from now)
-    sas_token_expiry = datetime.now(timezone.utc) + timedelta(hours=1)
-    print(f"SAS token expiry set to: {sas_token_expiry}")
+    def readable(self) -> bool:
+        return True
 
-    # Generate the SAS token for the blob
-    try:
-        sas_token = generate_blob_sas(
-            account_name=AZURE_ACCOUNT_NAME,
-            container_name=AZURE_CONTAINER_NAME,
-            blob_name=f"{version_name}/{file_name}",
-            account_key=AZURE_ACCOUNT_KEY,
-            permission=BlobSasPermissions(read=True),  # Allow read access
-            expiry=sas_token_expiry
-        )
-        print(f"SAS token generated: {sas_token}")
-    except Exception as e:
-        print(f"Error generating SAS token: {e}")
-        return None
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        return size
 
-    # Combine the blob URL with the generated SAS token
-    sas_url = f"{blob_client.url}?{sas_token}"
-    print(f"Generated SAS URL: {sas_url}")
 
-    return sas_url
+@instrument_storage('load_file', _file_target, _measure_load, _backend_name)
+def _load_dataframe(version_name: str, file_name: str, columns: Optional[List[str]] = None,
+                    schema: bool = True) -> Tuple[pd.DataFrame, int]:
+    """Parses a file of the storage backend, returns the DataFrame and the number of read bytes."""
+    backend = get_backend()
 
-def _get_local_download_link(version_name: str, file_name: str, data_folder: str) -> str:
+    if file_name.endswith('.csv'):
+        # Parsed while it is read, the file is never held in memory as a whole
+        with backend.open_file(version_name, file_name) as stream:
+            reader = _CountingReader(stream)
+            df = pd.read_csv(io.BufferedReader(reader), **get_read_csv_options(file_name, columns, schema))
+        if schema:
+            convert_sort_columns(df, file_name)
+        return df, reader.bytes_read
+
+    if file_name.endswith('.xlsx'):
+        # Excel files are zip archives and need random access
+        content = backend.read_bytes(version_name, file_name)
+        return pd.read_excel(io.BytesIO(content), **get_read_excel_options(columns)), len(content)
+
+    raise ValueError("Unsupported file type. Only .csv and .xlsx are supported.")
+
+
+def load_file(version_name: str, file_name: str, columns: Optional[List[str]] = None, schema: bool = True) -> pd.DataFrame:
     """
-    Generates a local file path to serve the file.
+    Loads a CSV or Excel file from the configured storage backend.
+
+    CSV files are typed with the schema of file_schemas.py: category for Pset, DataTyp, Unit and
+    IfcEntity, numeric sort keys. Excel files are read with the fastest available engine.
 
     Parameters:
     ----------
     version_name : str
         The name of the version or folder where the file is located.
     file_name : str
-        The name of the file to be downloaded.
-    data_folder : str
-        The base folder where the local files are stored.
+        The name of the file to be loaded (should be a CSV or Excel file).
+    columns : List[str], optional
+        Only load these columns, "Name*" for all columns starting with "Name". Default: all columns.
+    schema : bool, optional
+        False to load the CSV file untyped, e.g. to store it again unchanged.
 
     Returns:
     -------
-    str
-        The local file path.
-
-    """
-
-    print("get file LOcally")
-    file_path = Path( data_folder) / version_name / file_name
-    try:
-        if not file_path.exists():
-            raise FileNotFoundError(f"The file {file_name} does not exist locally.")
-        
-        return str(file_path)  # Return the path if the file exists
-    
-    except FileNotFoundError as e:
-        print(e)  # Log or print the error
-        # Return None or a default value to indicate the file wasn't found
-        return None  # Or provide a fallback path if applicab
-
-def x_copy_files_local(selected_master_template: str, project_version: str):
-    """Copy CSV files locally."""
-    try:
-        base_dir = Path(__file__).parent.parent / "data" / selected_master_template
-        target_dir = Path(__file__).parent.parent / "data" / project_version
-        
-        # Ensure target directory exists
-        target_dir.mkdir(parents=True, exist_ok=True)
-
-        for file in base_dir.glob("*.csv"):
-            target_file = target_dir / file.name
-            target_file.write_text(file.read_text())
-            logger.info(f"Copied {file.name} to {target_dir}")
+    pd.DataFrame
+        The contents of the file as a Pandas DataFrame.
 
-    except Exception as e:
-        logger.error(f"Failed to copy files locally: {str(e)}")
-        raise
+    Raises:
+    -------
+    RuntimeError:
+        If the file cannot be loaded.
 
-def _copy_files_local(selected_master_template: str, project_version: str):
-    """Copy CSV, JPG, and PNG files locally."""
+    Example:
+    --------
+    df = load_file("v1", "example.csv")
+    languages_df = load_file("v1", "M_Attributes.csv", columns=['AttributeDescription*'])
+    """
     try:
-        base_dir = Path(__file__).parent.parent / "data" / selected_master_template
-        target_dir = Path(__file__).parent.parent / "data" / project_version
-        
-        # Ensure target directory exists
-        target_dir.mkdir(parents=True, exist_ok=True)
-
-        # Glob for CSV, JPG, and PNG files
-        for file in base_dir.glob("*.*"):
-            if file.suffix in ['.csv', '.jpg', '.png']:
-                target_file = target_dir / file.name
-                target_file.write_bytes(file.read_bytes())  # Use read_bytes for binary files (images)
-                logger.info(f"Copied {file.name} to {target_dir}")
-
+        return _load_dataframe(version_name, file_name, columns, schema)[0]
     except Exception as e:
-        logger.error(f"Failed to copy files locally: {str(e)}")
-        raise
-
-
+        raise RuntimeError(f"Failed to load file {file_name} from {version_name}: {str(e)}")
 
-def _copy_files_azure(selected_master_template: str, project_version: str):
-    """Copy CSV, JPG and PNG files in Azure Blob Storage."""
-    try:
-        blob_service_client = _azure_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
+@instrument_storage('load_bytes', _file_target, _measure_load_bytes, _backend_name)
+def load_bytes(version_name: str, file_name: str) -> bytes:
+    """
+    Loads the raw content of a file from the configured storage backend.
 
-        blobs = container_client.list_blobs(name_starts_with=f"{selected_master_template}/")
+    Parameters:
+    ----------
+    version_name : str
+        The name of the version or folder where the file is located.
+    file_name : str
+        The name of the file.
 
-        for blob in blobs:
-            if blob.name.endswith(('.csv', '.jpg', '.png')):
-                # Copy each CSV file to the target directory
-                source_blob = blob.name
-                target_blob = f"{project_version}/{blob.name.split('/')[-1]}"
-                blob_client = container_client.get_blob_client(target_blob)
+    Returns:
+    -------
+    bytes
+        The unparsed file content.
 
-                # Download the source blob
-                download_stream = container_client.get_blob_client(source_blob).download_blob().readall()
+    Raises:
+    -------
+    FileNotFoundError:
+        If the file does not exist.
+    """
+    return get_backend().read_bytes(version_name, file_name)
 
-                # Upload to the target location
-                blob_client.upload_blob(download_stream, overwrite=True)
-                logger.info(f"Copied {blob.name} to {target_blob}")
 
-    except AzureError as e:
-        logger.error(f"Azure error while copying files: {str(e)}")
-        raise
-    except ResourceExistsError as e:
-        logger.warning(f"File already exists: {str(e)}")
-    except Exception as e:
-        logger.error(f"Unexpected error during file copy in Azure: {str(e)}")
-        raise
+@instrument_storage('stat_file', _file_target, backend=_backend_name)
+def stat_file(version_name: str, file_name: str) -> Dict:
+    """
+    Returns the metadata of a file without downloading it, to decide whether a cached copy is still valid.
 
-    
-def _azure_blob_service_client():
-    """Creates and returns an Azure Blob service client using account name and key."""
-    account_url = f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net"
-    return BlobServiceClient(account_url=account_url, credential=AZURE_ACCOUNT_KEY)
+    Parameters:
+    ----------
+    version_name : str
+        The name of the version or folder where the file is located.
+    file_name : str
+        The name of the file.
 
+    Returns:
+    -------
+    Dict
+        `name`, `size` (bytes), `modified` (ISO timestamp), `etag` (changes with every write) and
+        `content_hash` ("md5:..." or "sha256:..."; None if the backend cannot tell without reading the file).
 
-def _create_azure_directory(version_name):
-    """Creates a directory in Azure Blob Storage."""
-    try:
-        blob_service_client = _azure_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-        blob_name = f"{version_name}/.folder"  # Empty blob acts as a folder
-        blob_client = container_client.get_blob_client(blob_name)
-        blob_client.upload_blob("", overwrite=True)
-        logger.info(f"Azure directory '{version_name}' created successfully.")
-        return True
-    except AzureError as e:
-        logger.error(f"Azure error: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        return False
+    Raises:
+    -------
+    FileNotFoundError:
+        If the file does not exist.
+    """
+    return get_backend().stat_file(version_name, file_name)
 
 
-def _create_local_directory(version_name):
-    """Creates a local directory for storing files."""
-    try:
-        data_dir = Path(__file__).parent.parent / "data" / version_name
-        data_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Local directory '{version_name}' created successfully.")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to create local directory: {str(e)}")
-        return False
+@instrument_storage('list_files', _version_target, backend=_backend_name)
+def list_files(version_name: str) -> List[Dict]:
+    """Returns the metadata (see stat_file) of all files of a version, sorted by name."""
+    return get_backend().list_files(version_name)
 
 
-def _upload_to_azure(file_content, version_name, file_name):
-    """Uploads a file to Azure Blob Storage."""
+def get_file_etag(version_name: str, file_name: str) -> Optional[str]:
+    """The ETag of a file as cache key, None if the file does not exist."""
     try:
-        blob_service_client = _azure_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-        blob_name = f"{version_name}/{file_name}"
-        blob_client = container_client.get_blob_client(blob_name)
-
-        if isinstance(file_content, str):
-            file_content = file_content.encode('utf-8')
+        return stat_file(version_name, file_name)['etag']
+    except FileNotFoundError:
+        return None
 
-        blob_client.upload_blob(file_content, overwrite=True)
-        return True
-    except AzureError as e:
-        logger.error(f"Azure error while saving file: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error while saving file: {str(e)}")
-        return False
 
+@instrument_storage('get_versions', _versions_target, backend=_backend_name)
+def get_versions(data_folder: Optional[Path] = None) -> List[str]:
+    """
+    Get a list of all the folders/versions.
 
-def _store_locally(file_content, version_name, file_name):
-    """Stores a file locally in the defined version directory."""
-    try:
-        data_dir = Path(__file__).parent.parent / "data" / version_name
-        file_path = data_dir / file_name
+    `data_folder` is only kept for the existing callers, the backend knows where its versions are.
+    """
+    return get_backend().list_versions()
 
-        if isinstance(file_content, bytes):
-            file_path.write_bytes(file_content)
-        else:
-            file_path.write_text(file_content, encoding='utf-8')
 
-        return True
-    except Exception as e:
-        logger.error(f"Failed to save file locally: {str(e)}")
-        return False
+def get_project_path(folder_name: str) -> Path:
+    """Get the appropriate project path based on the environment (local or Streamlit Cloud)."""
+    if folder_name == 'data' and os.getenv(DATA_DIR_ENV):
+        return get_data_folder()
+    if os.getenv('STREAMLIT_CLOUD'):
+        return Path('/mount/src/pragmatic_bim_requirements_manager') / folder_name
+    else:
+        return Path(__file__).parent.parent / folder_name
 
-import pandas as pd
-import io
 
-def _load_from_azure(folder_name: str, file_name: str) -> pd.DataFrame:
+@instrument_storage('copy_base_files', _copy_target, _measure_copy, _backend_name)
+def copy_base_files(selected_master_template: str, project_version: str):
     """
-    Reads a file from Azure Blob Storage and returns its contents as a Pandas DataFrame.
-
-    Parameters:
-    ----------
-    folder_name : str
-        The folder in the Azure Blob Storage container where the file is located.
-    file_name : str
-        The name of the file to be loaded from Azure Blob Storage.
-
-    Returns:
-    -------
-    pd.DataFrame
-        The contents of the file as a Pandas DataFrame.
-
-    Raises:
-    -------
-    ValueError:
-        If the file extension is not supported.
+    Copy all CSV files (and the element images) from the selected master template to the project version folder.
+    Returns the number of copied bytes.
     """
+    backend = get_backend()
+    backend.create_folder(project_version)
+
     try:
-        # Create Blob service client
-        blob_service_client = _azure_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-        blob_name = f"{folder_name}/{file_name}"
-        blob_client = container_client.get_blob_client(blob_name)
-        
-        download_stream = blob_client.download_blob().readall()
-
-        if file_name.endswith('.csv'):
-            return pd.read_csv(io.BytesIO(download_stream))
-        elif file_name.endswith('.xlsx'):
-            return pd.read_excel(io.BytesIO(download_stream))
-        else:
-            raise ValueError("Unsupported file type. Only .csv and .xlsx are supported.")
-    
+        return backend.copy_files(selected_master_template, project_version, BASE_FILE_SUFFIXES)
     except Exception as e:
-        raise RuntimeError(f"Error reading file from Azure Blob: {str(e)}")
-
+        logger.error(f"Failed to copy files: {str(e)}")
+        raise
 
-def _load_locally(version_name: str, file_name: str) -> pd.DataFrame:
+@instrument_storage('get_download_link', _download_link_target, backend=_backend_name)
+def get_download_link(version: str, file_name: str, data_folder: Optional[str] = None) -> Optional[str]:
     """
-    Loads a CSV or Excel file from the local filesystem and returns its contents as a Pandas DataFrame.
+    Generates a file path or URL to serve the file.
 
     Parameters:
     ----------
     version_name : str
         The name of the version or folder where the file is located.
     file_name : str
-        The name of the file to be loaded (should be a CSV or Excel file).
+        The name of the file to be downloaded.
+    data_folder : str
+        Only kept for the existing callers, the backend knows where its files are.
 
     Returns:
     -------
-    pd.DataFrame
-        The contents of the file as a Pandas DataFrame.
-
-    Raises:
-    -------
-    FileNotFoundError:
-        If the specified file does not exist.
-    ValueError:
-        If the file extension is not supported (only .csv and .xlsx).
-    RuntimeError:
-        For other errors encountered during file reading.
+    str
+        The local file path, a signed Azure URL or a data URI; None if the file does not exist.
 
-    Example:
-    --------
-    df = _load_locally("v1", "example.csv")
     """
-    try:
-        # Construct the file path
-        data_dir = Path(__file__).parent.parent / "data" / version_name
-        file_path = data_dir / file_name
-
-        # Check if the file exists
-        if not file_path.exists():
-            raise FileNotFoundError(f"The file {file_path} does not exist.")
-
-        # Read the file based on the file extension
-        if file_name.endswith('.csv'):
-            return pd.read_csv(file_path)
-        elif file_name.endswith('.xlsx'):
-            return pd.read_excel(file_path)
-        else:
-            raise ValueError("Unsupported file type. Only .csv and .xlsx are supported.")
-
-    except FileNotFoundError as fnf_error:
-        logger.error(f"File not found: {str(fnf_error)}")
-        raise
-    except ValueError as ve:
-        logger.error(f"ValueError: {str(ve)}")
-        raise
-    except Exception as e:
-        logger.error(f"Failed to load local file: {str(e)}")
-        raise RuntimeError(f"An error occurred while reading the file: {str(e)}")
-
+    download_url = get_backend().download_link(version, file_name)
+    if download_url is None:
+        logger.warning(f"The file {version}/{file_name} does not exist.")
+    return download_url
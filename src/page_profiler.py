@@ -0,0 +1,114 @@
+"""
+page_profiler.py
+
+Opt-in profiling of the Streamlit page reruns.
+
+Enabled with `PAGE_PROFILING: true` in config.yaml or the environment variable `PAGE_PROFILING=1`.
+A page starts a profiler at the beginning of `main()` and wraps its phases (data loading,
+filtering, rendering of a tab, ...) in `profile_phase(name)`. Repeated phases (e.g. the image
+link of every element) are summed up with their number of calls.
+
+At the end of the rerun `finish_page_profiling()`:
+- appends the sample as one JSON line to the log file (`PAGE_PROFILING_LOG`) for aggregation
+- shows a collapsible timing panel to logged in admins
+
+When profiling is disabled all functions are no-ops.
+
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+import streamlit as st
+
+from src.load_data import get_project_path
+from src.utils import load_config
+
+config = load_config()
+
+PAGE_PROFILING = os.getenv('PAGE_PROFILING', '').lower() in ('1', 'true') or config.get('PAGE_PROFILING', False)
+PAGE_PROFILING_LOG = config.get('PAGE_PROFILING_LOG', 'logs/page_profiling.jsonl')
+
+# Every session reruns its script in its own thread
+_current = threading.local()
+
+_log_lock = threading.Lock()
+
+
+class PageProfile:
+    """The phase timings of one rerun of a page."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.start = time.perf_counter()
+        self.phases: Dict[str, Dict] = {}
+
+    def add(self, name: str, seconds: float):
+        phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        phase['seconds'] += seconds
+        phase['calls'] += 1
+
+    def sample(self) -> Dict:
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'page': self.page,
+            'total_seconds': round(time.perf_counter() - self.start, 4),
+            'phases': {name: {'seconds': round(phase['seconds'], 4), 'calls': phase['calls']}
+                       for name, phase in self.phases.items()},
+        }
+
+
+def start_page_profiling(page: str) -> Optional[PageProfile]:
+    """Starts the profile of the current rerun, returns None if profiling is disabled."""
+    _current.profile = PageProfile(page) if PAGE_PROFILING else None
+    return _current.profile
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """Times a phase of the current rerun."""
+    profile = getattr(_current, 'profile', None)
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+def _write_sample(sample: Dict):
+    log_path = get_project_path(PAGE_PROFILING_LOG)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with _log_lock, open(log_path, 'a', encoding='utf-8') as log_file:
+        log_file.write(json.dumps(sample) + '\n')
+
+
+def _render_timing_panel(sample: Dict):
+    phases_df = pd.DataFrame([
+        {'Phase': name, 'Seconds': phase['seconds'], 'Calls': phase['calls']}
+        for name, phase in sample['phases'].items()
+    ])
+    with st.expander(f"Timing of this rerun: {sample['total_seconds']:.3f}s"):
+        st.dataframe(phases_df, hide_index=True, use_container_width=True)
+
+
+def finish_page_profiling():
+    """Logs the sample of the current rerun and shows the timing panel to admins."""
+    profile = getattr(_current, 'profile', None)
+    if profile is None:
+        return
+    _current.profile = None
+
+    sample = profile.sample()
+    _write_sample(sample)
+    if st.session_state.get('password_correct', False):
+        _render_timing_panel(sample)
@@ -0,0 +1,116 @@
+"""
+parallel_export.py
+
+Runs the per-language export steps (Elementplan, Libal config) in a process pool. The same
+mechanism builds the projects of the bulk project generation (see bulk_projects.py).
+
+Every language produces an independent workbook, so the CPU-bound xlsxwriter work can be
+fanned out across processes. The shared, already phase-exploded and sorted DataFrame is
+handed to every worker process exactly once through the pool initializer instead of being
+pickled again for every language.
+
+The number of worker processes is defined by `EXPORT_MAX_WORKERS` in `config.yaml`:
+- 0 uses one process per CPU (capped by the number of languages)
+- 1 runs the export serially in the current process
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional
+
+import pandas as pd
+
+from src import storage_metrics
+from src.instrumentation import collect, merge_records
+from src.utils import load_config
+
+config = load_config()
+
+EXPORT_MAX_WORKERS = config.get('EXPORT_MAX_WORKERS', 0)
+
+_shared_df = None
+
+
+def _init_worker(df: pd.DataFrame):
+    """Stores the shared DataFrame once per worker process."""
+    global _shared_df
+    _shared_df = df
+
+
+def _run_with_shared_df(func: Callable, item: Any, args: tuple):
+    """Runs one task and returns its result with the storage records and counters of the worker."""
+    with collect() as records:
+        result = func(_shared_df, item, *args)
+    return result, records, storage_metrics.take()
+
+
+def get_max_workers(max_workers: Optional[int] = None, tasks: int = 1) -> int:
+    """
+    Resolves the number of worker processes for a given number of tasks.
+
+    Parameters:
+    max_workers (int): Explicit number of workers, falls back to `EXPORT_MAX_WORKERS` if None.
+    tasks (int): Number of independent tasks to run.
+
+    Returns:
+    int: The number of worker processes to use (at least 1).
+    """
+    if max_workers is None:
+        max_workers = EXPORT_MAX_WORKERS
+    if not max_workers or max_workers < 1:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, tasks))
+
+
+def run_tasks(func: Callable, df: pd.DataFrame, items: List, *args, max_workers: Optional[int] = None,
+              progress_callback: Optional[Callable] = None) -> List:
+    """
+    Calls `func(df, item, *args)` for every item, in parallel where possible.
+
+    Parameters:
+    func (Callable): A module level function (it has to be picklable).
+    df (pd.DataFrame): The shared DataFrame, passed once to every worker process.
+    items (List): One task per item, e.g. the languages to export.
+    *args: Additional arguments passed to every call.
+    max_workers (int): Number of worker processes, see `get_max_workers`.
+    progress_callback (Callable): Called as `progress_callback(completed, total, item, result)`
+                                  whenever a task finishes.
+
+    Returns:
+    List: The results of `func` in the order of `items`.
+    """
+    workers = get_max_workers(max_workers, len(items))
+    results = [None] * len(items)
+
+    if workers == 1:
+        for index, item in enumerate(items):
+            results[index] = func(df, item, *args)
+            if progress_callback:
+                progress_callback(index + 1, len(items), item, results[index])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as executor:
+        futures = {
+            executor.submit(_run_with_shared_df, func, item, args): index
+            for index, item in enumerate(items)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index], records, counters = future.result()
+            merge_records(records)
+            storage_metrics.merge(counters)
+            if progress_callback:
+                progress_callback(completed, len(items), items[index], results[index])
+
+    return results
+
+
+def run_for_languages(func: Callable, df: pd.DataFrame, languages: List[str], *args, max_workers: Optional[int] = None) -> List:
+    """
+    Calls `func(df, language, *args)` for every language, in parallel where possible.
+
+    Returns:
+    List: The results of `func` in the order of `languages`.
+    """
+    return run_tasks(func, df, languages, *args, max_workers=max_workers)
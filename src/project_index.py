@@ -0,0 +1,159 @@
+"""
+project_index.py
+
+An index describing every built version, so the admin overview and impact analyses do not have
+to load the files of every version:
+- the master template a project was created from (projects are named `{master}-P-{project}`)
+- the selected workflow codes and the languages of the exports
+- the build timestamp, the hashes of the inputs (see build_manifest.py) and of the outputs
+
+Every version has its own small entry file (`.index/projects/{version}.json` in the storage),
+written at the end of its build and merged with the others when the index is read. Builds running
+at the same time (job runner, bulk project builds) never write the same file, so no entry can get
+lost. An entry read while its build writes it is left out of that read.
+
+Output hashes are the content hashes known to the storage backend (Azure: MD5) or, if it knows
+none, the ETags; both change whenever an output is written.
+
+"""
+
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.build_manifest import MANIFEST_FILE, VERSION_INPUT_FILES, load_manifest
+from src.load_data import create_storage_folder, get_versions, list_files, load_bytes, load_file, store_file
+
+logger = logging.getLogger(__name__)
+
+INDEX_FOLDER = '.index/projects'
+
+PROJECT_SEPARATOR = '-P-'
+
+# Entry files read at the same time (one request each on Azure)
+_READ_WORKERS = 8
+
+_EXPORT_PATTERN = re.compile(r'^Elementplan_(?P<language>[A-Z]{2})_')
+
+
+def get_master_version(version: str) -> Optional[str]:
+    """The master template of a project, None for master templates."""
+    return version.split(PROJECT_SEPARATOR)[0] if PROJECT_SEPARATOR in version else None
+
+
+def get_selected_workflows(version: str) -> List[str]:
+    """The codes of the selected workflows (all if the file has no Selected column)."""
+    df = load_file(version, 'M_Workflows.csv', columns=['WorkflowCode', 'Selected'], schema=False)
+    if 'Selected' in df.columns:
+        df = df[df['Selected'].astype(str).str.lower() == 'true']
+    return df['WorkflowCode'].dropna().astype(str).tolist()
+
+
+def build_entry(version: str, master_or_project: str, manifest: Optional[Dict] = None) -> Dict:
+    """
+    The index entry of a built version.
+
+    Parameters:
+    version (str): The version.
+    master_or_project (str): "M" for Master, "P" for Project.
+    manifest (Dict): The manifest of the build, loaded if not given.
+    """
+    manifest = manifest or load_manifest(version) or {}
+    files = list_files(version)
+    inputs = manifest.get('inputs', {})
+    try:
+        workflows = get_selected_workflows(version)
+    except RuntimeError:
+        workflows = []
+
+    return {
+        'version': version,
+        'master_or_project': master_or_project,
+        'master': get_master_version(version),
+        'workflows': workflows,
+        'languages': sorted({match['language'] for match in (_EXPORT_PATTERN.match(info['name']) for info in files) if match}),
+        'built': manifest.get('built'),
+        'inputs': {file_name: inputs.get(file_name) for file_name in VERSION_INPUT_FILES},
+        'outputs': {
+            info['name']: info['content_hash'] or info['etag']
+            for info in files
+            if info['name'] not in VERSION_INPUT_FILES and info['name'] != MANIFEST_FILE
+        },
+    }
+
+
+def _entry_file_name(version: str) -> str:
+    return f'{version}.json'
+
+
+def _load_entry(file_name: str) -> Optional[Dict]:
+    try:
+        return json.loads(load_bytes(INDEX_FOLDER, file_name))
+    except (FileNotFoundError, ValueError) as e:
+        # Removed or being written right now, the other entries are still valid
+        logger.warning(f"Skipped project index entry {file_name}: {e}")
+        return None
+
+
+def load_project_index() -> Optional[Dict[str, Dict]]:
+    """The index by version, None if no entry was ever written."""
+    try:
+        files = [info['name'] for info in list_files(INDEX_FOLDER) if info['name'].endswith('.json')]
+    except FileNotFoundError:
+        return None
+    if not files:
+        return None
+
+    with ThreadPoolExecutor(max_workers=_READ_WORKERS) as executor:
+        entries = list(executor.map(_load_entry, files))
+    return {entry['version']: entry for entry in entries if entry is not None}
+
+
+def _store_entry(entry: Dict) -> None:
+    create_storage_folder(INDEX_FOLDER)
+    store_file(json.dumps(entry, ensure_ascii=False, indent=1), INDEX_FOLDER, _entry_file_name(entry['version']))
+
+
+def update_project_index(version: str, master_or_project: str, manifest: Optional[Dict] = None) -> Dict:
+    """Writes the entry of a version after its build, returns the entry."""
+    entry = build_entry(version, master_or_project, manifest)
+    _store_entry(entry)
+    return entry
+
+
+def rebuild_project_index() -> Dict[str, Dict]:
+    """Writes the entries of all built versions (those with a build manifest), e.g. for versions built before the index existed."""
+    versions = {}
+    for version in get_versions() or []:
+        manifest = load_manifest(version)
+        if manifest is not None:
+            versions[version] = build_entry(version, manifest.get('master_or_project'), manifest)
+            _store_entry(versions[version])
+    return versions
+
+
+def get_project_overview(versions: Dict[str, Dict]) -> pd.DataFrame:
+    """One row per version of the index, projects below their master template."""
+    overview = pd.DataFrame([{
+        'Version': entry['version'],
+        'Master Template': entry['master'] or entry['version'],
+        'Type': 'Project' if entry['master_or_project'] == 'P' else 'Master',
+        'Workflows': ", ".join(entry['workflows']),
+        'Languages': ", ".join(entry['languages']),
+        'Built': entry['built'],
+    } for entry in versions.values()], columns=['Version', 'Master Template', 'Type', 'Workflows', 'Languages', 'Built'])
+    return overview.sort_values(['Master Template', 'Type', 'Version'], ignore_index=True)
+
+
+def get_projects_of_master(versions: Dict[str, Dict], master_version: str) -> List[str]:
+    """The projects of the index created from a master template."""
+    return sorted(version for version, entry in versions.items() if entry['master'] == master_version)
+
+
+def get_projects_using_workflow(versions: Dict[str, Dict], workflow_code: str) -> List[str]:
+    """The projects of the index with the workflow selected."""
+    return sorted(version for version, entry in versions.items() if entry['master'] and workflow_code in entry['workflows'])
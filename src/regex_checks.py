@@ -0,0 +1,171 @@
+"""
+regex_checks.py
+
+The `RegexCheck*` columns of the attributes: per attribute and language a regular expression the
+values of the attribute must match, e.g. "^(True|False)$". The `AllowedValues*` column of the same
+language lists the allowed or example values ("True, False"), every one of them must match.
+
+- `compile_pattern` compiles a pattern once, the compiled patterns (and the errors of invalid ones)
+  are kept in a bounded LRU cache (`REGEX_CACHE_SIZE` in config.yaml).
+- `check_allowed_values` checks the whole catalogue in one pass: every distinct pair of pattern and
+  allowed values is checked once, however many attributes share it.
+- `create_regex_checks` stores the checks of a version as `regex_checks.json` (build stage). Other
+  tools (IDS export, model checkers) load them with `load_regex_checks` and get the compiled
+  patterns per attribute and language, every distinct pattern is compiled once.
+
+A value matches if the whole value matches the pattern (`re.fullmatch`), as in IDS/XSD patterns.
+
+"""
+
+import csv
+import functools
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.instrumentation import add_rows_out
+from src.load_data import load_bytes, load_file, store_file
+from src.utils import load_config
+
+config = load_config()
+
+# Number of compiled patterns kept in memory
+REGEX_CACHE_SIZE = config.get('REGEX_CACHE_SIZE') or 1024
+
+REGEX_PREFIX = 'RegexCheck'
+ALLOWED_VALUES_PREFIX = 'AllowedValues'
+ID_COLUMN = 'AttributeID'
+
+REGEX_CHECKS_FILE = 'regex_checks.json'
+
+
+@functools.lru_cache(maxsize=REGEX_CACHE_SIZE)
+def _compile(pattern: str) -> Tuple[Optional[re.Pattern], Optional[str]]:
+    # Invalid patterns are cached as well, their error message instead of the compiled pattern
+    try:
+        return re.compile(pattern), None
+    except re.error as e:
+        return None, str(e)
+
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """The compiled pattern, raises re.error if the pattern is invalid."""
+    compiled, error = _compile(pattern)
+    if error is not None:
+        raise re.error(error)
+    return compiled
+
+
+def get_pattern_error(pattern: str) -> Optional[str]:
+    """None if the pattern compiles, else the error message."""
+    return _compile(pattern)[1]
+
+
+def split_allowed_values(value: str) -> List[str]:
+    """The values of an `AllowedValues` cell: "True, False" -> ["True", "False"], quoted values may contain commas."""
+    values = next(csv.reader([value], skipinitialspace=True)) if '"' in value else value.split(',')
+    return [value.strip() for value in values if value.strip()]
+
+
+def get_languages(columns: List[str]) -> List[str]:
+    """The languages with a `RegexCheck` column, e.g. ['DE', 'EN']. The unsuffixed column has the language ''."""
+    return [column[len(REGEX_PREFIX):] for column in columns if column.startswith(REGEX_PREFIX)]
+
+
+def _check_pair(pattern: str, allowed_values: Optional[str]) -> Dict:
+    error = get_pattern_error(pattern)
+    if error is not None or not isinstance(allowed_values, str):
+        return {'error': error, 'invalid_values': []}
+    compiled = _compile(pattern)[0]
+    return {'error': None, 'invalid_values': [value for value in split_allowed_values(allowed_values) if not compiled.fullmatch(value)]}
+
+
+def check_allowed_values(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Checks the patterns and the allowed values of all attributes and languages.
+
+    Parameters:
+    df (pd.DataFrame): The attributes (M_Attributes.csv), untyped.
+
+    Returns:
+    pd.DataFrame: One row per attribute and language with an invalid pattern or values that do not
+                  match it. Columns: row (index in df), language, pattern, error, invalid_values.
+    """
+    results = []
+    for language in get_languages(df.columns):
+        regex_column = f'{REGEX_PREFIX}{language}'
+        allowed_column = f'{ALLOWED_VALUES_PREFIX}{language}'
+        pairs = pd.DataFrame({
+            'pattern': df[regex_column],
+            'allowed_values': df[allowed_column] if allowed_column in df.columns else None,
+        })
+        pairs = pairs[pairs['pattern'].notna() & (pairs['pattern'].astype(str).str.strip() != '')]
+        pairs['pattern'] = pairs['pattern'].astype(str)
+
+        distinct = pairs.drop_duplicates()
+        checked = pd.DataFrame(
+            [_check_pair(pattern, allowed_values) for pattern, allowed_values in distinct.itertuples(index=False)],
+            columns=['error', 'invalid_values'],
+        )
+        checked = pd.concat([distinct.reset_index(drop=True), checked], axis=1)
+        checked = checked[checked['error'].notna() | checked['invalid_values'].str.len().gt(0)]
+        if checked.empty:
+            continue
+
+        failed = pairs.reset_index(names='row').merge(checked, on=['pattern', 'allowed_values'])
+        failed['language'] = language
+        results.append(failed[['row', 'language', 'pattern', 'error', 'invalid_values']])
+
+    if not results:
+        return pd.DataFrame(columns=['row', 'language', 'pattern', 'error', 'invalid_values'])
+    return pd.concat(results, ignore_index=True).sort_values(['row', 'language'], ignore_index=True)
+
+
+def build_regex_checks(df: pd.DataFrame) -> Dict:
+    """
+    The checks of the attributes as stored in `regex_checks.json`:
+        {'patterns': [{'pattern': str, 'error': str | None}, ...],
+         'attributes': {AttributeID: {language: index in patterns}}}
+    """
+    patterns = {}
+    attributes = {}
+    for language in get_languages(df.columns):
+        column = df[f'{REGEX_PREFIX}{language}']
+        valid = column.notna() & (column.astype(str).str.strip() != '') & df[ID_COLUMN].notna()
+        for attribute_id, pattern in zip(df.loc[valid, ID_COLUMN].astype(str), column[valid].astype(str)):
+            index = patterns.setdefault(pattern, len(patterns))
+            attributes.setdefault(attribute_id, {})[language] = index
+
+    return {
+        'patterns': [{'pattern': pattern, 'error': get_pattern_error(pattern)} for pattern in patterns],
+        'attributes': attributes,
+    }
+
+
+def create_regex_checks(version: str) -> Dict:
+    """Stores `regex_checks.json` of a version, see `build_regex_checks`."""
+    df = load_file(version, 'M_Attributes.csv', columns=[ID_COLUMN, f'{REGEX_PREFIX}*'], schema=False)
+    checks = build_regex_checks(df)
+    store_file(json.dumps(checks, ensure_ascii=False), version, REGEX_CHECKS_FILE)
+    add_rows_out(len(checks['attributes']))
+    return checks
+
+
+def load_regex_checks(version: str) -> Dict[str, Dict[str, re.Pattern]]:
+    """
+    The compiled patterns of a version by AttributeID and language, invalid patterns are left out.
+    Versions built before `regex_checks.json` existed are read from their M_Attributes.csv.
+    """
+    try:
+        checks = json.loads(load_bytes(version, REGEX_CHECKS_FILE))
+    except FileNotFoundError:
+        df = load_file(version, 'M_Attributes.csv', columns=[ID_COLUMN, f'{REGEX_PREFIX}*'], schema=False)
+        checks = build_regex_checks(df)
+
+    compiled = [None if entry['error'] else compile_pattern(entry['pattern']) for entry in checks['patterns']]
+    return {
+        attribute_id: {language: compiled[index] for language, index in languages.items() if compiled[index] is not None}
+        for attribute_id, languages in checks['attributes'].items()
+    }
@@ -0,0 +1,88 @@
+"""
+requirements_data.py
+
+Data preparation of the requirements page (pages/1_requirements.py), without any Streamlit calls,
+so it can be tested and benchmarked on its own.
+
+Flow of the page:
+1. `filter_columns_by_language` keeps the common and the language specific columns.
+2. `filter_by_project_phases` keeps the requirements of the selected project phases (the page
+   filters by all its sidebar filters at once with the bitmaps of facet_index.py).
+3. `sort_dataframe` (sort.py) brings them in the order of models, elements and attributes.
+4. `split_by_model_and_element` groups them into the model tabs and the element sections.
+
+"""
+
+from typing import List, Tuple
+
+import pandas as pd
+
+from src.sort import SORT_RANK_COLUMN, sort_dataframe
+
+
+COMMON_COLUMNS = [
+    'AttributeID', 'AttributeName', 'SortAttribute', 'Pset', 'DataTyp', 'Unit',
+    'IFC2x3', 'IFC4', 'IFC4.3', 'Applicability', 'ElementID', 'ModelID',
+    'WorkflowID', 'SortElement', 'IfcEntityIfc4.0Name', 'SortModels', 'Status', 'ImageName',
+]
+
+
+def filter_columns_by_language(df: pd.DataFrame, language_suffix: str) -> pd.DataFrame:
+    language_specific_columns = [col for col in df.columns if col.endswith(language_suffix)]
+    columns_to_keep = COMMON_COLUMNS + language_specific_columns
+    # Web data built before the SortRank existed is sorted by its sort columns (see sort.is_sorted)
+    if SORT_RANK_COLUMN in df.columns:
+        columns_to_keep.append(SORT_RANK_COLUMN)
+    return df[columns_to_keep]
+
+
+def _split_phases(phases: str) -> List[str]:
+    return [phase.strip() for phase in phases.split(',')]
+
+
+def get_project_phases(data: pd.DataFrame, language_suffix: str) -> List[str]:
+    """Returns all project phases used in the comma separated `ProjectPhase{language}` column."""
+    all_phases = set()
+    for phases in data[f'ProjectPhase{language_suffix}'].dropna():
+        all_phases.update(_split_phases(phases))
+    return sorted(all_phases)
+
+
+def filter_by_project_phases(data: pd.DataFrame, language_suffix: str, selected_phases: List[str]) -> pd.DataFrame:
+    """Keeps the rows assigned to at least one of the selected phases (all rows if none is selected)."""
+    if not selected_phases:
+        return data
+
+    mask = data[f'ProjectPhase{language_suffix}'].fillna('').apply(
+        lambda x: any(phase in _split_phases(x) for phase in selected_phases)
+    )
+    return data[mask]
+
+
+def prepare_requirements_data(data: pd.DataFrame, language_suffix: str, selected_phases: List[str] = None) -> pd.DataFrame:
+    """Runs steps 1-3 of the page: language columns, phase filter and sorting."""
+    data = filter_columns_by_language(data, language_suffix)
+    if f'ProjectPhase{language_suffix}' in data.columns:
+        data = filter_by_project_phases(data, language_suffix, selected_phases)
+    return sort_dataframe(data)
+
+
+def split_by_model_and_element(data: pd.DataFrame, language_suffix: str) -> List[Tuple[str, pd.DataFrame, List[Tuple[str, pd.DataFrame]]]]:
+    """
+    Groups the sorted requirements by model (the tabs of the page) and element.
+
+    Returns:
+    List: `(model_name, model_df, [(element_name, element_df), ...])` in the order of the data.
+    """
+    model_column = f'ModelName{language_suffix}'
+    element_column = f'ElementName{language_suffix}'
+
+    models = []
+    for model_name in data[model_column].dropna().unique():
+        model_df = data[data[model_column] == model_name]
+        elements = [
+            (element_name, model_df[model_df[element_column] == element_name])
+            for element_name in model_df[element_column].dropna().unique()
+        ]
+        models.append((model_name, model_df, elements))
+    return models
@@ -0,0 +1,255 @@
+"""
+search_index.py
+
+Full-text search over the requirements of the web page (pages/1_requirements.py).
+
+The build writes one inverted index per language next to `data_for_web.csv`
+(`search_index_{language}.npz`). It maps every term to the rows of `data_for_web.csv` containing
+it, with a score per row, so a search only looks up the terms of the query and never scans the
+requirements themselves.
+
+Searched columns and their weights (`SEARCH_FIELDS`): element and attribute names count more than
+the descriptions. Terms are the lower case words of a cell, CamelCase and snake_case names are
+also split into their parts ("Pset_WallCommon" -> pset, wallcommon, wall, common).
+
+Score of a row for a term: sum of the field weights of its occurrences times the inverse document
+frequency `log(1 + rows / rows with the term)`. A query matches the rows containing all its words,
+the last word also as prefix (search as you type). Rows are ranked by the sum of their scores.
+
+Layout of the file (sorted terms, so a prefix is one range of terms and of postings):
+- `terms`: the sorted terms
+- `offsets`: the postings of `terms[i]` are `rows[offsets[i]:offsets[i + 1]]`
+- `rows` / `scores`: row numbers in `data_for_web.csv` and their scores
+
+"""
+
+import io
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import add_rows_out
+from src.load_data import load_bytes, load_file, store_file
+
+# Searched columns with their weight, "{language}" is replaced by the language suffix
+SEARCH_FIELDS = {
+    'ElementName{language}': 3.0,
+    'AttributeName': 3.0,
+    'IfcEntityIfc4.0Name': 2.0,
+    'Pset': 2.0,
+    'ElementDescription{language}': 1.0,
+    'AttributeDescription{language}': 1.0,
+}
+
+LANGUAGE_COLUMN = 'ElementName'
+SEARCH_INDEX_FILE = 'search_index_{language}.npz'
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def _split_word(word: str) -> List[str]:
+    # "IfcWallStandardCase" -> Ifc, Wall, Standard, Case; "IFCWall" -> IFC, Wall; "3D" -> 3, D
+    parts = []
+    start = 0
+    for position in range(1, len(word)):
+        previous, char = word[position - 1], word[position]
+        if ((previous.islower() and char.isupper())
+                or previous.isdigit() != char.isdigit()
+                or (previous.isupper() and char.isupper() and word[position + 1:position + 2].islower())):
+            parts.append(word[start:position])
+            start = position
+    parts.append(word[start:])
+    return parts
+
+
+def tokenize(text: str) -> List[str]:
+    """The terms of a cell, words split at CamelCase and snake_case are added as well."""
+    terms = []
+    for word in _WORD.findall(text):
+        terms.append(word.lower())
+        # Most words are lower case or capitalized and have no parts
+        if word[1:].islower() or word.isdigit():
+            continue
+        parts = _split_word(word)
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    return terms
+
+
+def tokenize_query(query: str) -> List[str]:
+    """The lower case words of a query."""
+    return [word.lower() for word in _WORD.findall(query)]
+
+
+def get_search_languages(columns: List[str]) -> List[str]:
+    """The languages of the web data, e.g. ['DE', 'EN'], from its `ElementName*` columns."""
+    return [column[len(LANGUAGE_COLUMN):] for column in columns if column.startswith(LANGUAGE_COLUMN)]
+
+
+def _field_postings(column: pd.Series, vocabulary: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Every distinct cell is tokenized once, its terms are repeated for all rows with this cell
+    codes, values = pd.factorize(column)
+    cell_codes = []
+    term_ids = []
+    for code, value in enumerate(values):
+        for term in tokenize(str(value)):
+            cell_codes.append(code)
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+    cell_codes = np.array(cell_codes, dtype=np.int64)
+
+    # The rows grouped by cell, rows of a cell are `cell_rows[cell_starts[code]:][:cell_counts[code]]`
+    cell_rows = np.argsort(codes, kind='stable')[int((codes < 0).sum()):]
+    cell_counts = np.bincount(codes[codes >= 0], minlength=len(values))
+    cell_starts = np.concatenate([[0], np.cumsum(cell_counts)[:-1]])
+
+    repeats = cell_counts[cell_codes]
+    pair = np.repeat(np.arange(len(cell_codes)), repeats)
+    within = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    return np.array(term_ids, dtype=np.int64)[pair], cell_rows[cell_starts[cell_codes][pair] + within]
+
+
+def build_search_index(df: pd.DataFrame, language: str) -> Dict[str, np.ndarray]:
+    """
+    The search index of the web data in one language.
+
+    Parameters:
+    df (pd.DataFrame): The web data (data_for_web.csv), rows in the order of the file.
+    language (str): The language suffix, e.g. 'DE'.
+
+    Returns:
+    Dict: 'terms', 'offsets', 'rows' and 'scores', see the module docstring.
+    """
+    vocabulary = {}
+    term_ids = [np.array([], dtype=np.int64)]
+    rows = [np.array([], dtype=np.int64)]
+    weights = [np.array([], dtype=np.float64)]
+    for field, weight in SEARCH_FIELDS.items():
+        column = field.format(language=language)
+        if column in df.columns:
+            field_terms, field_rows = _field_postings(df[column], vocabulary)
+            term_ids.append(field_terms)
+            rows.append(field_rows)
+            weights.append(np.full(len(field_rows), weight))
+
+    # One posting per term (in alphabetical order) and row, the weights of its occurrences summed up
+    terms = np.array(list(vocabulary), dtype=str)
+    order = np.argsort(terms)
+    rank = np.empty(len(terms), dtype=np.int64)
+    rank[order] = np.arange(len(terms))
+    row_count = max(len(df), 1)
+    keys, positions = np.unique(rank[np.concatenate(term_ids)] * row_count + np.concatenate(rows), return_inverse=True)
+    posting_weights = np.bincount(positions, weights=np.concatenate(weights), minlength=len(keys))
+
+    counts = np.bincount(keys // row_count, minlength=len(terms))
+    idf = np.log1p(row_count / np.maximum(counts, 1))
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return {
+        'terms': terms[order],
+        'offsets': offsets,
+        'rows': (keys % row_count).astype(np.int32),
+        'scores': (posting_weights * np.repeat(idf, counts)).astype(np.float32),
+    }
+
+
+def _index_file_name(language: str) -> str:
+    return SEARCH_INDEX_FILE.format(language=language)
+
+
+def create_search_index(version: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Stores the search index of every language of `data_for_web.csv`, returns the indexes by language."""
+    df = load_file(version, 'data_for_web.csv', schema=False)
+    indexes = {}
+    for language in get_search_languages(df.columns):
+        indexes[language] = build_search_index(df, language)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **indexes[language])
+        store_file(buffer.getvalue(), version, _index_file_name(language))
+    add_rows_out(sum(len(index['terms']) for index in indexes.values()))
+    return indexes
+
+
+def load_search_index(version: str, language: str) -> Optional[Dict[str, np.ndarray]]:
+    """The stored search index of a version and language, None if the version has none (built before)."""
+    try:
+        content = load_bytes(version, _index_file_name(language))
+    except FileNotFoundError:
+        return None
+
+    with np.load(io.BytesIO(content), allow_pickle=False) as arrays:
+        return {name: arrays[name] for name in ('terms', 'offsets', 'rows', 'scores')}
+
+
+def get_search_index(version: str, language: str) -> Dict[str, np.ndarray]:
+    """The stored index of a version, built from `data_for_web.csv` if the version was built before the index existed."""
+    index = load_search_index(version, language)
+    if index is None:
+        index = build_search_index(load_file(version, 'data_for_web.csv', schema=False), language)
+    return index
+
+
+def _term_range(terms: np.ndarray, term: str, prefix: bool) -> Tuple[int, int]:
+    start = int(np.searchsorted(terms, term, side='left'))
+    if not prefix:
+        return start, start + int(start < len(terms) and terms[start] == term)
+    # All terms starting with `term` sort before term + the highest character
+    return start, int(np.searchsorted(terms, term + '\U0010ffff', side='left'))
+
+
+def _match(index: Dict[str, np.ndarray], term: str, prefix: bool) -> Tuple[np.ndarray, np.ndarray]:
+    # The rows containing the term (or a term with this prefix) and their best score
+    start, end = _term_range(index['terms'], term, prefix)
+    offsets = index['offsets']
+    if end - start <= 1:
+        return index['rows'][offsets[start]:offsets[end]], index['scores'][offsets[start]:offsets[end]]
+
+    # The rows of a term are unique, so the best scores of all terms are collected without sorting
+    best = np.zeros(int(index['rows'][offsets[start]:offsets[end]].max()) + 1, dtype=np.float32)
+    for position in range(start, end):
+        rows = index['rows'][offsets[position]:offsets[position + 1]]
+        best[rows] = np.maximum(best[rows], index['scores'][offsets[position]:offsets[position + 1]])
+    rows = np.flatnonzero(best).astype(np.int32)
+    return rows, best[rows]
+
+
+def search(index: Dict[str, np.ndarray], query: str, limit: Optional[int] = 50,
+           rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Searches the requirements.
+
+    Parameters:
+    index (Dict): The search index of a language, see `build_search_index`.
+    query (str): The words to search, the last one also as prefix of longer words.
+    limit (int): Maximum number of hits, None for all.
+    rows (np.ndarray): Only search these rows of the web data, e.g. those of the selected project phases.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: The rows of the hits in `data_for_web.csv` and their scores,
+                                   best first (rows with equal scores in the order of the file).
+    """
+    terms = tokenize_query(query)
+    if not terms:
+        return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+
+    hits, scores = _match(index, terms[-1], prefix=True)
+    for term in dict.fromkeys(terms[:-1]):
+        if len(hits) == 0:
+            break
+        term_hits, term_scores = _match(index, term, prefix=False)
+        hits, positions, term_positions = np.intersect1d(hits, term_hits, assume_unique=True, return_indices=True)
+        scores = scores[positions] + term_scores[term_positions]
+
+    if rows is not None:
+        selected = np.isin(hits, rows)
+        hits, scores = hits[selected], scores[selected]
+
+    if limit is not None and len(hits) > limit:
+        # Only the hits scoring at least as the last one shown are sorted (with all its ties)
+        selected = scores >= np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        hits, scores = hits[selected], scores[selected]
+    order = np.lexsort((hits, -scores))[:limit]
+    return hits[order], scores[order]
+
@@ -1,17 +1,86 @@
+"""
+sort.py
+
+Sorting of the Element Plan data by model, element and attribute.
+
+The import step coerces the sort keys to numeric once (`coerce_sort_columns`), sorts the data
+and stores the resulting order in the `SortRank` column. All later consumers (exports, web data,
+requirements page) call `sort_dataframe`, which detects already sorted input and returns it
+unchanged without copying.
+
+"""
+
+import numpy as np
 import pandas as pd
 
+SORT_COLUMNS = ['SortModels', 'SortElement', 'SortAttribute']
+SORT_RANK_COLUMN = 'SortRank'
+
+
 def _convert_to_numeric(x):
     if pd.api.types.is_numeric_dtype(x):
         return x
-    return pd.to_numeric(x.str.replace(',', '.'), errors='coerce')
+    return pd.to_numeric(x.astype(str).str.replace(',', '.'), errors='coerce')
+
+
+def coerce_sort_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the sort columns to numeric in place ("1,5" -> 1.5) and returns the DataFrame."""
+    for col in SORT_COLUMNS:
+        if col in df.columns:
+            df[col] = _convert_to_numeric(df[col])
+    return df
+
+
+def _is_lexsorted(keys) -> bool:
+    """Checks in one vectorized pass whether the rows are ordered by the keys (NaN last)."""
+    ordered = np.ones(max(len(keys[0]) - 1, 0), dtype=bool)
+    tied = np.ones_like(ordered)
+    for key in keys:
+        values = np.nan_to_num(np.asarray(key, dtype=float), nan=np.inf)
+        previous, current = values[:-1], values[1:]
+        ordered = np.where(tied, current >= previous, ordered)
+        tied = tied & (current == previous)
+    return bool(ordered.all())
+
+
+def is_sorted(df: pd.DataFrame) -> bool:
+    """
+    Returns True if the DataFrame is already in sort order.
+
+    Data produced by the import carries a `SortRank`; any row subset of it (filters keep
+    the order) is sorted if the rank is increasing.
+    """
+    if SORT_RANK_COLUMN in df.columns:
+        return df[SORT_RANK_COLUMN].is_monotonic_increasing
+    return _is_lexsorted([_convert_to_numeric(df[col]) for col in SORT_COLUMNS])
+
 
 def sort_dataframe(df):
-    # Convert sorting columns to numeric
-    for col in ['SortModels', 'SortElement', 'SortAttribute']:
-        df[col] = _convert_to_numeric(df[col])
-
-    # Sort by SortModels, then SortElement, then SortAttribute
-    df_sorted = df.sort_values(
-        by=['SortModels', 'SortElement', 'SortAttribute']
-    )
-    return df_sorted
\ No newline at end of file
+    """
+    Sorts by SortModels, then SortElement, then SortAttribute (stable, NaN last).
+
+    The input is not modified. Already sorted input with numeric sort columns is
+    returned as is, without a copy.
+    """
+    numeric = all(pd.api.types.is_numeric_dtype(df[col]) for col in SORT_COLUMNS)
+    if numeric and is_sorted(df):
+        return df
+
+    keys = {col: _convert_to_numeric(df[col]) for col in SORT_COLUMNS}
+    converted = {col: key for col, key in keys.items() if key is not df[col]}
+
+    if _is_lexsorted(list(keys.values())):
+        return df.assign(**converted)
+
+    # np.lexsort sorts by the last key first and is stable
+    order = np.lexsort([keys[col].to_numpy() for col in reversed(SORT_COLUMNS)])
+    return df.assign(**converted).take(order)
+
+
+def add_sort_rank(df: pd.DataFrame) -> pd.DataFrame:
+    """Sorts the data once and persists the order in the `SortRank` column."""
+    df_sorted = sort_dataframe(coerce_sort_columns(df))
+    if df_sorted is df:
+        df_sorted = df_sorted.copy()
+    df_sorted[SORT_RANK_COLUMN] = np.arange(len(df_sorted))
+    return df_sorted
@@ -0,0 +1,602 @@
+"""
+storage_backends.py
+
+The storage backends behind load_data.py. A backend stores the files of the versions
+(e.g. `V2.1/M_Attributes.csv`) as bytes, load_data.py parses them.
+
+Backends:
+- `LocalBackend`: one folder per version in `data/` (or the `DATA_DIR` environment variable)
+- `AzureBackend`: one blob prefix per version in an Azure Blob Storage container
+- `MemoryBackend`: dictionaries in the current process, for tests and benchmarks. Worker processes
+  do not share it, use it with `EXPORT_MAX_WORKERS: 1`.
+- `SQLiteBackend`: versions and files in one SQLite database, every write is a transaction
+
+The backend is selected with `STORAGE_BACKEND` in config.yaml ('local', 'azure', 'memory', 'sqlite').
+Without it, `USE_AZURE_STORAGE` selects between Azure and local as before.
+
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Protocol
+
+from azure.core.exceptions import AzureError, ResourceExistsError, ResourceNotFoundError
+from azure.storage.blob import BlobSasPermissions, BlobServiceClient, generate_blob_sas
+
+from src.storage_metrics import record_cache
+from src.utils import load_config
+
+logger = logging.getLogger(__name__)
+
+config = load_config()
+
+USE_AZURE_STORAGE = config.get('USE_AZURE_STORAGE', False)
+STORAGE_BACKEND = config.get('STORAGE_BACKEND') or ('azure' if USE_AZURE_STORAGE else 'local')
+STORAGE_SQLITE_PATH = config.get('STORAGE_SQLITE_PATH', 'data/.storage.sqlite')
+
+# Environment variable to keep the local versions in another folder than data/ (e.g. for benchmarks)
+DATA_DIR_ENV = 'DATA_DIR'
+
+# Block size for chunked uploads; streams larger than one block are uploaded block by block
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Files copied from a master template into a new project version
+BASE_FILE_SUFFIXES = ('.csv', '.jpg', '.png')
+
+
+def get_data_folder() -> Path:
+    """The local folder of the versions: `data/`, or the folder set in the DATA_DIR environment variable."""
+    data_dir = os.getenv(DATA_DIR_ENV)
+    if data_dir:
+        return Path(data_dir)
+    return Path(__file__).parent.parent / "data"
+
+
+def _is_version_name(name: str) -> bool:
+    # Folders starting with a dot hold internal state (e.g. the build jobs), not versions
+    return name != '__pycache__' and not name.startswith('.')
+
+
+def _file_info(name: str, size: int, modified: datetime, etag: str, content_hash: Optional[str] = None) -> Dict:
+    """
+    The metadata of a stored file, see `StorageBackend.stat_file`.
+
+    `etag` changes whenever the file is written; `content_hash` ("md5:..." or "sha256:...") is only
+    set if the backend knows it without reading the file.
+    """
+    return {
+        'name': name,
+        'size': size,
+        'modified': modified.isoformat(timespec='seconds'),
+        'etag': etag,
+        'content_hash': content_hash,
+    }
+
+
+def _sha256(content: bytes) -> str:
+    return f"sha256:{hashlib.sha256(content).hexdigest()}"
+
+
+def _data_uri(file_name: str, content: bytes) -> str:
+    """Inline link for backends without a file server, works for images and downloads."""
+    mime_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    return f"data:{mime_type};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+class StorageBackend(Protocol):
+    """The operations load_data.py needs from a storage backend."""
+
+    name: str
+
+    def create_folder(self, version: str) -> None: ...
+
+    def list_versions(self) -> List[str]: ...
+
+    def read_bytes(self, version: str, file_name: str) -> bytes:
+        """Raises FileNotFoundError if the file does not exist."""
+        ...
+
+    def open_file(self, version: str, file_name: str) -> BinaryIO:
+        """
+        Opens a file for reading as a stream, so it can be parsed while it is downloaded.
+        Raises FileNotFoundError if the file does not exist.
+        """
+        ...
+
+    def write_bytes(self, version: str, file_name: str, content: bytes) -> None: ...
+
+    def write_stream(self, version: str, file_name: str, file_obj: BinaryIO) -> int:
+        """Stores a binary file object without reading it into memory at once, returns the stored bytes."""
+        ...
+
+    def copy_files(self, source_version: str, target_version: str, suffixes: Iterable[str]) -> int:
+        """Copies the files with the given suffixes into another version, returns the copied bytes."""
+        ...
+
+    def stat_file(self, version: str, file_name: str) -> Dict:
+        """The metadata of a file (see `_file_info`) without reading it, raises FileNotFoundError."""
+        ...
+
+    def list_files(self, version: str) -> List[Dict]:
+        """The metadata of all files of a version, sorted by name."""
+        ...
+
+    def download_link(self, version: str, file_name: str) -> Optional[str]:
+        """A path or URL to serve the file, None if it does not exist."""
+        ...
+
+
+class LocalBackend:
+    """One folder per version on the local filesystem."""
+
+    name = 'local'
+
+    def __init__(self, root: Optional[Path] = None):
+        self._root = Path(root) if root else None
+
+    @property
+    def root(self) -> Path:
+        # Resolved on every call, DATA_DIR may be set after the backend was created
+        return self._root or get_data_folder()
+
+    def create_folder(self, version: str) -> None:
+        (self.root / version).mkdir(parents=True, exist_ok=True)
+
+    def list_versions(self) -> List[str]:
+        return sorted([f.name for f in self.root.iterdir() if f.is_dir() and _is_version_name(f.name)], reverse=True)
+
+    def read_bytes(self, version: str, file_name: str) -> bytes:
+        return (self.root / version / file_name).read_bytes()
+
+    def open_file(self, version: str, file_name: str) -> BinaryIO:
+        return open(self.root / version / file_name, 'rb')
+
+    def write_bytes(self, version: str, file_name: str, content: bytes) -> None:
+        (self.root / version / file_name).write_bytes(content)
+
+    def write_stream(self, version: str, file_name: str, file_obj: BinaryIO) -> int:
+        with open(self.root / version / file_name, 'wb') as target:
+            shutil.copyfileobj(file_obj, target, CHUNK_SIZE)
+            return target.tell()
+
+    def copy_files(self, source_version: str, target_version: str, suffixes: Iterable[str]) -> int:
+        target_dir = self.root / target_version
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        copied_bytes = 0
+        for file in (self.root / source_version).glob("*.*"):
+            if file.suffix in suffixes:
+                copied_bytes += (target_dir / file.name).write_bytes(file.read_bytes())
+                logger.info(f"Copied {file.name} to {target_dir}")
+        return copied_bytes
+
+    @staticmethod
+    def _stat_info(path: Path) -> Dict:
+        stat = path.stat()
+        modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        return _file_info(path.name, stat.st_size, modified, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+
+    def stat_file(self, version: str, file_name: str) -> Dict:
+        return self._stat_info(self.root / version / file_name)
+
+    def list_files(self, version: str) -> List[Dict]:
+        return [self._stat_info(path) for path in sorted((self.root / version).iterdir()) if path.is_file()]
+
+    def download_link(self, version: str, file_name: str) -> Optional[str]:
+        file_path = self.root / version / file_name
+        return str(file_path) if file_path.exists() else None
+
+
+# Azure clients by account and settings, see AzureBackend.client
+_azure_clients = {}
+# Forked worker processes must not share the connections of the parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_azure_clients.clear)
+
+
+class _ChunkReader(io.RawIOBase):
+    """Readable stream over the chunks of an Azure download, the next chunk is fetched when needed."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._chunk = b''
+        self._offset = 0
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._chunk):
+            self._chunk = next(self._chunks, None)
+            self._offset = 0
+            if self._chunk is None:
+                self._chunk = b''
+                return 0
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset:self._offset + size]
+        self._offset += size
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+
+class AzureBackend:
+    """
+    One blob prefix per version in an Azure Blob Storage container.
+
+    `client_factory` creates the Blob service clients, it is called like `BlobServiceClient`. Benchmarks
+    and tests pass the client of an in-process fake (benchmarks/fake_blob_service.py) to run offline.
+    """
+
+    name = 'azure'
+
+    def __init__(self, account_name: str, account_key: str, container_name: str,
+                 client_factory: Callable = BlobServiceClient):
+        self.account_name = account_name
+        self.account_key = account_key
+        self.container_name = container_name
+        self.client_factory = client_factory
+
+    def client(self, **kwargs) -> BlobServiceClient:
+        """
+        Returns a Blob service client for the given settings.
+
+        The clients are thread-safe and reused for the same settings, so the connection pool of the
+        client is shared by all calls instead of opening new connections for every file.
+        """
+        key = (self.client_factory, self.account_name, tuple(sorted(kwargs.items())))
+        client = _azure_clients.get(key)
+        record_cache(self.name, 'client', client is not None)
+        if client is None:
+            account_url = f"https://{self.account_name}.blob.core.windows.net"
+            client = self.client_factory(account_url=account_url, credential=self.account_key, **kwargs)
+            _azure_clients[key] = client
+        return client
+
+    def _container(self, **kwargs):
+        return self.client(**kwargs).get_container_client(self.container_name)
+
+    def create_folder(self, version: str) -> None:
+        # Empty blob acts as a folder
+        self._container().get_blob_client(f"{version}/.folder").upload_blob("", overwrite=True)
+
+    def list_versions(self) -> List[str]:
+        blobs = self._container().list_blobs()
+        return sorted({blob.name.split('/')[0] for blob in blobs if _is_version_name(blob.name.split('/')[0])}, reverse=True)
+
+    def read_bytes(self, version: str, file_name: str) -> bytes:
+        try:
+            return self._container().get_blob_client(f"{version}/{file_name}").download_blob().readall()
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in Azure Blob Storage")
+
+    def open_file(self, version: str, file_name: str) -> BinaryIO:
+        try:
+            downloader = self._container().get_blob_client(f"{version}/{file_name}").download_blob()
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in Azure Blob Storage")
+        return io.BufferedReader(_ChunkReader(downloader.chunks()), CHUNK_SIZE)
+
+    def write_bytes(self, version: str, file_name: str, content: bytes) -> None:
+        self._container().get_blob_client(f"{version}/{file_name}").upload_blob(content, overwrite=True)
+
+    def write_stream(self, version: str, file_name: str, file_obj: BinaryIO) -> int:
+        container_client = self._container(max_single_put_size=CHUNK_SIZE, max_block_size=CHUNK_SIZE)
+        container_client.get_blob_client(f"{version}/{file_name}").upload_blob(file_obj, overwrite=True)
+        return file_obj.tell()
+
+    def copy_files(self, source_version: str, target_version: str, suffixes: Iterable[str]) -> int:
+        container_client = self._container()
+        copied_bytes = 0
+        try:
+            for blob in container_client.list_blobs(name_starts_with=f"{source_version}/"):
+                if blob.name.endswith(tuple(suffixes)):
+                    target_blob = f"{target_version}/{blob.name.split('/')[-1]}"
+                    content = container_client.get_blob_client(blob.name).download_blob().readall()
+                    container_client.get_blob_client(target_blob).upload_blob(content, overwrite=True)
+                    copied_bytes += len(content)
+                    logger.info(f"Copied {blob.name} to {target_blob}")
+        except ResourceExistsError as e:
+            logger.warning(f"File already exists: {str(e)}")
+        return copied_bytes
+
+    @staticmethod
+    def _blob_info(properties) -> Dict:
+        # Azure stores the MD5 of blobs uploaded in one request, not of blobs uploaded in blocks
+        content_md5 = properties.content_settings.content_md5
+        content_hash = f"md5:{bytes(content_md5).hex()}" if content_md5 else None
+        return _file_info(properties.name.split('/')[-1], properties.size, properties.last_modified,
+                          properties.etag, content_hash)
+
+    def stat_file(self, version: str, file_name: str) -> Dict:
+        try:
+            return self._blob_info(self._container().get_blob_client(f"{version}/{file_name}").get_blob_properties())
+        except ResourceNotFoundError:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in Azure Blob Storage")
+
+    def list_files(self, version: str) -> List[Dict]:
+        blobs = self._container().list_blobs(name_starts_with=f"{version}/")
+        return sorted([self._blob_info(blob) for blob in blobs if not blob.name.endswith('/.folder')],
+                      key=lambda info: info['name'])
+
+    def download_link(self, version: str, file_name: str) -> Optional[str]:
+        """A download URL with a SAS token, valid for one hour."""
+        blob_client = self._container().get_blob_client(f"{version}/{file_name}")
+        try:
+            sas_token = generate_blob_sas(
+                account_name=self.account_name,
+                container_name=self.container_name,
+                blob_name=f"{version}/{file_name}",
+                account_key=self.account_key,
+                permission=BlobSasPermissions(read=True),
+                expiry=datetime.now(timezone.utc) + timedelta(hours=1),
+            )
+        except (AzureError, ValueError) as e:
+            logger.error(f"Error generating SAS token: {e}")
+            return None
+        return f"{blob_client.url}?{sas_token}"
+
+
+class MemoryBackend:
+    """Versions and files in dictionaries of the current process."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._versions: Dict[str, Dict[str, bytes]] = {}
+        self._info: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, version: str, file_name: str, content: bytes, content_hash: Optional[str] = None):
+        # Called with the lock held
+        content_hash = content_hash or _sha256(content)
+        self._versions.setdefault(version, {})[file_name] = content
+        self._info.setdefault(version, {})[file_name] = _file_info(
+            file_name, len(content), datetime.now(timezone.utc), f'"{content_hash}"', content_hash,
+        )
+
+    def create_folder(self, version: str) -> None:
+        with self._lock:
+            self._versions.setdefault(version, {})
+
+    def list_versions(self) -> List[str]:
+        with self._lock:
+            return sorted([version for version in self._versions if _is_version_name(version)], reverse=True)
+
+    def read_bytes(self, version: str, file_name: str) -> bytes:
+        try:
+            return self._versions[version][file_name]
+        except KeyError:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in memory")
+
+    def open_file(self, version: str, file_name: str) -> BinaryIO:
+        return io.BytesIO(self.read_bytes(version, file_name))
+
+    def write_bytes(self, version: str, file_name: str, content: bytes) -> None:
+        with self._lock:
+            self._put(version, file_name, bytes(content))
+
+    def write_stream(self, version: str, file_name: str, file_obj: BinaryIO) -> int:
+        content = file_obj.read()
+        self.write_bytes(version, file_name, content)
+        return len(content)
+
+    def copy_files(self, source_version: str, target_version: str, suffixes: Iterable[str]) -> int:
+        with self._lock:
+            files = {name: content for name, content in self._versions.get(source_version, {}).items()
+                     if name.endswith(tuple(suffixes))}
+            self._versions.setdefault(target_version, {})
+            for name, content in files.items():
+                self._put(target_version, name, content, self._info[source_version][name]['content_hash'])
+        return sum(len(content) for content in files.values())
+
+    def stat_file(self, version: str, file_name: str) -> Dict:
+        try:
+            return dict(self._info[version][file_name])
+        except KeyError:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in memory")
+
+    def list_files(self, version: str) -> List[Dict]:
+        with self._lock:
+            return [dict(info) for _, info in sorted(self._info.get(version, {}).items())]
+
+    def download_link(self, version: str, file_name: str) -> Optional[str]:
+        try:
+            return _data_uri(file_name, self.read_bytes(version, file_name))
+        except FileNotFoundError:
+            return None
+
+
+class SQLiteBackend:
+    """Versions and files in one SQLite database, every write is a transaction."""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS versions (
+            name TEXT PRIMARY KEY,
+            created TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            version TEXT NOT NULL REFERENCES versions(name),
+            name TEXT NOT NULL,
+            content BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            modified TEXT NOT NULL,
+            content_hash TEXT,
+            PRIMARY KEY (version, name)
+        );
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Used by one thread only; the check is disabled for the blob streams (see open_file), which
+            # the pyarrow CSV parser reads from its own thread
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # Readers (the app) do not block the writer (a build) and vice versa
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+            self._migrate(connection)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection):
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(files)")]
+        if 'content_hash' not in columns:
+            # Databases created before the file metadata API; the hash is set on the next write
+            connection.execute("ALTER TABLE files ADD COLUMN content_hash TEXT")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    def _add_version(self, connection: sqlite3.Connection, version: str):
+        connection.execute("INSERT OR IGNORE INTO versions (name, created) VALUES (?, ?)", (version, self._now()))
+
+    def create_folder(self, version: str) -> None:
+        with self._connection() as connection:
+            self._add_version(connection, version)
+
+    def list_versions(self) -> List[str]:
+        rows = self._connection().execute("SELECT name FROM versions").fetchall()
+        return sorted([name for (name,) in rows if _is_version_name(name)], reverse=True)
+
+    def read_bytes(self, version: str, file_name: str) -> bytes:
+        row = self._connection().execute(
+            "SELECT content FROM files WHERE version = ? AND name = ?", (version, file_name)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in {self.path}")
+        return row[0]
+
+    def open_file(self, version: str, file_name: str) -> BinaryIO:
+        connection = self._connection()
+        row = connection.execute("SELECT rowid FROM files WHERE version = ? AND name = ?", (version, file_name)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in {self.path}")
+        # Incremental reads of the blob, the content is not loaded at once
+        return connection.blobopen('files', 'content', row[0], readonly=True)
+
+    def write_bytes(self, version: str, file_name: str, content: bytes) -> None:
+        with self._connection() as connection:
+            self._add_version(connection, version)
+            connection.execute(
+                "INSERT OR REPLACE INTO files (version, name, content, size, modified, content_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                (version, file_name, content, len(content), self._now(), _sha256(content)),
+            )
+
+    def write_stream(self, version: str, file_name: str, file_obj: BinaryIO) -> int:
+        start = file_obj.tell()
+        size = file_obj.seek(0, os.SEEK_END) - start
+        file_obj.seek(start)
+
+        with self._connection() as connection:
+            self._add_version(connection, version)
+            connection.execute(
+                "INSERT OR REPLACE INTO files (version, name, content, size, modified) VALUES (?, ?, zeroblob(?), ?, ?)",
+                (version, file_name, size, size, self._now()),
+            )
+            rowid = connection.execute(
+                "SELECT rowid FROM files WHERE version = ? AND name = ?", (version, file_name)
+            ).fetchone()[0]
+            # Written in chunks into the preallocated blob, the file is never read into memory at once
+            content_hash = hashlib.sha256()
+            with connection.blobopen('files', 'content', rowid) as blob:
+                for chunk in iter(lambda: file_obj.read(CHUNK_SIZE), b''):
+                    blob.write(chunk)
+                    content_hash.update(chunk)
+            connection.execute("UPDATE files SET content_hash = ? WHERE rowid = ?", (f"sha256:{content_hash.hexdigest()}", rowid))
+        return size
+
+    def copy_files(self, source_version: str, target_version: str, suffixes: Iterable[str]) -> int:
+        suffix_filter = ' OR '.join(['name LIKE ?'] * len(tuple(suffixes)))
+        patterns = [f'%{suffix}' for suffix in suffixes]
+        with self._connection() as connection:
+            self._add_version(connection, target_version)
+            connection.execute(
+                f"INSERT OR REPLACE INTO files (version, name, content, size, modified, content_hash) "
+                f"SELECT ?, name, content, size, ?, content_hash FROM files WHERE version = ? AND ({suffix_filter})",
+                (target_version, self._now(), source_version, *patterns),
+            )
+            (copied_bytes,) = connection.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM files WHERE version = ? AND ({suffix_filter})",
+                (source_version, *patterns),
+            ).fetchone()
+        return copied_bytes
+
+    def download_link(self, version: str, file_name: str) -> Optional[str]:
+        try:
+            return _data_uri(file_name, self.read_bytes(version, file_name))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _row_info(name: str, size: int, modified: str, content_hash: Optional[str]) -> Dict:
+        # The modification time has only seconds, the hash identifies the written content
+        etag = f'"{content_hash}"' if content_hash else f'"{modified}-{size:x}"'
+        return _file_info(name, size, datetime.fromisoformat(modified), etag, content_hash)
+
+    def stat_file(self, version: str, file_name: str) -> Dict:
+        row = self._connection().execute(
+            "SELECT name, size, modified, content_hash FROM files WHERE version = ? AND name = ?", (version, file_name)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{version}/{file_name} does not exist in {self.path}")
+        return self._row_info(*row)
+
+    def list_files(self, version: str) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT name, size, modified, content_hash FROM files WHERE version = ? ORDER BY name", (version,)
+        ).fetchall()
+        return [self._row_info(*row) for row in rows]
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Creates the backend with the given name from the configuration."""
+    if name == 'local':
+        return LocalBackend()
+    if name == 'azure':
+        return AzureBackend(os.getenv('AZURE_ACCOUNT_NAME'), os.getenv('AZURE_ACCOUNT_KEY'), os.getenv('AZURE_CONTAINER_NAME'))
+    if name == 'memory':
+        return MemoryBackend()
+    if name == 'sqlite':
+        return SQLiteBackend(Path(__file__).parent.parent / STORAGE_SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_backend() -> StorageBackend:
+    """The backend of the application, created from `STORAGE_BACKEND` on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(STORAGE_BACKEND)
+    return _backend
+
+
+def set_backend(backend: Optional[StorageBackend]):
+    """Replaces the backend (e.g. with a MemoryBackend in tests), None restores the configured one."""
+    global _backend
+    _backend = backend
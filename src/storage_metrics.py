@@ -0,0 +1,188 @@
+"""
+storage_metrics.py
+
+Counters of the storage layer (load_data.py), always on and cheap enough for every call.
+
+Per backend ('local', 'azure') and operation ('load_file', 'store_file', ...):
+- number of calls and errors
+- latency histogram (fixed buckets), total and maximum latency
+- bytes read and written
+
+Per backend and cache: hits and misses of the Azure client cache and of the caches keyed on the
+ETags of the stored files (the web data, search and facet index of the requirements page, the
+version diffs). Cached functions of the pages only run on a miss, they call `mark_cache_miss()`
+and are called through `cached_call`.
+
+Query the counters with `snapshot()`, write them to a JSON file with `dump()`. If `STORAGE_METRICS_FILE`
+is set in config.yaml, the counters are written to that file when the process exits.
+
+Worker processes (parallel exports, bulk projects, admin builds) never write that file, they hand
+their counters to the parent process instead: the task returns `take()`, the parent adds it with
+`merge()`.
+
+"""
+
+import atexit
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.utils import load_config
+
+config = load_config()
+
+STORAGE_METRICS_FILE = config.get('STORAGE_METRICS_FILE')
+
+# Upper bounds of the latency buckets in seconds, the last bucket takes everything slower
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf'))
+
+_lock = threading.Lock()
+_operations: Dict[tuple, Dict] = {}
+_caches: Dict[tuple, Dict] = {}
+_calls = threading.local()
+
+
+def _new_operation() -> Dict:
+    return {
+        'calls': 0,
+        'errors': 0,
+        'seconds': 0.0,
+        'max_seconds': 0.0,
+        'bytes_read': 0,
+        'bytes_written': 0,
+        'buckets': [0] * len(LATENCY_BUCKETS),
+    }
+
+
+def record_call(backend: str, operation: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0, error: bool = False):
+    """Records one storage call."""
+    bucket = next(index for index, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound)
+    with _lock:
+        metrics = _operations.setdefault((backend, operation), _new_operation())
+        metrics['calls'] += 1
+        metrics['errors'] += int(error)
+        metrics['seconds'] += seconds
+        metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+        metrics['bytes_read'] += bytes_read or 0
+        metrics['bytes_written'] += bytes_written or 0
+        metrics['buckets'][bucket] += 1
+
+
+def record_cache(backend: str, cache: str, hit: bool):
+    """Records a hit or miss of a cache."""
+    with _lock:
+        counters = _caches.setdefault((backend, cache), {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def mark_cache_miss():
+    """Called in the body of a cached function, which only runs on a miss, see `cached_call`."""
+    _calls.missed = True
+
+
+def cached_call(backend: str, cache: str, func: Callable, *args, **kwargs):
+    """Calls a cached function (e.g. `st.cache_data`) and records a hit, or a miss if its body called `mark_cache_miss`."""
+    outer = getattr(_calls, 'missed', False)
+    _calls.missed = False
+    try:
+        result = func(*args, **kwargs)
+        record_cache(backend, cache, hit=not _calls.missed)
+        return result
+    finally:
+        _calls.missed = outer
+
+
+def _percentile(buckets, calls: int, share: float) -> Optional[float]:
+    """The upper bound of the bucket containing the percentile (None if it is the open last bucket)."""
+    threshold = share * calls
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        cumulative += count
+        if cumulative >= threshold:
+            return None if bound == float('inf') else bound
+    return None
+
+
+def snapshot() -> Dict:
+    """
+    Returns the current counters.
+
+    Returns:
+    Dict: `operations` as {backend: {operation: metrics}} with calls, errors, latency
+          (mean, max, p50/p95 bucket bounds, histogram) and bytes, and `caches` as
+          {backend: {cache: counters}} with hits, misses and hit rate.
+    """
+    with _lock:
+        operations = {}
+        for (backend, operation), metrics in sorted(_operations.items()):
+            calls = metrics['calls']
+            operations.setdefault(backend, {})[operation] = {
+                'calls': calls,
+                'errors': metrics['errors'],
+                'seconds': round(metrics['seconds'], 4),
+                'mean_seconds': round(metrics['seconds'] / calls, 4) if calls else None,
+                'max_seconds': round(metrics['max_seconds'], 4),
+                'p50_seconds': _percentile(metrics['buckets'], calls, 0.5),
+                'p95_seconds': _percentile(metrics['buckets'], calls, 0.95),
+                'bytes_read': metrics['bytes_read'],
+                'bytes_written': metrics['bytes_written'],
+                'histogram': {('inf' if bound == float('inf') else str(bound)): count
+                              for bound, count in zip(LATENCY_BUCKETS, metrics['buckets'])},
+            }
+
+        caches = {}
+        for (backend, cache), counters in sorted(_caches.items()):
+            caches.setdefault(backend, {})[cache] = {
+                **counters,
+                'hit_rate': round(counters['hits'] / (counters['hits'] + counters['misses']), 3),
+            }
+
+    return {'timestamp': datetime.now().isoformat(timespec='seconds'), 'operations': operations, 'caches': caches}
+
+
+def take() -> Dict:
+    """Returns the raw counters and clears them, the calls of a worker task to be merged in the parent process."""
+    with _lock:
+        counters = {
+            'operations': {key: {**metrics, 'buckets': list(metrics['buckets'])} for key, metrics in _operations.items()},
+            'caches': {cache: dict(counter) for cache, counter in _caches.items()},
+        }
+        _operations.clear()
+        _caches.clear()
+    return counters
+
+
+def merge(counters: Dict):
+    """Adds the counters of a worker process, see `take`."""
+    with _lock:
+        for key, worker in counters['operations'].items():
+            metrics = _operations.setdefault(key, _new_operation())
+            for counter in ('calls', 'errors', 'seconds', 'bytes_read', 'bytes_written'):
+                metrics[counter] += worker[counter]
+            metrics['max_seconds'] = max(metrics['max_seconds'], worker['max_seconds'])
+            metrics['buckets'] = [count + worker_count for count, worker_count in zip(metrics['buckets'], worker['buckets'])]
+        for cache, worker in counters['caches'].items():
+            counter = _caches.setdefault(cache, {'hits': 0, 'misses': 0})
+            counter['hits'] += worker['hits']
+            counter['misses'] += worker['misses']
+
+
+def reset():
+    """Clears all counters."""
+    with _lock:
+        _operations.clear()
+        _caches.clear()
+
+
+def dump(path: Optional[str] = None) -> Path:
+    """Writes the snapshot as JSON, to `STORAGE_METRICS_FILE` if no path is given."""
+    path = Path(path or STORAGE_METRICS_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(snapshot(), indent=2), encoding='utf-8')
+    return path
+
+
+if STORAGE_METRICS_FILE:
+    atexit.register(dump)
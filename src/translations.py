@@ -0,0 +1,80 @@
+"""
+translations.py
+
+Translation service for the build (exports and reports).
+
+`translations.json` is read and parsed once per build instead of once per model sheet. The
+column name translations are precomputed for every language, including the stripping of the
+language postfix (`AttributeDescriptionDE` -> `AttributeDescription`), so renaming the columns
+of a sheet is a dictionary lookup per column.
+
+The service only holds plain dictionaries and can be passed to the export worker processes.
+
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from src.load_data import get_project_path
+
+TRANSLATIONS_FILE = 'translations.json'
+
+LANGUAGE_POSTFIX = re.compile(r'(DE|EN|FR|IT)$')
+
+
+def remove_language_postfix(column_name: str) -> str:
+    """Removes the language postfix from a column name, e.g. 'ElementNameDE' -> 'ElementName'."""
+    return LANGUAGE_POSTFIX.sub('', column_name)
+
+
+class TranslationService:
+    """Holds the parsed translations and the precomputed column name mapping per language."""
+
+    def __init__(self, translations: Dict):
+        self.translations = translations
+        self._column_names = {}
+        for base_name, names in translations.get('column_names', {}).items():
+            for language, name in names.items():
+                self._column_names.setdefault(language, {})[base_name] = name
+        self._column_maps = {}
+
+    def text(self, *keys: str, language: str) -> str:
+        """Returns a translated text, e.g. `text('word_report', 'titel', language='DE')`."""
+        entry = self.translations
+        for key in keys:
+            entry = entry[key]
+        return entry[language]
+
+    def column_name(self, column: str, language: str) -> str:
+        """
+        Translates a column name. Columns without a translation keep their name without
+        the language postfix.
+        """
+        base_name = remove_language_postfix(column)
+        return self._column_names.get(language, {}).get(base_name, base_name)
+
+    def column_name_map(self, columns: Iterable[str], language: str) -> Dict[str, str]:
+        """Returns the mapping original -> translated column name, cached per column set and language."""
+        key = (tuple(columns), language)
+        if key not in self._column_maps:
+            self._column_maps[key] = {column: self.column_name(column, language) for column in key[0]}
+        return self._column_maps[key]
+
+
+def load_translation_service(json_path: Optional[Path] = None) -> TranslationService:
+    """
+    Reads the translations once and returns the service.
+
+    Parameters:
+    json_path (Path): The translations file, defaults to `organisation_data/translations.json`.
+
+    Returns:
+    TranslationService: The service to be shared by all steps of a build.
+    """
+    if json_path is None:
+        json_path = get_project_path('organisation_data') / TRANSLATIONS_FILE
+
+    with open(json_path, 'r', encoding='utf-8') as file:
+        return TranslationService(json.load(file))
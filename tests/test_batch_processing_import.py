@@ -0,0 +1,25 @@
+import unittest
+
+from src.batch_processing_import import get_version_type, resolve_versions
+
+
+class TestResolveVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.available = ['V2.1-P-200', 'V2.1-P-100', 'V2.1', 'V2.0']
+
+    def test_expands_glob_patterns_sorted_without_duplicates(self):
+        result = resolve_versions(['V2.1-P-*', 'V2.1-P-100', 'V2.0'], self.available)
+        self.assertEqual(result, ['V2.1-P-100', 'V2.1-P-200', 'V2.0'])
+
+    def test_unknown_version_raises(self):
+        with self.assertRaises(ValueError):
+            resolve_versions(['V3.*'], self.available)
+
+    def test_version_type_from_name(self):
+        self.assertEqual(get_version_type('V2.1-P-100'), 'P')
+        self.assertEqual(get_version_type('V2.1'), 'M')
+
+
+if __name__ == '__main__':
+    unittest.main()
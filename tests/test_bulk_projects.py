@@ -0,0 +1,40 @@
+import unittest
+
+from benchmarks.generate_catalogue import generate_catalogue
+from src import storage_backends
+from src.build_manifest import load_manifest
+from src.bulk_projects import create_projects_for_every_workflow
+from src.fingerprint_index import get_project_versions, load_fingerprint_index
+from src.load_data import create_storage_folder, store_file
+from src.project_index import load_project_index
+from src.storage_backends import MemoryBackend
+
+
+class TestWorkflowProjects(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+        create_storage_folder('V1')
+        catalogue = generate_catalogue(workflows=2, models=2, elements=5, attributes=20, languages=['DE'], seed=1)
+        for file_name, df in catalogue.items():
+            store_file(df.to_csv(index=False), 'V1', file_name)
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_projects_are_indexed_like_every_build(self):
+        results = create_projects_for_every_workflow('V1', max_workers=1)
+        created = sorted(result['project_version'] for result in results if result['status'] == 'created')
+
+        self.assertTrue(created, results)
+        versions = load_project_index()
+        self.assertEqual(sorted(versions), created)
+        self.assertEqual(get_project_versions('V1'), created)
+        for version in created:
+            self.assertEqual(versions[version]['master'], 'V1')
+            self.assertIn('fingerprint_index', [stage['stage'] for stage in load_manifest(version)['stages']])
+            self.assertIsNotNone(load_fingerprint_index(version))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import pandas as pd
+
+from src import storage_backends
+from src.check_imports_data_structure import (
+    check_for_empty_rows,
+    read_upload,
+    split_links,
+    validate_files,
+    validate_uploads,
+    validate_version,
+)
+from src.load_data import store_file
+from src.storage_backends import MemoryBackend
+
+
+def _checks(report, file_name):
+    return [(issue['check'], issue['column'], issue['rows']) for issue in report['files'][file_name]['issues']]
+
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = {
+            'M_Elements.csv': pd.DataFrame({'ElementID': ['E1', 'E2', None], 'SortElement': ['1,5', 'x', '3']}),
+            'M_Attributes.csv': pd.DataFrame({
+                'AttributeID': ['A1', 'A2', 'A1'],
+                'RegexCheckEN': ['^[0-9]+$', '([', None],
+                'ElementLink': ['E1, E2', 'E3', '"E1"'],
+            }),
+        }
+
+    def test_report_lists_the_issues_with_line_numbers(self):
+        report = validate_files(self.frames)
+
+        self.assertFalse(report['valid'])
+        self.assertEqual((report['errors'], report['warnings']), (6, 1))
+        self.assertEqual(_checks(report, 'M_Elements.csv')[1:], [
+            ('empty_id', 'ElementID', [4]),
+            ('non_numeric_sort', 'SortElement', [3]),
+        ])
+        self.assertEqual(_checks(report, 'M_Attributes.csv')[1:], [
+            ('duplicate_id', 'AttributeID', [2, 4]),
+            ('dangling_link', 'ElementLink', [3]),
+            ('invalid_regex', 'RegexCheckEN', [3]),
+        ])
+
+    def test_required_columns_are_reported(self):
+        issue = validate_files(self.frames)['files']['M_Elements.csv']['issues'][0]
+        self.assertEqual(issue['check'], 'required_columns')
+        self.assertIn('ElementName*', issue['values'])
+
+    def test_links_and_empty_rows(self):
+        self.assertEqual(split_links('A, "B,C", D'), ['A', 'B,C', 'D'])
+        self.assertEqual(split_links('E1,E2 ,'), ['E1', 'E2'])
+        self.assertEqual(len(check_for_empty_rows(self.frames['M_Elements.csv'])), 1)
+
+    def test_validate_version_reports_missing_files(self):
+        storage_backends.set_backend(MemoryBackend())
+        try:
+            store_file(self.frames['M_Elements.csv'].to_csv(index=False), 'V1', 'M_Elements.csv')
+            report = validate_version('V1', ['M_Elements.csv', 'M_Models.csv'])
+        finally:
+            storage_backends.set_backend(None)
+
+        self.assertEqual(report['files']['M_Elements.csv']['rows'], 3)
+        self.assertEqual(_checks(report, 'M_Models.csv')[0][0], 'load')
+
+    def test_uploads_are_validated_from_their_bytes(self):
+        uploads = {file_name: df.to_csv(index=False).encode() for file_name, df in self.frames.items()}
+        uploads['M_Models.csv'] = b'\xff\xfe"broken'
+
+        report = validate_uploads(uploads)
+
+        self.assertEqual(_checks(report, 'M_Attributes.csv'), _checks(validate_files(self.frames), 'M_Attributes.csv'))
+        self.assertEqual(_checks(report, 'M_Models.csv')[0][0], 'load')
+        self.assertIs(read_upload(uploads['M_Elements.csv'], 'M_Elements.csv'), read_upload(uploads['M_Elements.csv'], 'M_Elements.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import pandas as pd
+
+from src import storage_backends, storage_metrics
+from src.compare_two_versions import DIFFS_FOLDER, diff_frames, diff_versions
+from src.load_data import load_bytes, store_file
+from src.storage_backends import MemoryBackend
+
+OLD = pd.DataFrame({'ElementID': ['E1', 'E2', 'E3'], 'SortElement': ['1', '2', '3'], 'ImageName': ['a.png', '', 'c.png']})
+NEW = pd.DataFrame({'ElementID': ['E3', 'E2', 'E4'], 'SortElement': ['3', '2,5', '4'], 'ImageName': ['c.png', 'b.png', ''],
+                    'ContainedInDE': ['', '', '']})
+
+
+class TestCompareTwoVersions(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+        storage_metrics.reset()
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_rows_are_matched_by_id(self):
+        diff = diff_frames(OLD, NEW, 'ElementID')
+
+        self.assertEqual((diff['added'], diff['removed'], diff['changed'], diff['unchanged']), (['E4'], ['E1'], ['E2'], 1))
+        self.assertEqual(diff['added_columns'], ['ContainedInDE'])
+        self.assertEqual(diff['changes'], [
+            {'key': 'E2', 'column': 'SortElement', 'old': '2', 'new': '2,5'},
+            {'key': 'E2', 'column': 'ImageName', 'old': '', 'new': 'b.png'},
+        ])
+
+    def test_diff_is_stored_per_version_pair(self):
+        store_file(OLD.to_csv(index=False), 'V1', 'M_Elements.csv')
+        store_file(NEW.to_csv(index=False), 'V2', 'M_Elements.csv')
+
+        diff = diff_versions('V1', 'V2')
+        self.assertEqual(list(diff['files']), ['M_Elements.csv'])
+        self.assertTrue(load_bytes(DIFFS_FOLDER, 'V1__V2.json'))
+        self.assertEqual(diff_versions('V1', 'V2'), diff)
+
+        store_file(OLD.to_csv(index=False), 'V2', 'M_Elements.csv')
+        self.assertEqual(diff_versions('V1', 'V2')['files']['M_Elements.csv']['changed'], [])
+
+        counters = storage_metrics.snapshot()['caches']['memory']['version_diff']
+        self.assertEqual((counters['hits'], counters['misses']), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
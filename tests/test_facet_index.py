@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.facet_index import apply_facets, build_facet_index, get_facet_bitmap, to_row_mask
+from src.requirements_data import filter_by_project_phases
+
+
+class TestFacetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'ProjectPhaseEN': ['31, 32', '32', None, '41', '31'],
+            'ModelNameEN': ['Architecture', 'Architecture', 'Structure', 'Structure', 'Architecture'],
+            'IfcEntityIfc4.0Name': ['IfcWall', 'IfcDoor', 'IfcWall', 'IfcSlab', 'IfcWall'],
+            'Pset': ['Pset_WallCommon', 'Pset_DoorCommon', '', 'Pset_SlabCommon', 'Pset_WallCommon'],
+            'DataTyp': ['IfcLabel', 'IfcBoolean', 'IfcLabel', 'IfcLabel', 'IfcBoolean'],
+        })
+        self.index = build_facet_index(self.data, 'EN')
+
+    def _counts(self, counts, facet):
+        return dict(zip(self.index['facets'][facet]['values'].tolist(), counts[facet].tolist()))
+
+    def test_values_and_counts(self):
+        self.assertNotIn('workflow', self.index['facets'])
+        mask, counts = apply_facets(self.index, {})
+        self.assertIsNone(mask)
+        self.assertEqual(self._counts(counts, 'project_phase'), {'31': 2, '32': 2, '41': 1})
+        self.assertEqual(self._counts(counts, 'pset'), {'Pset_DoorCommon': 1, 'Pset_SlabCommon': 1, 'Pset_WallCommon': 2})
+
+    def test_values_of_a_facet_are_combined_with_or_and_facets_with_and(self):
+        mask, _ = apply_facets(self.index, {'ifc_entity': ['IfcWall', 'IfcDoor'], 'data_type': ['IfcLabel']})
+        self.assertEqual(np.flatnonzero(mask).tolist(), [0, 2])
+        mask, _ = apply_facets(self.index, {'ifc_entity': ['IfcWall', 'Unknown'], 'model': []})
+        self.assertEqual(np.flatnonzero(mask).tolist(), [0, 2, 4])
+
+    def test_counts_of_a_facet_ignore_its_own_selection(self):
+        _, counts = apply_facets(self.index, {'model': ['Architecture'], 'data_type': ['IfcLabel']})
+        self.assertEqual(self._counts(counts, 'model'), {'Architecture': 1, 'Structure': 2})
+        self.assertEqual(self._counts(counts, 'data_type'), {'IfcBoolean': 2, 'IfcLabel': 1})
+        self.assertEqual(self._counts(counts, 'ifc_entity'), {'IfcDoor': 0, 'IfcSlab': 0, 'IfcWall': 1})
+
+    def test_project_phases_match_the_plain_filter(self):
+        for phases in (['31'], ['32', '41'], ['99']):
+            mask, _ = apply_facets(self.index, {'project_phase': phases})
+            expected = filter_by_project_phases(self.data, 'EN', phases).index.tolist()
+            self.assertEqual(np.flatnonzero(mask).tolist(), expected)
+
+    def test_workflows_of_shared_requirements(self):
+        data = pd.DataFrame({
+            'ModelID': ['M1', 'M1', 'M2'],
+            'ElementID': ['E1', 'E2', 'E1'],
+            'AttributeID': ['A1', 'A1', 'A2'],
+            # The web data keeps one workflow per requirement
+            'WorkflowNameEN': ['Costs', 'Costs', 'Energy'],
+        })
+        links = pd.DataFrame({
+            'ModelID': ['M1', 'M1', 'M1', 'M2', 'M3'],
+            'ElementID': ['E1', 'E1', 'E2', 'E1', 'E1'],
+            'AttributeID': ['A1', 'A1', 'A1', 'A2', 'A1'],
+            'WorkflowID': ['W1', 'W2', 'W1', 'W2', 'W2'],
+            'WorkflowNameEN': ['Costs', 'Energy', 'Costs', 'Energy', 'Energy'],
+        })
+
+        self.assertNotIn('workflow', build_facet_index(data, 'EN')['facets'])
+
+        index = build_facet_index(data, 'EN', links)
+        mask, counts = apply_facets(index, {'workflow': ['Energy']})
+        self.assertEqual(np.flatnonzero(mask).tolist(), [0, 2])
+        self.assertEqual(dict(zip(index['facets']['workflow']['values'].tolist(), counts['workflow'].tolist())),
+                         {'Costs': 2, 'Energy': 2})
+
+    def test_bitmaps_beyond_one_word(self):
+        data = pd.DataFrame({'DataTyp': ['IfcLabel', 'IfcReal', 'IfcBoolean'] * 50})
+        facet = build_facet_index(data, 'EN')['facets']['data_type']
+        mask = to_row_mask(get_facet_bitmap(facet, ['IfcReal']), len(data))
+        self.assertEqual(np.flatnonzero(mask).tolist(), list(range(1, 150, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import unittest
+
+import pandas as pd
+
+from benchmarks.fake_blob_service import FAKE_ACCOUNT_KEY, FakeBlobStore
+from src import storage_backends
+from src.load_data import copy_base_files, get_download_link, get_versions, load_file, stat_file, store_file, store_file_stream
+from src.storage_backends import AzureBackend
+
+
+class TestAzureBackendOffline(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FakeBlobStore()
+        storage_backends.set_backend(AzureBackend('account', FAKE_ACCOUNT_KEY, 'container', client_factory=self.store.client))
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_load_data_round_trip(self):
+        store_file(pd.DataFrame({'A': [1, 2]}).to_csv(index=False), 'V1', 'a.csv')
+        store_file(b'png', 'V1', 'a.png')
+        self.assertEqual(copy_base_files('V1', 'P1'), len(b'A\n1\n2\n') + 3)
+
+        self.assertEqual(get_versions(), ['V1', 'P1'])
+        self.assertEqual(load_file('P1', 'a.csv')['A'].tolist(), [1, 2])
+        self.assertTrue(get_download_link('P1', 'a.png').startswith('https://account.blob.core.windows.net/container/P1/a.png?'))
+        with self.assertRaises(RuntimeError):
+            load_file('P1', 'missing.csv')
+
+    def test_stat_file_uses_the_blob_properties(self):
+        store_file(b'123', 'V1', 'a.csv')
+        self.store.reset_stats()
+
+        info = stat_file('V1', 'a.csv')
+        self.assertEqual(info['size'], 3)
+        self.assertEqual(info['content_hash'], 'md5:202cb962ac59075b964b07152d234b70')
+        self.assertEqual(self.store.stats['bytes_downloaded'], 0)
+
+    def test_streams_are_uploaded_in_blocks(self):
+        content = b'x' * (storage_backends.CHUNK_SIZE * 2 + 1)
+        self.store.reset_stats()
+        self.assertTrue(store_file_stream(io.BytesIO(content), 'V1', 'big.xlsx'))
+
+        # Three blocks and the block list
+        self.assertEqual(self.store.stats['requests'], 4)
+        self.assertEqual(self.store.stats['bytes_uploaded'], len(content))
+
+    def test_connections_are_reused(self):
+        self.store.pool_size = 1
+        for i in range(3):
+            store_file('A\n1\n', 'V1', f'{i}.csv')
+
+        self.assertEqual(self.store.stats['requests'], 3)
+        self.assertEqual(self.store.stats['connections_opened'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import unittest
+
+import pandas as pd
+
+from src import storage_backends
+from src.file_schemas import get_schema_dtypes, matches_column
+from src.load_data import load_file, store_file
+from src.storage_backends import MemoryBackend
+
+ELEMENTS_CSV = (
+    'ElementID,ElementNameDE,ElementNameEN,SortElement,IfcEntityIfc4.0Name\n'
+    'E1,Wand,Wall,"1,5",IfcWall\n'
+    'E2,Decke,Slab,2,IfcSlab\n'
+    'E3,Wand 2,Wall 2,,IfcWall\n'
+)
+
+
+class TestFileSchemas(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+        store_file(ELEMENTS_CSV, 'V1', 'M_Elements.csv')
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_schema_columns_are_typed(self):
+        df = load_file('V1', 'M_Elements.csv')
+
+        self.assertEqual(df['IfcEntityIfc4.0Name'].dtype.name, 'category')
+        self.assertEqual(df['SortElement'].tolist()[:2], [1.5, 2.0])
+        self.assertTrue(df['SortElement'].isna().iloc[2])
+
+    def test_untyped_load_keeps_the_text(self):
+        df = load_file('V1', 'M_Elements.csv', schema=False)
+        self.assertEqual(df['SortElement'].tolist()[0], '1,5')
+
+    def test_only_requested_columns_are_loaded(self):
+        df = load_file('V1', 'M_Elements.csv', columns=['ElementID', 'ElementName*'])
+        self.assertEqual(list(df.columns), ['ElementID', 'ElementNameDE', 'ElementNameEN'])
+
+    def test_excel_columns_are_selected(self):
+        buffer = io.BytesIO()
+        pd.DataFrame({'ElementID': ['E1'], 'ElementNameDE': ['Wand'], 'Pset': ['P']}).to_excel(buffer, index=False)
+        store_file(buffer.getvalue(), 'V1', 'RawData.xlsx')
+
+        df = load_file('V1', 'RawData.xlsx', columns=['ElementName*', 'Pset'])
+        self.assertEqual(df.to_dict('records'), [{'ElementNameDE': 'Wand', 'Pset': 'P'}])
+
+    def test_patterns_and_dtypes(self):
+        self.assertTrue(matches_column('AttributeDescriptionDE', ['AttributeDescription*']))
+        self.assertFalse(matches_column('AttributeDescriptionDE', ['AttributeDescription']))
+        self.assertEqual(get_schema_dtypes('data_for_web.csv')['SortAttribute'], 'float64')
+        self.assertEqual(get_schema_dtypes('unknown.csv'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
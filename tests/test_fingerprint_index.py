@@ -0,0 +1,72 @@
+import unittest
+
+import pandas as pd
+
+from src import storage_backends
+from src.fingerprint_index import (
+    affected_projects,
+    create_fingerprint_index,
+    diff_indexes,
+    load_fingerprint_index,
+)
+from src.load_data import store_file
+from src.storage_backends import MemoryBackend
+
+ELEMENTS = pd.DataFrame({
+    'ElementID': ['E1', 'E2', 'E3'],
+    'ElementNameDE': ['Wand', 'Decke', 'Tür'],
+    'ElementNameEN': ['Wall', 'Slab', 'Door'],
+    'SortElement': ['1', '2', '3'],
+})
+
+
+def _store(version, df):
+    store_file(df.to_csv(index=False), version, 'M_Elements.csv')
+    create_fingerprint_index(version)
+
+
+class TestFingerprintIndex(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_index_finds_changed_rows_and_groups(self):
+        _store('V1', ELEMENTS)
+        changed = ELEMENTS.copy()
+        changed.loc[1, 'ElementNameEN'] = 'Ceiling'
+        _store('V2', changed.drop(index=0))
+
+        index = load_fingerprint_index('V1')
+        self.assertEqual(list(index['M_Elements.csv']['groups']), ['ElementName*', 'SortElement'])
+
+        diff = diff_indexes(index, load_fingerprint_index('V2'))['M_Elements.csv']
+        self.assertEqual((diff['removed'], diff['changed'], diff['unchanged']), (['E1'], ['E2'], 1))
+        self.assertEqual(diff['changed_groups'], {'ElementName*': 1})
+
+    def test_equal_rows_have_equal_fingerprints(self):
+        _store('V1', ELEMENTS)
+        _store('V2', ELEMENTS.iloc[::-1])
+        self.assertEqual(diff_indexes(load_fingerprint_index('V1'), load_fingerprint_index('V2'))['M_Elements.csv']['changed'], [])
+
+    def test_affected_projects(self):
+        _store('V1', ELEMENTS)
+        project = ELEMENTS.copy()
+        project.loc[2, 'SortElement'] = '9'
+        _store('V1-P-1', project)
+        _store('V1-P-2', ELEMENTS.iloc[:1])
+
+        template = ELEMENTS.copy()
+        template.loc[1:, 'ElementNameDE'] = 'Neu'
+        _store('V2', template)
+
+        results = {result['project']: result for result in affected_projects('V1', 'V2')}
+        self.assertEqual(set(results), {'V1-P-1', 'V1-P-2'})
+        self.assertEqual(results['V1-P-1']['files']['M_Elements.csv'], {'affected': ['E2', 'E3'], 'conflicts': ['E3']})
+        self.assertEqual(results['V1-P-2']['affected'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
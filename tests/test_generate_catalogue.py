@@ -0,0 +1,31 @@
+import unittest
+
+from benchmarks.generate_catalogue import generate_catalogue
+from src.check_imports_data_structure import (
+    check_required_columns,
+    required_attributes_columns,
+    required_elements_columns,
+    required_models_columns,
+    required_workflows_columns,
+)
+
+
+class TestGenerateCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogue = generate_catalogue(workflows=3, models=4, elements=10, attributes=50, seed=1)
+
+    def test_catalogue_has_the_required_columns(self):
+        for file_name, required_columns in [('M_Workflows.csv', required_workflows_columns),
+                                            ('M_Models.csv', required_models_columns),
+                                            ('M_Elements.csv', required_elements_columns),
+                                            ('M_Attributes.csv', required_attributes_columns)]:
+            self.assertIsNone(check_required_columns(self.catalogue[file_name], required_columns), file_name)
+
+    def test_same_seed_gives_the_same_catalogue(self):
+        other = generate_catalogue(workflows=3, models=4, elements=10, attributes=50, seed=1)
+        self.assertTrue(self.catalogue['M_Attributes.csv'].equals(other['M_Attributes.csv']))
+
+
+if __name__ == '__main__':
+    unittest.main()
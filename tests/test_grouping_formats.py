@@ -0,0 +1,50 @@
+import unittest
+import pandas as pd
+
+from src.grouping_formats import BORDER, GREY, PLAIN, compute_grouping_styles
+
+
+class TestGroupingStyles(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'A': ['file1', 'file1', 'file1', 'file2'],
+            'B': ['Model', 'Model', 'Model', 'Model'],
+            'C': ['Wall', 'Wall', 'Slab', 'Slab'],
+            'D': ['x', 'y', 'y', 'y'],
+            'E': [None, None, None, None],
+            'F': ['Pset_A', 'Pset_A', 'Pset_A', 'PSET_A'],
+            'G': ['a', 'b', 'c', 'd'],
+        })
+
+    def test_first_row_starts_a_group(self):
+        styles = compute_grouping_styles(self.df)
+        self.assertTrue((styles[0] == BORDER).all())
+
+    def test_repeated_values_are_grey(self):
+        styles = compute_grouping_styles(self.df)
+        # Row 2 repeats A, B, C and F, D changes but does not start a group
+        self.assertEqual(list(styles[1]), [GREY, GREY, GREY, PLAIN, GREY, GREY, BORDER])
+
+    def test_column_c_starts_a_group_from_column_c(self):
+        styles = compute_grouping_styles(self.df)
+        self.assertEqual(list(styles[2]), [GREY, GREY, BORDER, BORDER, BORDER, BORDER, BORDER])
+
+    def test_column_a_starts_a_group_across_all_columns(self):
+        styles = compute_grouping_styles(self.df)
+        self.assertTrue((styles[3] == BORDER).all())
+
+    def test_comparison_is_case_insensitive_like_excel(self):
+        styles = compute_grouping_styles(self.df[['A', 'B', 'C', 'D', 'E', 'F']].iloc[2:])
+        self.assertEqual(styles[1][5], BORDER)  # Column A changed
+        styles = compute_grouping_styles(self.df.assign(A='file1').iloc[2:])
+        self.assertEqual(styles[1][5], GREY)
+
+    def test_column_count_extends_the_styles(self):
+        styles = compute_grouping_styles(self.df.iloc[:, :6], column_count=9)
+        self.assertEqual(styles.shape, (4, 9))
+        self.assertTrue((styles[:, 6:] == BORDER).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,95 +1,76 @@
 import unittest
 import pandas as pd
-from pathlib import Path
-from tempfile import TemporaryDirectory
-from io import StringIO
-
-# Import the functions to test
-from src.import_csv import (
-    get_data_path,
-    load_dataframes,
-    check_required_columns,
-    process_attributes_df,
-    export_excel,
-    VERSION
-)
+
+from src.import_csv import _process_attributes_df, get_workflow_links, merge_import_data, parse_csv_string, prepare_raw_data
+from src.check_imports_data_structure import check_required_columns
+from src.sort import SORT_RANK_COLUMN
+
 
 class TestDataProcessing(unittest.TestCase):
 
     def setUp(self):
-        self.temp_dir = TemporaryDirectory()
-        self.data_dir = Path(self.temp_dir.name)
+        self.workflows_df = pd.DataFrame({
+            'WorkflowID': ['X', 'Y'],
+            'ModelForWorkflow': ['A, B', 'C'],
+            'Selected': [True, False],
+        })
+        self.models_df = pd.DataFrame({'ModelID': ['A', 'B', 'C'], 'SortModels': [2, 1, 3]})
+        self.elements_df = pd.DataFrame({'ElementID': ['E1', 'E2'], 'SortElement': [1, 2]})
+        self.attributes_df = pd.DataFrame({
+            'AttributeID': ['1', '2', '3'],
+            'SortAttribute': [2, 1, 3],
+            'ElementLink': ['E1', 'E1, E2', 'E2'],
+            'ModelLink': ['A', 'B', 'C'],
+            'WorkflowLink': ['X', 'X', 'Y'],
+        })
 
-    def tearDown(self):
-        self.temp_dir.cleanup()
+    def test_check_required_columns(self):
+        df = pd.DataFrame({'Column1': [], 'Column2DE': []})
 
-    def test_get_data_path(self):
-        expected_path = Path(__file__).parent.parent / 'data' / VERSION
-        self.assertEqual(get_data_path(VERSION), expected_path)
+        self.assertIsNone(check_required_columns(df, ['Column1', 'Column2*']))
+        self.assertEqual(check_required_columns(df, ['Column1', 'Column3']), "Missing required columns: Column3")
 
-    def test_load_dataframes(self):
-        # Create sample CSV files
-        for file_name in ['M_Attributes.csv', 'M_Elements.csv', 'M_Models.csv', 'M_Workflows.csv']:
-            with open(self.data_dir / file_name, 'w') as f:
-                f.write('Column1,Column2\nValue1,Value2\n')
+    def test_parse_csv_string_keeps_quoted_commas(self):
+        self.assertEqual(parse_csv_string('A, "B,C", D'), ['A', 'B,C', 'D'])
 
-        dataframes = load_dataframes(self.data_dir)
+    def test_process_attributes_df_explodes_links(self):
+        df = pd.DataFrame({
+            'AttributeID': ['1', '2'],
+            'ElementLink': ['E1', 'E1, E2'],
+            'ModelLink': ['A', 'B,C'],
+            'WorkflowLink': ['X', None],
+        })
+        result = _process_attributes_df(df)
 
-        self.assertEqual(len(dataframes), 4)
-        for df_name, df in dataframes.items():
-            self.assertIsInstance(df, pd.DataFrame)
-            self.assertEqual(df.shape, (1, 2))
+        self.assertEqual(result['AttributeID'].tolist(), ['1', '2', '2', '2', '2'])
+        self.assertEqual(result['ElementLink'].tolist(), ['E1', 'E1', 'E1', 'E2', 'E2'])
+        self.assertEqual(result['ModelLink'].tolist(), ['A', 'B', 'C', 'B', 'C'])
+        self.assertEqual(result['WorkflowLink'].tolist(), ['X', '', '', '', ''])
+
+    def test_merge_and_prepare_keep_selected_workflows_sorted(self):
+        merged_df = merge_import_data(self.workflows_df, self.models_df, self.elements_df, self.attributes_df)
+        self.assertEqual(len(merged_df), 4)
+
+        result = prepare_raw_data(merged_df)
+
+        # Workflow Y is not selected, model B is sorted before model A
+        self.assertEqual(result['WorkflowID'].unique().tolist(), ['X'])
+        self.assertEqual(list(zip(result['ModelID'], result['ElementID'])), [('B', 'E1'), ('B', 'E2'), ('A', 'E1')])
+        self.assertEqual(result[SORT_RANK_COLUMN].tolist(), [0, 1, 2])
+
+    def test_workflow_links_keep_every_workflow_of_a_requirement(self):
+        workflows_df = self.workflows_df.assign(Selected=True, WorkflowNameEN=['Costs', 'Energy'])
+        attributes_df = self.attributes_df.assign(ModelLink=['A', 'B', 'C'], WorkflowLink=['X, Y', 'X', 'Y'])
+        merged_df = merge_import_data(workflows_df, self.models_df, self.elements_df, attributes_df)
+
+        links = get_workflow_links(merged_df)
+        self.assertEqual(
+            links[['AttributeID', 'WorkflowID', 'WorkflowNameEN']].values.tolist(),
+            [['1', 'X', 'Costs'], ['1', 'Y', 'Energy'], ['2', 'X', 'Costs'], ['2', 'X', 'Costs'], ['3', 'Y', 'Energy']],
+        )
+        # The raw data keeps attribute 1 once
+        self.assertEqual(prepare_raw_data(merged_df)['AttributeID'].tolist().count('1'), 1)
 
-    def test_check_required_columns(self):
-        df = pd.DataFrame({'Column1': [], 'Column2': []})
-        required_columns = ['Column1', 'Column2*']
-
-        # This should not raise an error
-        check_required_columns(df, required_columns, 'test_df')
-
-        # This should raise a ValueError
-        with self.assertRaises(ValueError):
-            check_required_columns(df, ['Column1', 'Column3'], 'test_df')
-
-    def test_process_attributes_df(self):
-        data = StringIO('''ElementID,ModelID,WorkflowID,SortAttribute
-    1,A,X,2
-    2,"B,C","Y,Z",1
-    3,1,2,3
-    ''')
-        df = pd.read_csv(data)
-        result = process_attributes_df(df)
-
-        # The result should have 6 rows due to exploding "B,C" and "Y,Z"
-        self.assertEqual(result.shape, (6, 4))
-        self.assertEqual(result['SortAttribute'].tolist(), [1.0, 1.0, 1.0, 1.0, 2.0, 3.0])
-        self.assertTrue(all(isinstance(x, str) for x in result['ElementID']))
-        self.assertTrue(all(isinstance(x, str) for x in result['ModelID']))
-        self.assertTrue(all(isinstance(x, str) for x in result['WorkflowID']))
-        
-        # Check if the exploding worked correctly
-        self.assertIn('B', result['ModelID'].tolist())
-        self.assertIn('C', result['ModelID'].tolist())
-        self.assertIn('Y', result['WorkflowID'].tolist())
-        self.assertIn('Z', result['WorkflowID'].tolist())
-        
-        # Check if the rows are in the correct order after sorting by SortAttribute
-        self.assertEqual(result['ElementID'].tolist(), ['2', '2', '2', '2', '1', '3'])
-        self.assertEqual(result['ModelID'].tolist(), ['B', 'B', 'C', 'C', 'A', '1'])
-        self.assertEqual(result['WorkflowID'].tolist(), ['Y', 'Z', 'Y', 'Z', 'X', '2'])
-
-    def test_export_excel(self):
-        df = pd.DataFrame({'Column1': [1, 2], 'Column2': ['A', 'B']})
-        export_excel(df, self.data_dir, VERSION)
-
-        expected_file = self.data_dir / f"Elementplan_{VERSION}_raw_data.xlsx"
-        self.assertTrue(expected_file.exists())
-
-        # Read the Excel file and check its contents
-        df_read = pd.read_excel(expected_file)
-        pd.testing.assert_frame_equal(df, df_read)
-
-        print("Data processing completed successfully.")
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
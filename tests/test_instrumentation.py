@@ -0,0 +1,69 @@
+import unittest
+
+from src import storage_backends
+from src.instrumentation import add_rows_out, build_report, collect, instrument_storage, merge_records, stage
+from src.load_data import store_file
+from src.storage_backends import MemoryBackend
+
+
+@instrument_storage('load', lambda name: name, lambda result, name: {'bytes_read': len(result)})
+def load(name):
+    return b'12345'
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_storage_calls_outside_a_build_are_not_recorded(self):
+        with collect() as records:
+            pass
+        load('a')
+        self.assertEqual(records, [])
+
+    def test_stage_aggregates_storage_calls_and_rows(self):
+        with collect() as records:
+            with stage('import', version='v1') as record:
+                load('a')
+                load('b')
+                add_rows_out(3)
+
+        self.assertEqual(record['bytes_read'], 10)
+        self.assertEqual(record['rows_out'], 3)
+        self.assertEqual(record['status'], 'ok')
+        self.assertIn('wall_seconds', record)
+        self.assertEqual([r['type'] for r in records], ['storage', 'storage', 'stage'])
+
+    def test_failed_stage_is_recorded(self):
+        with collect() as records:
+            with self.assertRaises(ValueError):
+                with stage('import'):
+                    raise ValueError('broken')
+        self.assertEqual(records[0]['status'], 'failed')
+        self.assertEqual(records[0]['error'], 'broken')
+
+    def test_stored_files_are_measured_in_encoded_bytes(self):
+        storage_backends.set_backend(MemoryBackend())
+        try:
+            with collect() as records:
+                self.assertTrue(store_file('Tür', 'V1', 'a.csv'))
+                self.assertTrue(store_file(b'12345', 'V1', 'b.bin'))
+        finally:
+            storage_backends.set_backend(None)
+
+        self.assertEqual([(r['operation'], r['bytes_written']) for r in records], [('store_file', 4), ('store_file', 5)])
+
+    def test_report_merges_worker_records(self):
+        worker_records = [{'type': 'storage', 'operation': 'store', 'seconds': 0.5, 'bytes_written': 7}]
+        with collect() as records:
+            with stage('export') as record:
+                merge_records(worker_records)
+
+        self.assertEqual(record['bytes_written'], 7)
+        report = build_report(records, version='v1')
+        self.assertEqual(report['version'], 'v1')
+        self.assertEqual(report['storage']['store']['calls'], 1)
+        self.assertEqual(report['storage']['store']['bytes_written'], 7)
+        self.assertEqual(len(report['stages']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
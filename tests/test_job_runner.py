@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from src import job_runner
+
+
+class _QueueOnly:
+    """Executor that keeps the jobs queued."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, *args):
+        self.submitted.append(args)
+        return Future()
+
+
+class TestSubmitBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.executor = _QueueOnly()
+        self.patches = [
+            mock.patch.object(job_runner, 'JOBS_FOLDER', Path(self.folder.name) / '.jobs'),
+            mock.patch.object(job_runner, '_get_executor', lambda: self.executor),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.folder.cleanup()
+
+    def test_only_one_of_concurrent_submits_is_queued(self):
+        def submit(_):
+            try:
+                return job_runner.submit_build('V1', 'M')
+            except ValueError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            job_ids = [job_id for job_id in pool.map(submit, range(16)) if job_id]
+
+        self.assertEqual(len(job_ids), 1)
+        self.assertEqual(len(self.executor.submitted), 1)
+        self.assertEqual([job['job_id'] for job in job_runner.list_jobs('V1')], job_ids)
+        self.assertTrue(job_runner.is_build_active('V1'))
+        self.assertFalse(job_runner.is_build_active('V2'))
+
+    def test_lock_holds_the_job_id_as_soon_as_it_exists(self):
+        original_link = job_runner.os.link
+        seen = []
+
+        def link(source, target):
+            original_link(source, target)
+            seen.append(Path(target).read_text(encoding='utf-8'))
+
+        with mock.patch.object(job_runner.os, 'link', link):
+            job_id = job_runner.submit_build('V1', 'M')
+
+        self.assertEqual(seen, [job_id])
+        self.assertEqual(sorted(path.suffix for path in job_runner.JOBS_FOLDER.iterdir()), ['.json', '.lock'])
+
+    def test_version_is_released_when_the_job_ends(self):
+        job_id = job_runner.submit_build('V1', 'M')
+        with mock.patch('src.batch_processing_import.batch_processing_import', side_effect=RuntimeError('broken')):
+            counters = job_runner._run_job(job_id)
+        self.assertEqual(sorted(counters), ['caches', 'operations'])
+
+        self.assertEqual(job_runner.get_job(job_id)['status'], 'failed')
+        self.assertFalse(job_runner.is_build_active('V1'))
+        self.assertNotEqual(job_runner.submit_build('V1', 'M'), job_id)
+
+    def test_lock_of_an_interrupted_job_is_released(self):
+        job_id = job_runner.submit_build('V1', 'M')
+        job = job_runner.get_job(job_id)
+        job['server_pid'] = None
+        job_runner._write_job(job)
+
+        self.assertFalse(job_runner.is_build_active('V1'))
+        job_runner.submit_build('V1', 'M')
+        self.assertEqual(len(self.executor.submitted), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
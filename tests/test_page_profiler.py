@@ -0,0 +1,29 @@
+import unittest
+from unittest import mock
+
+from src import page_profiler
+from src.page_profiler import profile_phase, start_page_profiling
+
+
+class TestPageProfiler(unittest.TestCase):
+
+    def test_repeated_phases_are_summed(self):
+        with mock.patch.object(page_profiler, 'PAGE_PROFILING', True):
+            profile = start_page_profiling('requirements')
+            for _ in range(3):
+                with profile_phase('image_link'):
+                    pass
+
+        sample = profile.sample()
+        self.assertEqual(sample['page'], 'requirements')
+        self.assertEqual(sample['phases']['image_link']['calls'], 3)
+
+    def test_disabled_profiling_records_nothing(self):
+        with mock.patch.object(page_profiler, 'PAGE_PROFILING', False):
+            self.assertIsNone(start_page_profiling('requirements'))
+            with profile_phase('load_data'):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from src import storage_backends
+from src.load_data import create_storage_folder, store_file
+from src.project_index import (
+    INDEX_FOLDER,
+    get_project_overview,
+    get_projects_of_master,
+    get_projects_using_workflow,
+    load_project_index,
+    update_project_index,
+)
+from src.storage_backends import LocalBackend, MemoryBackend
+
+WORKFLOWS_CSV = 'WorkflowID,WorkflowCode,Selected\nW1,UC1,True\nW2,UC2,False\n'
+
+
+def _use_local_backend(root):
+    storage_backends.set_backend(LocalBackend(root))
+
+
+def _update(version):
+    return update_project_index(version, 'P', {})['version']
+
+
+class TestProjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+        for version in ('V1', 'V1-P-007'):
+            create_storage_folder(version)
+            store_file(WORKFLOWS_CSV, version, 'M_Workflows.csv')
+            store_file(b'xlsx', version, f'Elementplan_DE_{version}.xlsx')
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_entries_are_updated_per_build(self):
+        update_project_index('V1', 'M', {'built': '2026-01-01T00:00:00', 'inputs': {'M_Workflows.csv': 'abc'}})
+        entry = update_project_index('V1-P-007', 'P', {})
+
+        self.assertEqual(entry['master'], 'V1')
+        self.assertEqual(entry['workflows'], ['UC1'])
+        self.assertEqual(entry['languages'], ['DE'])
+        self.assertEqual(list(entry['outputs']), ['Elementplan_DE_V1-P-007.xlsx'])
+
+        versions = load_project_index()
+        self.assertEqual(versions['V1']['inputs']['M_Workflows.csv'], 'abc')
+        self.assertEqual(get_projects_of_master(versions, 'V1'), ['V1-P-007'])
+        self.assertEqual(get_projects_using_workflow(versions, 'UC2'), [])
+        self.assertEqual(get_project_overview(versions)['Version'].tolist(), ['V1', 'V1-P-007'])
+
+    def test_an_unreadable_entry_does_not_hide_the_others(self):
+        update_project_index('V1', 'M', {})
+        store_file('{"version": "V1-P-0', INDEX_FOLDER, 'V1-P-007.json')
+
+        self.assertEqual(list(load_project_index()), ['V1'])
+
+
+class TestConcurrentBuilds(unittest.TestCase):
+
+    def test_no_entry_is_lost(self):
+        versions = [f'V1-P-{number:03}' for number in range(16)]
+        with tempfile.TemporaryDirectory() as root:
+            _use_local_backend(root)
+            try:
+                for version in versions:
+                    create_storage_folder(version)
+                with ProcessPoolExecutor(max_workers=8, initializer=_use_local_backend, initargs=(root,)) as executor:
+                    list(executor.map(_update, versions))
+                self.assertEqual(sorted(load_project_index()), versions)
+            finally:
+                storage_backends.set_backend(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
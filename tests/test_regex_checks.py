@@ -0,0 +1,62 @@
+import re
+import unittest
+
+import pandas as pd
+
+from src import regex_checks, storage_backends
+from src.load_data import store_file
+from src.regex_checks import (
+    check_allowed_values,
+    compile_pattern,
+    create_regex_checks,
+    load_regex_checks,
+    split_allowed_values,
+)
+from src.storage_backends import MemoryBackend
+
+ATTRIBUTES = pd.DataFrame({
+    'AttributeID': ['A1', 'A2', 'A3', 'A4'],
+    'RegexCheckDE': ['^(Ja|Nein)$', '^(Ja|Nein)$', '([', None],
+    'RegexCheckEN': ['^(Yes|No)$', '^(Yes|No)$', '[0-9]+', '[0-9]+'],
+    'AllowedValuesDE': ['Ja, Nein', 'Ja, Vielleicht', None, None],
+    'AllowedValuesEN': ['Yes, No', 'Yes, No', '1, "2,5"', None],
+})
+
+
+class TestRegexChecks(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_allowed_values_are_checked_against_the_pattern(self):
+        failed = check_allowed_values(ATTRIBUTES)
+
+        self.assertEqual(failed[['row', 'language']].values.tolist(), [[1, 'DE'], [2, 'DE'], [2, 'EN']])
+        self.assertEqual(failed['invalid_values'].tolist()[0], ['Vielleicht'])
+        self.assertIsNotNone(failed['error'].tolist()[1])
+        self.assertEqual(failed['invalid_values'].tolist()[2], ['2,5'])
+
+    def test_patterns_are_compiled_once(self):
+        regex_checks._compile.cache_clear()
+        check_allowed_values(ATTRIBUTES)
+        self.assertEqual(regex_checks._compile.cache_info().currsize, 4)
+        with self.assertRaises(re.error):
+            compile_pattern('([')
+        self.assertEqual(split_allowed_values('a, "b,c",'), ['a', 'b,c'])
+
+    def test_stored_checks_are_loaded_compiled(self):
+        store_file(ATTRIBUTES.to_csv(index=False), 'V1', 'M_Attributes.csv')
+        checks = create_regex_checks('V1')
+        self.assertEqual(len(checks['patterns']), 4)
+
+        patterns = load_regex_checks('V1')
+        self.assertEqual(sorted(patterns['A3']), ['EN'])
+        self.assertTrue(patterns['A1']['DE'].fullmatch('Nein'))
+        self.assertIs(patterns['A4']['EN'], patterns['A3']['EN'])
+
+
+if __name__ == '__main__':
+    unittest.main()
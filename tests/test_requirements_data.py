@@ -0,0 +1,52 @@
+import unittest
+import pandas as pd
+
+from src.requirements_data import (
+    COMMON_COLUMNS,
+    filter_by_project_phases,
+    filter_columns_by_language,
+    get_project_phases,
+    prepare_requirements_data,
+    split_by_model_and_element,
+)
+from src.sort import SORT_RANK_COLUMN
+
+
+class TestRequirementsData(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'ModelNameDE': ['M1', 'M1', 'M2', None],
+            'ElementNameDE': ['Wand', 'Decke', 'Wand', 'Tür'],
+            'ProjectPhaseDE': ['31, 41', '41', None, '5'],
+        })
+
+    def test_project_phases_are_split_and_sorted(self):
+        self.assertEqual(get_project_phases(self.data, 'DE'), ['31', '41', '5'])
+
+    def test_filter_by_project_phases_matches_whole_phases(self):
+        self.assertEqual(filter_by_project_phases(self.data, 'DE', ['41']).index.tolist(), [0, 1])
+        self.assertEqual(filter_by_project_phases(self.data, 'DE', ['4']).index.tolist(), [])
+        self.assertEqual(len(filter_by_project_phases(self.data, 'DE', [])), 4)
+
+    def test_split_by_model_and_element_keeps_order(self):
+        models = split_by_model_and_element(self.data, 'DE')
+
+        self.assertEqual([model_name for model_name, _, _ in models], ['M1', 'M2'])
+        self.assertEqual([element_name for element_name, _ in models[0][2]], ['Wand', 'Decke'])
+        self.assertEqual(len(models[0][1]), 2)
+
+    def test_web_data_without_sort_rank(self):
+        data = pd.DataFrame({column: ['2', '1'] for column in COMMON_COLUMNS + ['ElementNameDE', 'ElementNameEN']})
+
+        filtered = filter_columns_by_language(data, 'DE')
+        self.assertNotIn(SORT_RANK_COLUMN, filtered.columns)
+        self.assertNotIn('ElementNameEN', filtered.columns)
+        self.assertEqual(len(prepare_requirements_data(data, 'DE')), 2)
+
+        ranked = filter_columns_by_language(data.assign(**{SORT_RANK_COLUMN: [1, 0]}), 'DE')
+        self.assertIn(SORT_RANK_COLUMN, ranked.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import pandas as pd
+
+from src import storage_backends
+from src.load_data import store_file
+from src.search_index import build_search_index, create_search_index, get_search_index, load_search_index, search, tokenize
+from src.storage_backends import MemoryBackend
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'ElementNameEN': ['Wall', 'Wall', 'Door', 'Window'],
+            'ElementNameDE': ['Wand', 'Wand', 'Tür', 'Fenster'],
+            'ElementDescriptionEN': ['Load bearing wall', 'Load bearing wall', 'Fire door', None],
+            'AttributeName': ['IsExternal', 'FireRating', 'FireRating', 'ThermalTransmittance'],
+            'AttributeDescriptionEN': ['Outside', 'Fire resistance', 'Fire resistance of the door', 'U value'],
+            'Pset': ['Pset_WallCommon', 'Pset_WallCommon', 'Pset_DoorCommon', 'Pset_WindowCommon'],
+            'IfcEntityIfc4.0Name': ['IfcWall', 'IfcWall', 'IfcDoor', 'IfcWindow'],
+        })
+        self.index = build_search_index(self.df, 'EN')
+
+    def test_tokenize_splits_names(self):
+        self.assertEqual(tokenize('Pset_WallCommon IFCWall'), ['pset', 'wallcommon', 'wall', 'common', 'ifcwall', 'ifc', 'wall'])
+        self.assertEqual(tokenize('Türhöhe 3D'), ['türhöhe', '3d', '3', 'd'])
+
+    def test_names_rank_above_descriptions(self):
+        rows, scores = search(self.index, 'fire')
+        self.assertEqual(rows.tolist(), [2, 1])
+        self.assertGreater(scores[0], scores[1])
+
+    def test_all_words_match_and_the_last_one_as_prefix(self):
+        self.assertEqual(search(self.index, 'wall ext')[0].tolist(), [0])
+        self.assertEqual(search(self.index, 'win')[0].tolist(), [3])
+        self.assertEqual(search(self.index, 'door wall')[0].tolist(), [])
+        self.assertEqual(search(self.index, '  ')[0].tolist(), [])
+
+    def test_limit_and_rows(self):
+        self.assertEqual(search(self.index, 'common', limit=2)[0].tolist(), [0, 1])
+        self.assertEqual(search(self.index, 'common', rows=[1, 3])[0].tolist(), [1, 3])
+
+    def test_one_index_per_language_is_stored(self):
+        storage_backends.set_backend(MemoryBackend())
+        try:
+            store_file(self.df.to_csv(index=False), 'V1', 'data_for_web.csv')
+            self.assertIsNone(load_search_index('V1', 'DE'))
+            self.assertEqual(search(get_search_index('V1', 'DE'), 'tür')[0].tolist(), [2])
+
+            self.assertEqual(sorted(create_search_index('V1')), ['DE', 'EN'])
+            stored = load_search_index('V1', 'EN')
+        finally:
+            storage_backends.set_backend(None)
+
+        for name, values in self.index.items():
+            self.assertEqual(stored[name].tolist(), values.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.sort import SORT_RANK_COLUMN, add_sort_rank, is_sorted, sort_dataframe
+
+
+class TestSortDataframe(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'SortModels': ['2', '1', '1', '1,5', None],
+            'SortElement': ['1', '2', '1', '1', '1'],
+            'SortAttribute': [1, 2, 1, 3, 1],
+            'Name': ['d', 'c', 'a', 'b', 'e'],
+        })
+
+    def test_sorts_numeric_with_decimal_comma_and_nan_last(self):
+        result = sort_dataframe(self.df)
+        self.assertEqual(result['Name'].tolist(), ['a', 'c', 'b', 'd', 'e'])
+        self.assertTrue(pd.api.types.is_numeric_dtype(result['SortModels']))
+
+    def test_does_not_mutate_input(self):
+        sort_dataframe(self.df)
+        self.assertEqual(self.df['SortModels'].tolist(), ['2', '1', '1', '1,5', None])
+
+    def test_sorted_input_is_returned_without_copy(self):
+        result = sort_dataframe(self.df)
+        self.assertIs(sort_dataframe(result), result)
+
+    def test_is_stable(self):
+        df = pd.DataFrame({'SortModels': [1, 1, 1], 'SortElement': [1, 1, 1], 'SortAttribute': [2, 1, 2], 'Name': ['x', 'y', 'z']})
+        self.assertEqual(sort_dataframe(df)['Name'].tolist(), ['y', 'x', 'z'])
+
+    def test_sort_rank_survives_filtering(self):
+        ranked = add_sort_rank(self.df.copy())
+        self.assertEqual(ranked[SORT_RANK_COLUMN].tolist(), list(range(5)))
+        subset = ranked[ranked['Name'] != 'c']
+        self.assertTrue(is_sorted(subset))
+        self.assertIs(sort_dataframe(subset), subset)
+
+    def test_same_order_as_sort_values(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(rng.integers(0, 4, size=(200, 3)), columns=['SortModels', 'SortElement', 'SortAttribute'])
+        expected = df.sort_values(by=['SortModels', 'SortElement', 'SortAttribute'], kind='stable')
+        self.assertEqual(sort_dataframe(df).index.tolist(), expected.index.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src import storage_backends
+from src.build_manifest import VERSION_INPUT_FILES, is_up_to_date, store_manifest
+from src.load_data import copy_base_files, get_versions, load_file, store_file
+from src.storage_backends import LocalBackend, MemoryBackend, SQLiteBackend
+
+
+class BackendContract:
+    """The behaviour every backend must provide, run against each backend below."""
+
+    def create_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.backend = self.create_backend()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        self.backend.create_folder('V1')
+        self.backend.write_bytes('V1', 'a.csv', b'A,B\n1,2\n')
+        self.assertEqual(self.backend.read_bytes('V1', 'a.csv'), b'A,B\n1,2\n')
+        with self.assertRaises(FileNotFoundError):
+            self.backend.read_bytes('V1', 'missing.csv')
+
+    def test_write_stream(self):
+        self.backend.create_folder('V1')
+        content = b'x' * (storage_backends.CHUNK_SIZE + 10)
+        self.assertEqual(self.backend.write_stream('V1', 'big.xlsx', io.BytesIO(content)), len(content))
+        self.assertEqual(self.backend.read_bytes('V1', 'big.xlsx'), content)
+
+    def test_list_and_copy(self):
+        for version in ('V1', 'V2', '.jobs'):
+            self.backend.create_folder(version)
+        self.backend.write_bytes('V1', 'a.csv', b'123')
+        self.backend.write_bytes('V1', 'b.png', b'45')
+        self.backend.write_bytes('V1', 'c.xlsx', b'6789')
+
+        self.assertEqual(self.backend.copy_files('V1', 'P1', ('.csv', '.png')), 5)
+        self.assertEqual(self.backend.list_versions(), ['V2', 'V1', 'P1'])
+        self.assertEqual(self.backend.read_bytes('P1', 'b.png'), b'45')
+        with self.assertRaises(FileNotFoundError):
+            self.backend.read_bytes('P1', 'c.xlsx')
+
+        self.assertIsNotNone(self.backend.download_link('P1', 'a.csv'))
+        self.assertIsNone(self.backend.download_link('P1', 'missing.png'))
+
+    def test_stat_and_list_files(self):
+        self.backend.create_folder('V1')
+        self.backend.write_bytes('V1', 'b.csv', b'123')
+        self.backend.write_bytes('V1', 'a.csv', b'1')
+
+        info = self.backend.stat_file('V1', 'b.csv')
+        self.assertEqual((info['name'], info['size']), ('b.csv', 3))
+        self.backend.write_bytes('V1', 'b.csv', b'1234')
+        self.assertNotEqual(self.backend.stat_file('V1', 'b.csv')['etag'], info['etag'])
+
+        self.assertEqual([info['name'] for info in self.backend.list_files('V1')], ['a.csv', 'b.csv'])
+        with self.assertRaises(FileNotFoundError):
+            self.backend.stat_file('V1', 'missing.csv')
+
+
+class TestLocalBackend(BackendContract, unittest.TestCase):
+
+    def create_backend(self):
+        return LocalBackend(Path(self.temp_dir.name))
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+
+    def create_backend(self):
+        return MemoryBackend()
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+
+    def create_backend(self):
+        return SQLiteBackend(Path(self.temp_dir.name) / 'storage.sqlite')
+
+
+class TestLoadDataWithBackend(unittest.TestCase):
+
+    def setUp(self):
+        storage_backends.set_backend(MemoryBackend())
+
+    def tearDown(self):
+        storage_backends.set_backend(None)
+
+    def test_load_data_uses_the_selected_backend(self):
+        store_file(pd.DataFrame({'A': [1, 2]}).to_csv(index=False), 'V1', 'a.csv')
+        copy_base_files('V1', 'P1')
+
+        self.assertEqual(get_versions(), ['V1', 'P1'])
+        self.assertEqual(load_file('P1', 'a.csv')['A'].tolist(), [1, 2])
+        with self.assertRaises(RuntimeError):
+            load_file('P1', 'missing.csv')
+
+    def test_manifest_is_checked_with_the_etags(self):
+        for file_name in VERSION_INPUT_FILES:
+            store_file('A\n1\n', 'V1', file_name)
+        store_manifest('V1', 'M', [], 1.0)
+        self.assertTrue(is_up_to_date('V1', 'M'))
+
+        store_file('A\n2\n', 'V1', 'M_Models.csv')
+        self.assertFalse(is_up_to_date('V1', 'M'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import functools
+import unittest
+
+import pandas as pd
+
+from src import storage_backends, storage_metrics
+from src.load_data import store_file
+from src.parallel_export import run_tasks
+from src.storage_backends import AzureBackend, MemoryBackend
+
+
+def _store(df, name):
+    return store_file(df.to_csv(index=False), 'V1', name)
+
+
+class TestStorageMetrics(unittest.TestCase):
+
+    def setUp(self):
+        storage_metrics.reset()
+
+    def tearDown(self):
+        storage_metrics.reset()
+
+    def test_calls_are_aggregated_per_backend_and_operation(self):
+        storage_metrics.record_call('azure', 'load_file', 0.002, bytes_read=100)
+        storage_metrics.record_call('azure', 'load_file', 0.2, bytes_read=50)
+        storage_metrics.record_call('azure', 'load_file', 20, error=True)
+
+        metrics = storage_metrics.snapshot()['operations']['azure']['load_file']
+        self.assertEqual(metrics['calls'], 3)
+        self.assertEqual(metrics['errors'], 1)
+        self.assertEqual(metrics['bytes_read'], 150)
+        self.assertEqual(metrics['max_seconds'], 20)
+        self.assertEqual(metrics['p50_seconds'], 0.5)
+        self.assertIsNone(metrics['p95_seconds'])
+        self.assertEqual(metrics['histogram']['0.005'], 1)
+        self.assertEqual(metrics['histogram']['inf'], 1)
+
+    def test_azure_clients_are_cached_per_settings(self):
+        backend = AzureBackend('account', 'key', 'container')
+        first = backend.client()
+        storage_metrics.reset()
+        self.assertIs(AzureBackend('account', 'key', 'other').client(), first)
+        self.assertIsNot(backend.client(max_block_size=1024), first)
+
+        self.assertEqual(storage_metrics.snapshot()['caches']['azure']['client']['hits'], 1)
+
+    def test_cached_calls_count_hits_and_misses_per_backend(self):
+        @functools.lru_cache
+        def load(version, etag):
+            storage_metrics.mark_cache_miss()
+            return version
+
+        for backend, etag in (('local', 'a'), ('local', 'a'), ('local', 'b'), ('azure', 'a')):
+            self.assertEqual(storage_metrics.cached_call(backend, 'web_data', load, 'V1', etag), 'V1')
+
+        caches = storage_metrics.snapshot()['caches']
+        self.assertEqual(caches['local']['web_data'], {'hits': 1, 'misses': 2, 'hit_rate': 0.333})
+        self.assertEqual(caches['azure']['web_data'], {'hits': 1, 'misses': 0, 'hit_rate': 1.0})
+
+    def test_counters_of_worker_processes_are_merged(self):
+        storage_backends.set_backend(MemoryBackend())
+        try:
+            self.assertEqual(run_tasks(_store, pd.DataFrame({'a': [1]}), ['a.csv', 'b.csv', 'c.csv'], max_workers=2), [True] * 3)
+        finally:
+            storage_backends.set_backend(None)
+
+        metrics = storage_metrics.snapshot()['operations']['memory']['store_file']
+        self.assertEqual(metrics['calls'], 3)
+        self.assertEqual(metrics['bytes_written'], 12)
+        self.assertEqual(sum(metrics['histogram'].values()), 3)
+
+    def test_take_clears_the_counters(self):
+        storage_metrics.record_call('local', 'load_file', 0.002, bytes_read=100)
+        counters = storage_metrics.take()
+        self.assertEqual(storage_metrics.snapshot()['operations'], {})
+
+        storage_metrics.record_call('local', 'load_file', 0.5)
+        storage_metrics.merge(counters)
+        metrics = storage_metrics.snapshot()['operations']['local']['load_file']
+        self.assertEqual((metrics['calls'], metrics['bytes_read'], metrics['max_seconds']), (2, 100, 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
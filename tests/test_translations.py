@@ -0,0 +1,31 @@
+import unittest
+
+from src.translations import TranslationService, remove_language_postfix
+
+
+class TestTranslationService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = TranslationService({
+            'word_report': {'titel': {'DE': 'Modellierungsrichtlinie', 'EN': 'Modelingguidlines'}},
+            'column_names': {
+                'ElementName': {'DE': 'Element Name', 'FR': "Nom de l'élément"},
+                'Pset': {'DE': 'Eigenschaften Gruppe (Pset)'},
+            },
+        })
+
+    def test_remove_language_postfix(self):
+        self.assertEqual(remove_language_postfix('ElementNameDE'), 'ElementName')
+        self.assertEqual(remove_language_postfix('Pset'), 'Pset')
+
+    def test_column_name_map(self):
+        mapping = self.service.column_name_map(['ElementNameFR', 'Pset', 'Unit'], 'FR')
+        self.assertEqual(mapping, {'ElementNameFR': "Nom de l'élément", 'Pset': 'Pset', 'Unit': 'Unit'})
+        self.assertIs(mapping, self.service.column_name_map(['ElementNameFR', 'Pset', 'Unit'], 'FR'))
+
+    def test_text(self):
+        self.assertEqual(self.service.text('word_report', 'titel', language='EN'), 'Modelingguidlines')
+
+
+if __name__ == '__main__':
+    unittest.main()